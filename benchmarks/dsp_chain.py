@@ -0,0 +1,155 @@
+"""
+Compares chaining the convert-to-mono, resample, change-volume and trim-silence filters with
+the dsp-chain filter (mono|resampling|gain|trim) on the same stereo clips (with leading and trailing
+silence). Reports wall time, tracemalloc peak and the number of allocated blocks still held after
+processing, as well as the maximum absolute difference between the outputs of the two approaches.
+
+Usage:
+    python benchmarks/dsp_chain.py --clips 256 --orig_sr 44100 --target_sr 16000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+from seppl import Session
+
+from adc.api import SpeechData, to_float
+from adc.filter import ConvertToMono, Resample, ChangeVolume, TrimSilence, DSPChain
+from adc.filter import DSP_OPERATION_MONO, DSP_OPERATION_RESAMPLE, DSP_OPERATION_GAIN, DSP_OPERATION_TRIM
+
+
+def generate_clips(clips: int, min_duration: float, max_duration: float, sample_rate: int) -> list:
+    """
+    Generates stereo noise clips with silence before and after.
+
+    :param clips: the number of clips to generate
+    :type clips: int
+    :param min_duration: the minimum duration in seconds
+    :type min_duration: float
+    :param max_duration: the maximum duration in seconds
+    :type max_duration: float
+    :param sample_rate: the sample rate to use
+    :type sample_rate: int
+    :return: the list of audio arrays (frames x channels)
+    :rtype: list
+    """
+    rng = np.random.default_rng(42)
+    result = []
+    for _ in range(clips):
+        frames = int(sample_rate * rng.uniform(min_duration, max_duration))
+        silence = np.zeros((int(sample_rate * 0.25), 2), dtype=np.float32)
+        noise = (rng.standard_normal((frames, 2)) * 0.1).astype(np.float32)
+        result.append(np.concatenate([silence, noise, silence]))
+    return result
+
+
+def make_items(signals: list, sample_rate: int) -> list:
+    """
+    Turns the audio arrays into records.
+
+    :param signals: the audio arrays
+    :type signals: list
+    :param sample_rate: the sample rate of the audio
+    :type sample_rate: int
+    :return: the records
+    :rtype: list
+    """
+    return [SpeechData(audio_name="%06d.wav" % i, audio=x, sample_rate=sample_rate, annotation="clip %d" % i)
+            for i, x in enumerate(signals)]
+
+
+def init_filter(flt):
+    """
+    Initializes the filter for standalone use.
+
+    :param flt: the filter to initialize
+    :return: the filter
+    """
+    flt.session = Session()
+    flt.initialize()
+    return flt
+
+
+def run(name: str, filters: list, items: list) -> list:
+    """
+    Pushes the records through the filters and outputs time, peak memory and allocated blocks.
+
+    :param name: the name of the approach
+    :type name: str
+    :param filters: the filters to apply in order
+    :type filters: list
+    :param items: the records to process
+    :type items: list
+    :return: the processed records
+    :rtype: list
+    """
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    output = []
+    for item in items:
+        data = item
+        for flt in filters:
+            data = flt.process(data)
+        output.append(data)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum([stat.count for stat in tracemalloc.take_snapshot().statistics("filename")])
+    tracemalloc.stop()
+    print("%-8s %9.2fs %10.1fMB %10.1fMB %10d" % (name, elapsed, (peak - before) / 1024 / 1024, (current - before) / 1024 / 1024, blocks))
+    return output
+
+
+def main(args=None):
+    """
+    Runs the benchmark.
+
+    :param args: the command-line arguments to use, uses sys.argv if None
+    :type args: list
+    """
+    parser = argparse.ArgumentParser(description="Compares chained DSP filters with the dsp-chain filter.")
+    parser.add_argument("--clips", type=int, default=256, help="The number of clips.")
+    parser.add_argument("--min_duration", type=float, default=1.5, help="The minimum duration of the clips in seconds (excluding silence).")
+    parser.add_argument("--max_duration", type=float, default=2.5, help="The maximum duration of the clips in seconds (excluding silence).")
+    parser.add_argument("--orig_sr", type=int, default=44100, help="The sample rate of the clips.")
+    parser.add_argument("--target_sr", type=int, default=16000, help="The sample rate to resample to.")
+    parser.add_argument("--factor", type=float, default=0.5, help="The gain factor to apply.")
+    ns = parser.parse_args(args=args)
+
+    signals = generate_clips(ns.clips, ns.min_duration, ns.max_duration, ns.orig_sr)
+
+    chained = [
+        init_filter(ConvertToMono()),
+        init_filter(Resample(sample_rate=ns.target_sr)),
+        init_filter(ChangeVolume(factor=ns.factor)),
+        init_filter(TrimSilence()),
+    ]
+    single = [
+        init_filter(DSPChain(operations=[DSP_OPERATION_MONO, DSP_OPERATION_RESAMPLE, DSP_OPERATION_GAIN, DSP_OPERATION_TRIM],
+                             sample_rate=ns.target_sr, factor=ns.factor)),
+    ]
+
+    # warm-up (lazy imports, caches)
+    for filters in [chained, single]:
+        for item in make_items(signals[:2], ns.orig_sr):
+            for flt in filters:
+                item = flt.process(item)
+
+    print("%-8s %10s %12s %12s %10s" % ("approach", "time", "peak", "retained", "blocks"))
+    output_chained = run("chained", chained, make_items(signals, ns.orig_sr))
+    output_single = run("single", single, make_items(signals, ns.orig_sr))
+
+    diff = 0.0
+    for x, y in zip(output_chained, output_single):
+        if x.audio.shape != y.audio.shape:
+            raise Exception("Shapes differ for %s: %s != %s" % (x.audio_name, str(x.audio.shape), str(y.audio.shape)))
+        diff = max(diff, float(np.abs(to_float(x.audio) - to_float(y.audio)).max()))
+    print("max abs difference: %.1e" % diff)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Measures the peak RSS of a batch pipeline that sends each record through several branches
+(like tee sub-flows or augmentations in "add" mode), comparing copy-on-write duplicates
+with deep copies of audio and meta-data (the behavior before copy-on-write).
+
+One branch modifies the audio in-place (gain), one modifies the meta-data, the other
+branches only read. Each mode runs in a separate process, as ru_maxrss is per process.
+
+Usage:
+    python benchmarks/duplicate_rss.py --records 10000 --branches 5
+"""
+import argparse
+import copy
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from adc.api import AudioData
+
+MODE_COW = "cow"
+MODE_DEEPCOPY = "deepcopy"
+MODES = [MODE_COW, MODE_DEEPCOPY]
+
+
+def duplicate(item: AudioData, mode: str) -> AudioData:
+    """
+    Duplicates the record.
+
+    :param item: the record to duplicate
+    :type item: AudioData
+    :param mode: the duplication mode (see MODES)
+    :type mode: str
+    :return: the duplicate
+    :rtype: AudioData
+    """
+    if mode == MODE_DEEPCOPY:
+        return item.duplicate(audio=item.audio.copy(), metadata=copy.deepcopy(item.get_metadata()), modified=False)
+    return item.duplicate()
+
+
+def run(mode: str, records: int, branches: int, duration: float, sample_rate: int):
+    """
+    Runs the pipeline and outputs peak RSS and time.
+
+    :param mode: the duplication mode (see MODES)
+    :type mode: str
+    :param records: the number of records to generate
+    :type records: int
+    :param branches: the number of branches per record
+    :type branches: int
+    :param duration: the duration of the audio in seconds
+    :type duration: float
+    :param sample_rate: the sample rate of the audio
+    :type sample_rate: int
+    """
+    rng = np.random.default_rng(42)
+    frames = int(duration * sample_rate)
+    start = time.perf_counter()
+    output = []
+    for i in range(records):
+        item = AudioData(audio_name="%06d.wav" % i, audio=rng.standard_normal(frames, dtype=np.float32),
+                         sample_rate=sample_rate, metadata={"id": i, "tags": ["a", "b", "c"], "stats": {"snr": 1.0}})
+        for b in range(branches):
+            dup = duplicate(item, mode)
+            if b == 1:
+                dup.mutable_audio()[:] *= 0.5
+            elif b == 2:
+                dup.get_metadata()["branch"] = b
+            output.append(dup)
+        # the original is not passed on
+        del item
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print("%-8s records=%d branches=%d outputs=%d peak_rss=%.1fMB time=%.2fs" % (mode, records, branches, len(output), peak, elapsed))
+
+
+def main(args=None):
+    """
+    Runs the benchmark.
+
+    :param args: the command-line arguments to use, uses sys.argv if None
+    :type args: list
+    """
+    parser = argparse.ArgumentParser(description="Compares the peak RSS of copy-on-write and deep-copy duplicates.")
+    parser.add_argument("--records", type=int, default=10000, help="The number of records.")
+    parser.add_argument("--branches", type=int, default=5, help="The number of branches per record.")
+    parser.add_argument("--duration", type=float, default=0.5, help="The duration of the audio in seconds.")
+    parser.add_argument("--sample_rate", type=int, default=16000, help="The sample rate of the audio.")
+    parser.add_argument("--mode", choices=MODES, default=None, help="Runs only the specified mode (in this process).")
+    ns = parser.parse_args(args=args)
+    if ns.mode is not None:
+        run(ns.mode, ns.records, ns.branches, ns.duration, ns.sample_rate)
+        return
+    for mode in MODES:
+        subprocess.run([sys.executable, __file__, "--mode", mode, "--records", str(ns.records),
+                        "--branches", str(ns.branches), "--duration", str(ns.duration),
+                        "--sample_rate", str(ns.sample_rate)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares resampling clips one at a time via librosa.resample (per-item) with the BatchResampler
+(batched, with one and several workers) for all the resampling types of the resample filter.
+Types whose libraries are not installed get skipped.
+
+Usage:
+    python benchmarks/resample_types.py --clips 256 --orig_sr 16000 --target_sr 22050
+"""
+import argparse
+import time
+
+import librosa
+import numpy as np
+
+from adc.api import BatchResampler
+from adc.filter._resample import RESAMPLE_TYPES
+
+
+def main(args=None):
+    """
+    Runs the benchmark.
+
+    :param args: the command-line arguments to use, uses sys.argv if None
+    :type args: list
+    """
+    parser = argparse.ArgumentParser(description="Compares per-item and batched resampling for all resampling types.")
+    parser.add_argument("--clips", type=int, default=256, help="The number of clips.")
+    parser.add_argument("--min_duration", type=float, default=1.5, help="The minimum duration of the clips in seconds.")
+    parser.add_argument("--max_duration", type=float, default=2.5, help="The maximum duration of the clips in seconds.")
+    parser.add_argument("--orig_sr", type=int, default=16000, help="The sample rate of the clips.")
+    parser.add_argument("--target_sr", type=int, default=22050, help="The sample rate to resample to.")
+    parser.add_argument("--batch_size", type=int, default=32, help="The batch size.")
+    parser.add_argument("--num_workers", type=int, default=4, help="The number of workers for the multi-threaded run.")
+    parser.add_argument("--types", choices=RESAMPLE_TYPES, nargs="*", default=RESAMPLE_TYPES, help="The resampling types to test.")
+    ns = parser.parse_args(args=args)
+
+    rng = np.random.default_rng(42)
+    signals = [(rng.standard_normal(int(ns.orig_sr * rng.uniform(ns.min_duration, ns.max_duration))).astype(np.float32), ns.orig_sr)
+               for _ in range(ns.clips)]
+
+    print("%-16s %10s %10s %10s %10s" % ("type", "per-item", "batched", "workers", "max diff"))
+    for res_type in RESAMPLE_TYPES:
+        if res_type not in ns.types:
+            continue
+        try:
+            start = time.perf_counter()
+            reference = [librosa.resample(x, orig_sr=sr, target_sr=ns.target_sr, res_type=res_type) for x, sr in signals]
+            per_item = time.perf_counter() - start
+        except Exception as e:
+            print("%-16s unavailable: %s" % (res_type, str(e).split("\n")[0]))
+            continue
+
+        resampler = BatchResampler(ns.target_sr, res_type, batch_size=ns.batch_size, num_workers=1)
+        start = time.perf_counter()
+        output = resampler.resample(signals)
+        batched = time.perf_counter() - start
+
+        resampler = BatchResampler(ns.target_sr, res_type, batch_size=ns.batch_size, num_workers=ns.num_workers)
+        start = time.perf_counter()
+        resampler.resample(signals)
+        workers = time.perf_counter() - start
+        resampler.close()
+
+        diff = max([np.abs(x - y).max() for x, y in zip(reference, output)])
+        print("%-16s %9.2fs %9.2fs %9.2fs %10.1e" % (res_type, per_item, batched, workers, diff))
+
+
+if __name__ == "__main__":
+    main()
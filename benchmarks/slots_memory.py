@@ -0,0 +1,114 @@
+"""
+Measures the memory of unloaded records built from a synthetic Common Voice TSV: the parsed
+row data (strings, meta-data dicts) and the SpeechData containers themselves, both via tracemalloc.
+The containers are built the same way as the from-commonvoice-sp reader does.
+
+Usage:
+    python benchmarks/slots_memory.py --records 5000000
+"""
+import argparse
+import csv
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from adc.api import SpeechData
+
+HEADER = ["client_id", "path", "sentence", "up_votes", "down_votes", "age", "gender", "accent", "locale", "segment"]
+
+
+def generate_tsv(path: str, records: int):
+    """
+    Generates a synthetic Common Voice TSV file.
+
+    :param path: the file to write
+    :type path: str
+    :param records: the number of records to generate
+    :type records: int
+    """
+    with open(path, "w") as fp:
+        fp.write("\t".join(HEADER) + "\n")
+        for i in range(records):
+            fp.write("%040x\tcommon_voice_en_%08d.mp3\tThis is the synthetic sentence number %d.\t%d\t%d\ttwenties\tfemale\t\ten\t\n"
+                     % (i * 7919, i, i, i % 5, i % 3))
+
+
+def read_rows(path: str) -> list:
+    """
+    Parses the TSV file into tuples of source, sentence and meta-data.
+
+    :param path: the file to read
+    :type path: str
+    :return: the list of tuples
+    :rtype: list
+    """
+    result = []
+    basedir = os.path.dirname(path)
+    with open(path, "r", newline="") as fp:
+        reader = csv.DictReader(fp, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in reader:
+            meta = {
+                "client_id": row["client_id"],
+                "up_votes": row["up_votes"],
+                "down_votes": row["down_votes"],
+                "age": row["age"],
+                "gender": row["gender"],
+                "locale": row["locale"],
+            }
+            result.append((os.path.join(basedir, row["path"]), row["sentence"], meta))
+    return result
+
+
+def main(args=None):
+    """
+    Runs the benchmark.
+
+    :param args: the command-line arguments to use, uses sys.argv if None
+    :type args: list
+    """
+    parser = argparse.ArgumentParser(description="Measures the memory of unloaded SpeechData records built from a synthetic TSV.")
+    parser.add_argument("--records", type=int, default=5000000, help="The number of records.")
+    parser.add_argument("--tsv", type=str, default=None, help="The TSV file to use/generate, uses a temporary file if not specified.")
+    ns = parser.parse_args(args=args)
+
+    tmp_dir = None
+    path = ns.tsv
+    if path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "train.tsv")
+    if not os.path.exists(path):
+        generate_tsv(path, ns.records)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = read_rows(path)
+    records = len(rows)
+    rows_size = tracemalloc.get_traced_memory()[0] - before
+
+    # pre-allocated, so that the list does not get counted towards the containers
+    items = [None] * records
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i, (source, sentence, meta) in enumerate(rows):
+        items[i] = SpeechData(source=source, annotation=sentence, metadata=meta)
+    elapsed = time.perf_counter() - start
+    items_size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print("python:     %s" % sys.version.split()[0])
+    print("records:    %d" % records)
+    print("row data:   %.1f bytes/record" % (rows_size / records))
+    print("containers: %.1f bytes/record (%.1f MB total, %.2fs)" % (items_size / records, items_size / 1024 / 1024, elapsed))
+    print("total:      %.1f bytes/record" % ((rows_size + items_size) / records))
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
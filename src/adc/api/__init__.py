@@ -3,4 +3,17 @@ from ._data import determine_audio_format_from_ext, determine_audio_format_from_
 from ._data_types import DATATYPES, DATATYPE_CLASSIFICATION, DATATYPE_SPEECH, data_type_to_class
 from ._classification import AudioClassificationData
 from ._speech import SpeechData
-from ._utils import locate_audio, load_audio_from_bytes, load_audio_from_file
+from ._utils import locate_audio, load_audio_from_bytes, load_audio_from_file, AudioInfo, probe_audio_from_file, probe_audio_from_bytes
+from ._utils import PCMMemMap, memmap_wav, set_memmap_wav, is_memmap_wav
+from ._utils import iter_array_blocks, open_audio_blocks, save_audio_blocks, DEFAULT_BLOCK_SIZE
+from ._utils import DTYPES, DTYPE_FLOAT32, DTYPE_INT16, DTYPE_FLOAT64, set_dtype, get_dtype, to_dtype, to_float
+from ._utils import audio_to_librosa, audio_from_librosa
+from ._utils import decode_backends, decode_stats, DECODE_BACKEND_SOUNDFILE, DECODE_BACKEND_FFMPEG, DECODE_BACKEND_TEMPFILE
+from ._utils import AudioCache, set_audio_cache_size, get_audio_cache
+from ._records import RECORD_MAGIC, RECORD_VERSION, write_record, read_record, iter_records, record_to_bytes, record_from_bytes
+from ._sharding import SHARD_MODES, SHARD_MODE_HASH, SHARD_MODE_ROUNDROBIN, shard_of, Sharder, ShardSupporter
+from ._utils import DEFAULT_AUDIO_EXTENSIONS, DirectoryIndex, get_directory_index
+from ._manifest import DEFAULT_CHECKPOINT_INTERVAL, iter_manifest_lines, ManifestCheckpoint, CheckpointSupporter
+from ._webdataset import WEBDATASET_EXT_TRANSCRIPT, WEBDATASET_EXT_LABEL, WEBDATASET_EXT_METADATA, WEBDATASET_KEY_TRANSCRIPT, WEBDATASET_KEY_LABEL, WEBDATASET_KEY_AUDIO_NAME, split_webdataset_name, webdataset_key, webdataset_annotation_ext
+from ._resampling import BatchResampler, resample_batch, resample_rows, resampled_length
+from ._stft import PhaseVocoder, time_stretch_from_stft, pitch_shift_from_stft
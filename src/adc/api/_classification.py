@@ -1,6 +1,6 @@
 import numpy as np
 
-from typing import Dict, Any
+from typing import Dict, Any, Callable
 
 from ._data import AudioData
 
@@ -10,15 +10,17 @@ class AudioClassificationData(AudioData):
     The annotations are the classification label.
     """
 
+    __slots__ = ()
+
     def __init__(self, source: str = None, audio_name: str = None, data: bytes = None,
                  audio: np.ndarray = None, audio_format: str = None,
                  duration: float = None, sample_rate: float = None,
-                 metadata: Dict = None, annotation: str = None):
+                 metadata: Dict = None, annotation: str = None, blocks: Callable = None, modified: bool = None):
 
         super().__init__(source=source, audio_name=audio_name, data=data,
                          audio=audio, audio_format=audio_format,
                          duration=duration, sample_rate=sample_rate,
-                         metadata=metadata, annotation=annotation)
+                         metadata=metadata, annotation=annotation, blocks=blocks, modified=modified)
 
     def has_annotation(self) -> bool:
         """
@@ -47,3 +49,14 @@ class AudioClassificationData(AudioData):
         :rtype: dict
         """
         return {"label": self.annotation}
+
+    @classmethod
+    def _annotation_from_dict(cls, d: Dict):
+        """
+        Restores the annotations from the dictionary.
+
+        :param d: the dictionary to use (see _annotation_to_dict)
+        :type d: dict
+        :return: the annotations
+        """
+        return d.get("label")
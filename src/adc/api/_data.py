@@ -5,14 +5,14 @@ import logging
 import os.path
 import shutil
 import soundfile as sf
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Callable, Iterator
 
 import numpy as np
 from seppl import MetaDataHandler, LoggingHandler, get_class_name
 from kasperl.api import NameSupporter, SourceSupporter, AnnotationHandler, BytesSupporter
-from tinytag import TinyTag
 
-from ._utils import load_audio_from_bytes, load_audio_from_file
+from ._utils import load_audio_from_bytes, load_audio_from_file, probe_audio_from_bytes, probe_audio_from_file, AudioInfo
+from ._utils import iter_array_blocks, open_audio_blocks, save_audio_blocks, DEFAULT_BLOCK_SIZE
 
 FORMAT_FLAC = "FLAC"
 FORMAT_MP3 = "MP3"
@@ -71,39 +71,69 @@ def determine_audio_format_from_bytes(b: bytes) -> Optional[str]:
 
 class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSupporter, LoggingHandler):
 
+    # the attributes that every container uses; since the mixins don't define __slots__, the
+    # instances still have a __dict__, which only gets populated once any of the lazily used
+    # attributes below get set (keeps the footprint of unloaded records small)
+    __slots__ = ("_source", "_audio_name", "_metadata", "_annotation")
+
+    _data = None
+    """ the binary audio data. """
+    _audio = None
+    """ the audio data structure. """
+    _blocks = None
+    """ the function for streaming the audio: (block_size, overlap, start, stop) -> iterator of blocks (frames x channels). """
+    _audio_format = None
+    """ the format of the audio. """
+    _duration = None
+    """ the duration in seconds. """
+    _sample_rate = None
+    """ the sample rate (samples per second). """
+    _metadata_shares = None
+    """ the number of containers sharing the meta-data (single-element list, shared between them), None if not shared. """
+    _audio_shared = False
+    """ whether the audio array has been handed to a duplicate and needs copying before modifying it in-place. """
+    _info = None
+    """ the header information of the audio data. """
+    _modified = False
+    """ whether the samples differ from the encoded data/source. """
+    _origin = None
+    """ the file with the encoded audio if the source got changed without modifying the samples (eg renaming). """
+
     def __init__(self, source: str = None, audio_name: str = None, data: bytes = None,
                  audio: np.ndarray = None, audio_format: str = None,
                  duration: float = None, sample_rate: float = None,
-                 metadata: Dict = None, annotation=None):
+                 metadata: Dict = None, annotation=None, blocks: Callable = None, modified: bool = None):
 
         # container with audio or data must have source or name
-        if (audio is not None) or (data is not None):
+        if (audio is not None) or (data is not None) or (blocks is not None):
             if (source is None) and (audio_name is None):
                 raise Exception("Either source or name must be provided!")
 
-        self._logger = None
-        """ for logging. """
         self._source = source
         """ the full path to the audio file. """
         self._audio_name = audio_name
         """ the name of the audio file (no path). """
-        self._data = data
-        """ the binary audio data. """
-        self._audio = audio
-        """ the audio data structure. """
-        self._audio_format = audio_format
-        """ the format of the audio. """
-        self._duration = duration
-        """ the duration in seconds. """
-        self._sample_rate = sample_rate
-        """ the sample rate (samples per second). """
         self._metadata = metadata
         """ the dictionary with optional meta-data. """
         self._annotation = None
         """ the associated annotation data. """
         self.annotation = annotation
-        self._tag = None
-        """ the metadata from the audio data. """
+        if data is not None:
+            self._data = data
+        if audio is not None:
+            self._audio = audio
+        if blocks is not None:
+            self._blocks = blocks
+        if audio_format is not None:
+            self._audio_format = audio_format
+        if duration is not None:
+            self._duration = duration
+        if sample_rate is not None:
+            self._sample_rate = sample_rate
+        if modified is None:
+            modified = (audio is not None) or (blocks is not None)
+        if modified:
+            self._modified = modified
 
     def logger(self) -> logging.Logger:
         """
@@ -112,9 +142,7 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :return: the logger
         :rtype: logging.Logger
         """
-        if self._logger is None:
-            self._logger = logging.getLogger(self.__class__.__name__)
-        return self._logger
+        return logging.getLogger(self.__class__.__name__)
 
     @property
     def source(self) -> Optional[str]:
@@ -126,6 +154,29 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         """
         return self._source
 
+    def _encoded_source(self) -> Optional[str]:
+        """
+        Returns the file that holds the encoded audio, i.e., the source or the original
+        file if the source got changed without modifying the samples.
+
+        :return: the file, None if not file-backed
+        :rtype: str
+        """
+        if self._origin is not None:
+            return self._origin
+        return self._source
+
+    @property
+    def is_modified(self) -> bool:
+        """
+        Returns whether the samples have been modified since loading, i.e., whether
+        the audio has to be encoded rather than copying the data/source.
+
+        :return: True if modified
+        :rtype: bool
+        """
+        return self._modified
+
     @property
     def audio(self) -> np.ndarray:
         """
@@ -136,33 +187,132 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         """
         if self._audio is not None:
             return self._audio
+        if self._blocks is not None:
+            blocks = list(self.iter_blocks())
+            if len(blocks) > 0:
+                self._audio = np.concatenate(blocks)
+            return self._audio
         if (self._data is not None) and (self._audio_name is not None):
             audio_format = determine_audio_format_from_ext(self._audio_name)
             self._audio, self._sample_rate = load_audio_from_bytes(self._data, audio_format)
             self._audio_format = audio_format
             return self._audio
-        if self._source is not None:
-            self._audio_name = os.path.basename(self._source)
-            self._audio, self._sample_rate = load_audio_from_file(self._source)
-            self._audio_format = determine_audio_format_from_ext(self._source)
+        path = self._encoded_source()
+        if path is not None:
+            if self._source is not None:
+                self._audio_name = os.path.basename(self._source)
+            self._audio, self._sample_rate = load_audio_from_file(path)
+            self._audio_format = determine_audio_format_from_ext(path)
             return self._audio
         return None
 
+    @property
+    def is_streamable(self) -> bool:
+        """
+        Returns whether the audio can be streamed in blocks without decoding it fully first,
+        i.e., the audio has not been decoded yet and is backed by a file, bytes or another stream.
+
+        :return: True if streamable
+        :rtype: bool
+        """
+        return (self._audio is None) and ((self._blocks is not None) or (self._data is not None) or (self._encoded_source() is not None))
+
+    def iter_blocks(self, block_size: int = DEFAULT_BLOCK_SIZE, overlap: int = 0, always_2d: bool = False,
+                    start: int = 0, stop: int = None) -> Iterator[np.ndarray]:
+        """
+        Iterates over the audio in blocks of frames. Only reads one block at a time if the audio is
+        file-backed or backed by another stream, otherwise slices the decoded audio.
+
+        :param block_size: the number of frames per block
+        :type block_size: int
+        :param overlap: the number of frames that consecutive blocks overlap
+        :type overlap: int
+        :param always_2d: whether to return mono audio as 2-dimensional array (frames x 1) as well
+        :type always_2d: bool
+        :param start: the first frame to return
+        :type start: int
+        :param stop: the frame to stop at (excluded), uses all frames if None
+        :type stop: int
+        :return: the iterator over the blocks
+        """
+        blocks = None
+        if self._audio is not None:
+            blocks = iter_array_blocks(self._audio, block_size, overlap=overlap, start=start, stop=stop)
+        elif self._blocks is not None:
+            blocks = self._blocks(block_size, overlap, start, stop)
+        elif (self._data is not None) or (self._encoded_source() is not None):
+            try:
+                f = io.BytesIO(self._data) if (self._data is not None) else self._encoded_source()
+                blocks = open_audio_blocks(f, block_size, overlap=overlap, start=start, stop=stop)
+            except:
+                self.logger().info("Failed to stream audio, decoding instead: %s" % self.audio_name)
+                if self.audio is not None:
+                    blocks = iter_array_blocks(self.audio, block_size, overlap=overlap, start=start, stop=stop)
+        if blocks is None:
+            return
+        for block in blocks:
+            if (not always_2d) and (block.ndim == 2) and (block.shape[1] == 1):
+                block = block[:, 0]
+            yield block
+
+    def mutable_audio(self) -> Optional[np.ndarray]:
+        """
+        Returns the audio for in-place modification. If the audio is shared with
+        another container (read-only view or handed to a duplicate), a private copy
+        is made first. The container gets flagged as modified.
+
+        :return: the writable audio data structure, None if not available or failed to load
+        :rtype: np.ndarray
+        """
+        audio = self.audio
+        if audio is None:
+            return None
+        if not isinstance(audio, np.ndarray):
+            self._audio = np.array(audio)
+        elif self._audio_shared or (not audio.flags.writeable):
+            self._audio = audio.copy()
+        self._audio_shared = False
+        self._modified = True
+        return self._audio
+
+    def _share_audio(self) -> Optional[np.ndarray]:
+        """
+        Returns a read-only view on the audio that can be handed to a duplicate.
+        The array of this container stays writable, but mutable_audio will copy it
+        before it gets modified in-place.
+
+        :return: the shared view, None if no audio available
+        :rtype: np.ndarray
+        """
+        audio = self.audio
+        if not isinstance(audio, np.ndarray):
+            return audio
+        self._audio_shared = True
+        result = audio.view()
+        result.flags.writeable = False
+        return result
+
     @property
     def audio_bytes(self):
         """
-        Turns the audio into bytes. Either uses existing _data, or loads from _source or converts the
-        current audio using the current audio format (writing to memory buffer).
+        Turns the audio into bytes. Unless the samples have been modified, either uses existing _data
+        or loads from _source. Otherwise converts the current audio using the current audio format
+        (writing to memory buffer).
 
         :return: the generated bytes
         """
-        if self._data is not None:
+        if not self._modified:
+            if self._data is not None:
+                return self._data
+            if self._encoded_source() is not None:
+                with open(self._encoded_source(), "rb") as fp:
+                    return fp.read()
+        elif (self._audio is None) and (self._blocks is None) and (self._data is not None):
             return self._data
-        if self._source is not None:
-            with open(self._source, "rb") as fp:
-                return fp.read()
         buffer = io.BytesIO()
-        if self.audio is not None:
+        if (self._audio is None) and (self._blocks is not None):
+            save_audio_blocks(buffer, self.iter_blocks(), self.sample_rate, audio_format=self.audio_format)
+        elif self.audio is not None:
             sf.write(buffer, self.audio, self.sample_rate, format=self.audio_format)
         return buffer.getvalue()
 
@@ -204,28 +354,35 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
                 self._audio_format = determine_audio_format_from_ext(self._audio_name)
         return self._audio_format
 
-    def _read_tags(self):
+    def _read_info(self):
         """
-        Reads relevant tag information from the bytes or audio file.
+        Reads the header information from the bytes or audio file (once per container).
         """
-        if self._tag is not None:
+        if self._info is not None:
             return
 
         if self._data is not None:
-            try:
-                self._tag = TinyTag.get(io.BytesIO(self._data))
-                self._duration = self._tag.duration
-                self._sample_rate = self._tag.samplerate
-            except:
-                pass
+            self._info = probe_audio_from_bytes(self._data)
+        elif self._encoded_source() is not None:
+            self._info = probe_audio_from_file(self._encoded_source())
 
-        elif self._source is not None:
-            try:
-                self._tag = TinyTag.get(self._source)
-                self._duration = self._tag.duration
-                self._sample_rate = self._tag.samplerate
-            except:
-                pass
+        if self._info is not None:
+            if self._duration is None:
+                self._duration = self._info.duration
+            if self._sample_rate is None:
+                self._sample_rate = self._info.sample_rate
+
+    @property
+    def audio_info(self) -> Optional[AudioInfo]:
+        """
+        Returns the header information (channels, frames, sample rate, subtype, format)
+        of the underlying bytes or audio file, without decoding the audio.
+
+        :return: the header information, None if not available
+        :rtype: AudioInfo
+        """
+        self._read_info()
+        return self._info
 
     @property
     def duration(self) -> Optional[float]:
@@ -236,7 +393,9 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :rtype: float
         """
         if self._duration is None:
-            self._read_tags()
+            self._read_info()
+        if (self._duration is None) and (self._audio is not None) and self._sample_rate:
+            self._duration = self._audio.shape[0] / self._sample_rate
         return self._duration
 
     @property
@@ -248,9 +407,50 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :rtype: int
         """
         if self._sample_rate is None:
-            self._read_tags()
+            self._read_info()
         return self._sample_rate
 
+    @property
+    def frames(self) -> Optional[int]:
+        """
+        Returns the number of frames (samples per channel). Uses the decoded audio if present,
+        otherwise the header information or the duration.
+
+        :return: the number of frames, None if failed to determine
+        :rtype: int
+        """
+        if self._audio is not None:
+            return self._audio.shape[0]
+        if self._blocks is None:
+            self._read_info()
+            if self._info is not None:
+                return self._info.frames
+        if (self.duration is not None) and (self.sample_rate is not None):
+            return int(round(self.duration * self.sample_rate))
+        return None
+
+    @property
+    def channels(self) -> Optional[int]:
+        """
+        Returns the number of channels. Uses the decoded audio if present,
+        otherwise the header information.
+
+        :return: the number of channels, None if failed to determine
+        :rtype: int
+        """
+        if self._audio is not None:
+            if self._audio.ndim == 1:
+                return 1
+            return self._audio.shape[1]
+        if self._blocks is not None:
+            for block in self.iter_blocks(block_size=1, always_2d=True, stop=1):
+                return block.shape[1]
+            return None
+        self._read_info()
+        if self._info is not None:
+            return self._info.channels
+        return None
+
     @property
     def is_mono(self) -> bool:
         """
@@ -259,10 +459,7 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :return: True if mono
         :rtype: bool
         """
-        if self.source is not None:
-            return TinyTag.get(self.source).channels == 1
-        else:
-            return len(self.audio[0].shape) == 1
+        return self.channels == 1
 
     @property
     def data(self) -> bytes:
@@ -285,21 +482,30 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         self._audio_format = None
         self._duration = None
         self._sample_rate = None
+        self._info = None
+        self._blocks = None
+        self._modified = False
+        self._origin = None
         self._data = data
 
-    def save_audio(self, path: str, make_dirs: bool = False) -> bool:
+    def save_audio(self, path: str, make_dirs: bool = False, hardlink: bool = False) -> bool:
         """
-        Saves the audio under the specified path.
+        Saves the audio under the specified path. Unless the samples have been modified,
+        the source file gets copied (or hard-linked) or the data written as is, i.e.,
+        the audio does not get re-encoded.
 
         :param path: the path to save the audio under
         :type path: str
         :param make_dirs: whether to create any missing parent dirs
         :type make_dirs: bool
+        :param hardlink: whether to hard-link unmodified source files rather than copying them (falls back to copying)
+        :type hardlink: bool
         :return: whether the file was saved
         :rtype: bool
         """
-        if self._source is not None:
-            if os.path.exists(path) and os.path.exists(self._source) and os.path.samefile(path, self._source):
+        source = self._encoded_source()
+        if (source is not None) and not self._modified:
+            if os.path.exists(path) and os.path.exists(source) and os.path.samefile(path, source):
                 self.logger().warning("Input/output audio file are the same, skipping!")
                 return False
         if make_dirs:
@@ -307,12 +513,39 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
             if not os.path.exists(parent_dir):
                 self.logger().info("Creating dir: %s" % parent_dir)
                 os.makedirs(parent_dir)
-        if (self._data is None) and (self._source is not None) and (os.path.exists(self._source)):
-            shutil.copy(self._source, path)
-            return True
+        if not self._modified:
+            if (self._data is None) and (source is not None) and (os.path.exists(source)):
+                if hardlink:
+                    try:
+                        if os.path.exists(path):
+                            os.remove(path)
+                        os.link(source, path)
+                        return True
+                    except OSError:
+                        self.logger().info("Failed to hard-link, copying instead: %s" % source)
+                shutil.copy(source, path)
+                return True
+            if self._data is not None:
+                with open(path, "wb") as fp:
+                    fp.write(self._data)
+                return True
+        # don't write through a hard-link to the original file
+        if os.path.exists(path) and (os.stat(path).st_nlink > 1):
+            os.remove(path)
+        # the audio might be memory-mapped from or the stream reading from the output file, hence write to temp file first
+        path_tmp = path + ".part"
+        audio_format = determine_audio_format_from_ext(path)
+        if audio_format is None:
+            audio_format = self.audio_format
         if self._audio is not None:
-            sf.write(path, self._audio, self.sample_rate)
+            sf.write(path_tmp, self._audio, self.sample_rate, format=audio_format)
+            os.replace(path_tmp, path)
             return True
+        if self._blocks is not None:
+            if save_audio_blocks(path_tmp, self.iter_blocks(), self.sample_rate, audio_format=audio_format):
+                os.replace(path_tmp, path)
+                return True
+            return False
         if self._data is not None:
             with open(path, "wb") as fp:
                 fp.write(self._data)
@@ -399,8 +632,21 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :return: the meta-data, None if not available
         :rtype: dict
         """
+        if self._metadata_shares is not None:
+            # only copy if other containers still refer to the same meta-data
+            if self._metadata_shares[0] > 1:
+                self._metadata = copy.deepcopy(self._metadata)
+            self._unshare_metadata()
         return self._metadata
 
+    def _unshare_metadata(self):
+        """
+        Stops sharing the meta-data with other containers.
+        """
+        if self._metadata_shares is not None:
+            self._metadata_shares[0] -= 1
+            self._metadata_shares = None
+
     def set_metadata(self, metadata: Optional[Dict]):
         """
         Sets the meta-data to use.
@@ -408,6 +654,7 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :param metadata: the new meta-data, can be None
         :type metadata: dict
         """
+        self._unshare_metadata()
         self._metadata = metadata
 
     def get_name(self) -> str:
@@ -450,9 +697,13 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
                   name: str = None, data: bytes = None,
                   audio: np.ndarray = None, audio_format: str = None,
                   duration: float = None, sample_rate: float = None,
-                  metadata: Dict = None, annotation=None):
+                  metadata: Dict = None, annotation=None, blocks: Callable = None, modified: bool = None):
         """
         Duplicates the container overwriting existing data with any provided data.
+        Audio and meta-data get shared with the duplicate (copy-on-write): the duplicate
+        gets a read-only view of the audio and the bytes are immutable, the meta-data only
+        gets copied once it is accessed while still shared with another container. Changing the source of unmodified audio (eg renaming)
+        keeps referring to the original file, so that it can be copied rather than re-encoded.
 
         :param source: the source to use
         :type source: str
@@ -473,8 +724,19 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         :param metadata: the metadata
         :type metadata: dict
         :param annotation: the annotations
+        :param blocks: the function for streaming the audio
+        :type blocks: Callable
+        :param modified: whether the samples differ from the data/source, inferred if None
+        :type modified: bool
         :return: the duplicated container
         """
+        if modified is None:
+            if (audio is not None) or (blocks is not None):
+                modified = True
+            elif data is not None:
+                modified = False
+            else:
+                modified = self._modified
         if (force_no_source is not None) and force_no_source:
             source = None
         else:
@@ -483,25 +745,39 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         if name is None:
             name = self._audio_name
         if (data is None) and (self._data is not None):
-            data = copy.deepcopy(self._data)
-        # if the source changes, we need to force loading the audio
-        if ((audio is None) and (self._audio is not None)) or (source != self._source):
-            audio = copy.deepcopy(self.audio)
+            data = self._data
+        # unmodified audio can still be read from the original file if the source changes
+        origin = None
+        if (source != self._source) and (data is None) and not modified:
+            origin = self._encoded_source()
+        # otherwise, we need to force loading the audio
+        if (audio is None) and ((self._audio is not None) or ((source != self._source) and (origin is None) and (data is None))):
+            audio = self._share_audio()
+        if (blocks is None) and (audio is None):
+            blocks = self._blocks
         if audio_format is None:
             audio_format = self._audio_format
         if (duration is None) and (self._duration is not None):
             duration = self._duration
         if (sample_rate is None) and (self._sample_rate is not None):
             sample_rate = self._sample_rate
-        if (metadata is None) and (self._metadata is not None):
-            metadata = copy.deepcopy(self._metadata)
+        share_metadata = (metadata is None) and (self._metadata is not None)
+        if share_metadata:
+            metadata = self._metadata
         if (annotation is None) and (self.annotation is not None):
             annotation = copy.deepcopy(self.annotation)
 
-        return type(self)(source=source, audio_name=name, data=data,
-                          audio=audio, audio_format=audio_format,
-                          duration=duration, sample_rate=sample_rate,
-                          metadata=metadata, annotation=annotation)
+        result = type(self)(source=source, audio_name=name, data=data,
+                            audio=audio, audio_format=audio_format,
+                            duration=duration, sample_rate=sample_rate,
+                            metadata=metadata, annotation=annotation, blocks=blocks, modified=modified)
+        result._origin = origin
+        if share_metadata:
+            if self._metadata_shares is None:
+                self._metadata_shares = [1]
+            self._metadata_shares[0] += 1
+            result._metadata_shares = self._metadata_shares
+        return result
 
     def _annotation_to_dict(self):
         """
@@ -512,6 +788,17 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
         """
         raise NotImplementedError()
 
+    @classmethod
+    def _annotation_from_dict(cls, d: Dict):
+        """
+        Restores the annotations from the dictionary.
+
+        :param d: the dictionary to use (see _annotation_to_dict)
+        :type d: dict
+        :return: the annotations
+        """
+        raise NotImplementedError()
+
     def to_dict(self, source: bool = True, audio: bool = True, annotation: bool = True, metadata: bool = True):
         """
         Returns itself as a dictionary that can be saved as JSON.
@@ -546,6 +833,27 @@ class AudioData(MetaDataHandler, AnnotationHandler, SourceSupporter, BytesSuppor
             result["metadata"] = copy.deepcopy(self.get_metadata())
         return result
 
+    @classmethod
+    def from_dict(cls, d: Dict, data: bytes = None):
+        """
+        Creates a container from the dictionary (see to_dict).
+
+        :param d: the dictionary to use
+        :type d: dict
+        :param data: the audio bytes to use instead of the base64-encoded "audio" entry, eg from a binary record
+        :type data: bytes
+        :return: the container
+        """
+        if (data is None) and ("audio" in d):
+            data = base64.decodebytes(d["audio"].encode("ascii"))
+        annotation = None
+        if "annotation" in d:
+            annotation = cls._annotation_from_dict(d["annotation"])
+        return cls(source=d.get("source"), audio_name=d.get("name"), data=data,
+                   audio_format=d.get("format"), duration=d.get("duration"),
+                   sample_rate=d.get("sample_rate"), metadata=d.get("metadata"),
+                   annotation=annotation)
+
     def __str__(self) -> str:
         """
         Returns a basic description of the container.
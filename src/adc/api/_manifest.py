@@ -0,0 +1,304 @@
+import argparse
+import csv
+import json
+import os
+from typing import Iterator, Optional, Tuple, List, Dict
+
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+""" the default number of rows after which to save the checkpoint. """
+
+
+def iter_manifest_lines(path: str, offset: int = 0, encoding: str = "utf-8") -> Iterator[Tuple[int, int, str]]:
+    """
+    Streams the lines of the text file (binary mode, so that the byte offsets are exact),
+    starting at the specified byte offset. Only one line is held in memory at a time.
+
+    :param path: the file to read
+    :type path: str
+    :param offset: the byte offset to start reading from
+    :type offset: int
+    :param encoding: the encoding of the text
+    :type encoding: str
+    :return: iterator of tuples of start/end byte offset of the line and decoded line (incl line terminator)
+    """
+    with open(path, "rb") as fp:
+        if offset > 0:
+            fp.seek(offset)
+        while True:
+            line = fp.readline()
+            if not line:
+                break
+            yield offset, offset + len(line), line.decode(encoding)
+            offset += len(line)
+
+
+class ManifestCheckpoint(object):
+    """
+    Keeps track of the byte offset and row number up to which manifest files have been processed,
+    stored as JSON in a state file so that reading can resume mid-file after a restart.
+    """
+
+    def __init__(self, path: str, interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Initializes the checkpoint.
+
+        :param path: the state file to store the checkpoint in
+        :type path: str
+        :param interval: the number of rows after which to save the state
+        :type interval: int
+        """
+        if interval < 1:
+            raise Exception("Checkpoint interval must be at least 1, provided: %d" % interval)
+        self.path = path
+        self.interval = interval
+        self._state = dict()
+        self._stats = dict()
+        self._pending = 0
+        if os.path.exists(path):
+            with open(path, "r") as fp:
+                self._state = json.load(fp)
+
+    def _key(self, manifest: str) -> str:
+        """
+        Returns the key for the manifest in the state.
+
+        :param manifest: the manifest file
+        :type manifest: str
+        :return: the key
+        :rtype: str
+        """
+        return os.path.abspath(manifest)
+
+    def _stat(self, manifest: str, refresh: bool = False) -> Tuple[int, int]:
+        """
+        Returns size and modification time of the manifest. Only determined once per manifest
+        (unless refreshed), to avoid a stat call per row on network file systems.
+
+        :param manifest: the manifest file
+        :type manifest: str
+        :param refresh: whether to determine the values again
+        :type refresh: bool
+        :return: the tuple of size and modification time (ns)
+        :rtype: tuple
+        """
+        if refresh or (manifest not in self._stats):
+            stat = os.stat(manifest)
+            self._stats[manifest] = (stat.st_size, stat.st_mtime_ns)
+        return self._stats[manifest]
+
+    def get(self, manifest: str) -> Optional[dict]:
+        """
+        Returns the stored state for the manifest, if still valid (ie file not modified since).
+
+        :param manifest: the manifest file
+        :type manifest: str
+        :return: the state (offset, row, finished), None if not available or outdated
+        :rtype: dict
+        """
+        # called when opening the manifest, ie the time to determine size/modification time
+        size, mtime = self._stat(manifest, refresh=True)
+        state = self._state.get(self._key(manifest))
+        if state is None:
+            return None
+        if (size != state["size"]) or (mtime != state["mtime"]):
+            return None
+        return state
+
+    def update(self, manifest: str, offset: int, row: int, finished: bool = False, force: bool = False):
+        """
+        Records that the rows before the specified offset/row have been processed.
+        Saves the state once the interval has been reached, when finished or when forced.
+
+        :param manifest: the manifest file
+        :type manifest: str
+        :param offset: the byte offset of the next row to process
+        :type offset: int
+        :param row: the 0-based number of the next row to process
+        :type row: int
+        :param finished: whether the manifest has been processed completely
+        :type finished: bool
+        :param force: whether to save the state regardless of the interval
+        :type force: bool
+        """
+        size, mtime = self._stat(manifest)
+        self._state[self._key(manifest)] = {
+            "offset": offset,
+            "row": row,
+            "finished": finished,
+            "size": size,
+            "mtime": mtime,
+        }
+        self._pending += 1
+        if force or finished or (self._pending >= self.interval):
+            self.save()
+
+    def save(self):
+        """
+        Saves the state (atomically, via a temp file).
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(self._state, fp, indent=2)
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+
+
+class CheckpointSupporter(object):
+    """
+    Mixin for manifest readers that stream the rows and can resume mid-file via --checkpoint/--checkpoint_interval.
+    """
+
+    checkpoint = None
+    """ the state file to store the processed byte offset/row in. """
+
+    checkpoint_interval = None
+    """ the number of rows after which to save the checkpoint. """
+
+    _checkpoint = None
+
+    _manifest_row = None
+    """ the 0-based row of the line last returned by _iter_manifest (None for the header). """
+
+    def _add_checkpoint_arguments(self, parser: argparse.ArgumentParser):
+        """
+        Adds the checkpoint options to the parser.
+
+        :param parser: the parser to extend
+        :type parser: argparse.ArgumentParser
+        """
+        parser.add_argument("--checkpoint", type=str, help="The JSON state file for recording the byte offset/row number processed so far in the manifest(s); when present, reading resumes from there.", required=False, default=None)
+        parser.add_argument("--checkpoint_interval", type=int, help="The number of rows after which to update the checkpoint.", required=False, default=DEFAULT_CHECKPOINT_INTERVAL)
+
+    def _apply_checkpoint_arguments(self, ns: argparse.Namespace):
+        """
+        Initializes the checkpoint from the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        self.checkpoint = ns.checkpoint
+        self.checkpoint_interval = ns.checkpoint_interval
+
+    def _initialize_checkpoint(self):
+        """
+        Loads the checkpoint, if enabled.
+        """
+        self._checkpoint = None
+        if self.checkpoint is None:
+            return
+        self._checkpoint = ManifestCheckpoint(self.checkpoint, DEFAULT_CHECKPOINT_INTERVAL if (self.checkpoint_interval is None) else self.checkpoint_interval)
+
+    def _finalize_checkpoint(self):
+        """
+        Saves any outstanding changes to the checkpoint.
+        """
+        if self._checkpoint is not None:
+            self._checkpoint.save()
+            self._checkpoint = None
+
+    def _resume_point(self, path: str, offset: int) -> Optional[Tuple[int, int]]:
+        """
+        Determines where to start reading the manifest, using the checkpoint if available.
+
+        :param path: the manifest to read
+        :type path: str
+        :param offset: the byte offset of the first row (ie after any header)
+        :type offset: int
+        :return: the tuple of byte offset and row to start from, None if already finished
+        :rtype: tuple
+        """
+        row = 0
+        if self._checkpoint is not None:
+            state = self._checkpoint.get(path)
+            if state is not None:
+                if state["finished"]:
+                    self.logger().info("Already processed according to checkpoint: %s" % path)
+                    return None
+                if state["offset"] > offset:
+                    offset = state["offset"]
+                    row = state["row"]
+                    self.logger().info("Resuming from row %d (offset %d): %s" % (row, offset, path))
+        return offset, row
+
+    def _iter_manifest(self, path: str, has_header: bool = False) -> Iterator[str]:
+        """
+        Streams the lines of the manifest, resuming from the checkpoint if available.
+        The checkpoint gets advanced whenever the next line is requested, ie once the
+        record(s) generated from the previous line have been processed.
+        If the manifest has a header, this is always returned as the first line.
+        The row of the current line is available via _manifest_row, eg for round-robin sharding.
+
+        :param path: the manifest to read
+        :type path: str
+        :param has_header: whether the first line is a header
+        :type has_header: bool
+        :return: the iterator over the lines (incl line terminator)
+        """
+        offset = 0
+        if has_header:
+            for _, offset, line in iter_manifest_lines(path):
+                self._manifest_row = None
+                yield line
+                break
+
+        resume = self._resume_point(path, offset)
+        if resume is None:
+            return
+        offset, row = resume
+
+        for start, offset, line in iter_manifest_lines(path, offset=offset):
+            if self._checkpoint is not None:
+                self._checkpoint.update(path, start, row)
+            self._manifest_row = row
+            row += 1
+            yield line
+
+        if self._checkpoint is not None:
+            self._checkpoint.update(path, offset, row, finished=True)
+
+    def _iter_manifest_csv(self, path: str, fieldnames: List[str], has_header: bool = False, **kwargs) -> Iterator[Dict[str, str]]:
+        """
+        Streams the records of the CSV manifest, resuming from the checkpoint if available.
+        Unlike _iter_manifest, rows are records rather than lines, as quoted values can span
+        multiple lines: the checkpoint gets advanced to the offset after the previous record
+        once the next record is requested. Any header gets skipped.
+        The row of the current record is available via _manifest_row.
+
+        :param path: the manifest to read
+        :type path: str
+        :param fieldnames: the names of the columns
+        :type fieldnames: list
+        :param has_header: whether the first line is a header
+        :type has_header: bool
+        :param kwargs: the additional parameters for csv.DictReader (eg the dialect)
+        :return: the iterator over the records
+        """
+        offset = 0
+        if has_header:
+            for _, offset, _ in iter_manifest_lines(path):
+                break
+
+        resume = self._resume_point(path, offset)
+        if resume is None:
+            return
+        offset, row = resume
+
+        # the end offset of the last line consumed by the CSV reader
+        end = [offset]
+
+        def _lines():
+            for _, line_end, line in iter_manifest_lines(path, offset=offset):
+                end[0] = line_end
+                yield line
+
+        start = offset
+        for record in csv.DictReader(_lines(), fieldnames, **kwargs):
+            if self._checkpoint is not None:
+                self._checkpoint.update(path, start, row)
+            self._manifest_row = row
+            row += 1
+            start = end[0]
+            yield record
+
+        if self._checkpoint is not None:
+            self._checkpoint.update(path, end[0], row, finished=True)
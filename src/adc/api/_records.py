@@ -0,0 +1,154 @@
+import io
+import json
+import struct
+from typing import Optional, Iterator
+
+from ._data import AudioData
+from ._data_types import DATATYPE_CLASSIFICATION, DATATYPE_SPEECH, data_type_to_class
+from ._classification import AudioClassificationData
+from ._speech import SpeechData
+
+RECORD_MAGIC = b"ADCR"
+""" the magic bytes that each record starts with. """
+
+RECORD_VERSION = 1
+""" the version of the record layout. """
+
+_RECORD_PREFIX = struct.Struct("<4sBIQ")
+""" magic, version, length of the JSON header, length of the audio bytes. """
+
+
+def _data_type_of(item: AudioData) -> Optional[str]:
+    """
+    Determines the data type of the container.
+
+    :param item: the container to check
+    :type item: AudioData
+    :return: the data type, None if not known
+    :rtype: str
+    """
+    if isinstance(item, SpeechData):
+        return DATATYPE_SPEECH
+    if isinstance(item, AudioClassificationData):
+        return DATATYPE_CLASSIFICATION
+    return None
+
+
+def write_record(fp, item: AudioData) -> int:
+    """
+    Writes the container as binary record to the file-like object: a fixed-size prefix
+    (magic, version, header length, audio length) followed by the meta-data as JSON and
+    the audio bytes as is (ie no base64 encoding).
+
+    :param fp: the binary file-like object to write to
+    :param item: the container to write
+    :type item: AudioData
+    :return: the number of bytes written
+    :rtype: int
+    """
+    header = item.to_dict(audio=False)
+    data_type = _data_type_of(item)
+    if data_type is not None:
+        header["data_type"] = data_type
+    header_bytes = json.dumps(header).encode("utf-8")
+    data = item.audio_bytes
+    if data is None:
+        data = b""
+    fp.write(_RECORD_PREFIX.pack(RECORD_MAGIC, RECORD_VERSION, len(header_bytes), len(data)))
+    fp.write(header_bytes)
+    fp.write(data)
+    return _RECORD_PREFIX.size + len(header_bytes) + len(data)
+
+
+def _read_exactly(fp, size: int) -> bytes:
+    """
+    Reads the specified number of bytes, also from pipes that return fewer bytes per read.
+
+    :param fp: the binary file-like object to read from
+    :param size: the number of bytes to read
+    :type size: int
+    :return: the bytes, fewer only at the end of the stream
+    :rtype: bytes
+    """
+    result = fp.read(size)
+    if (result is None) or (len(result) == size):
+        return result
+    chunks = [result]
+    remaining = size - len(result)
+    while remaining > 0:
+        chunk = fp.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_record(fp) -> Optional[AudioData]:
+    """
+    Reads the next binary record from the file-like object (see write_record).
+
+    :param fp: the binary file-like object to read from
+    :return: the container, None if at the end of the stream
+    :rtype: AudioData
+    """
+    prefix = _read_exactly(fp, _RECORD_PREFIX.size)
+    if (prefix is None) or (len(prefix) == 0):
+        return None
+    if len(prefix) < _RECORD_PREFIX.size:
+        raise Exception("Truncated record prefix: %d bytes" % len(prefix))
+    magic, version, header_len, data_len = _RECORD_PREFIX.unpack(prefix)
+    if magic != RECORD_MAGIC:
+        raise Exception("Not an audio record, invalid magic bytes: %s" % str(magic))
+    if version > RECORD_VERSION:
+        raise Exception("Unsupported record version: %d" % version)
+    header_bytes = _read_exactly(fp, header_len)
+    data = _read_exactly(fp, data_len)
+    if (len(header_bytes) < header_len) or (len(data) < data_len):
+        raise Exception("Truncated record: expected %d+%d bytes, read %d+%d" % (header_len, data_len, len(header_bytes), len(data)))
+    header = json.loads(header_bytes.decode("utf-8"))
+    cls = data_type_to_class(header["data_type"]) if ("data_type" in header) else AudioData
+    return cls.from_dict(header, data=data if (data_len > 0) else None)
+
+
+def iter_records(fp) -> Iterator[AudioData]:
+    """
+    Iterates over the binary records in the file-like object.
+
+    :param fp: the binary file-like object to read from
+    :return: the iterator over the containers
+    """
+    while True:
+        item = read_record(fp)
+        if item is None:
+            break
+        yield item
+
+
+def record_to_bytes(item: AudioData) -> bytes:
+    """
+    Turns the container into a binary record (see write_record).
+
+    :param item: the container to convert
+    :type item: AudioData
+    :return: the record
+    :rtype: bytes
+    """
+    buffer = io.BytesIO()
+    write_record(buffer, item)
+    return buffer.getvalue()
+
+
+def record_from_bytes(data: bytes) -> AudioData:
+    """
+    Restores the container from a binary record (see write_record).
+
+    :param data: the record
+    :type data: bytes
+    :return: the container
+    :rtype: AudioData
+    """
+    result = read_record(io.BytesIO(data))
+    if result is None:
+        raise Exception("No record in data!")
+    return result
@@ -0,0 +1,324 @@
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Optional
+
+import librosa
+import numpy as np
+import scipy.signal
+
+RESAMPLE_TYPE_POLYPHASE = "polyphase"
+RESAMPLE_TYPE_FFT = "fft"
+RESAMPLE_TYPE_KAISER_PREFIX = "kaiser"
+
+MAX_KAISER_MATRIX_SIZE = 4 * 1024 * 1024
+""" the maximum number of coefficients of the phase matrix for kaiser resampling, falls back on librosa/resampy otherwise. """
+
+
+@functools.lru_cache(maxsize=64)
+def _polyphase_kernel(up: int, down: int, dtype: str) -> np.ndarray:
+    """
+    Designs the low-pass FIR filter for polyphase resampling, the same way as scipy.signal.resample_poly
+    does with its default window. Cached, as the design dominates the costs for short clips.
+
+    :param up: the (reduced) up-sampling factor
+    :type up: int
+    :param down: the (reduced) down-sampling factor
+    :type down: int
+    :param dtype: the data type of the samples
+    :type dtype: str
+    :return: the filter coefficients (read-only)
+    :rtype: np.ndarray
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    result = scipy.signal.firwin(2 * half_len + 1, 1. / max_rate, window=("kaiser", 5.0)).astype(dtype)
+    result.flags.writeable = False
+    return result
+
+
+@functools.lru_cache(maxsize=16)
+def _kaiser_matrix(up: int, down: int, res_type: str, dtype: str) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Computes the interpolation weights that resampy applies for the (reduced) rate ratio up/down.
+    As the fractional positions of the output samples repeat every 'up' outputs (consuming 'down'
+    inputs), the weights form a matrix of 'up' phases x input window, which turns the per-sample
+    loop into a matrix multiplication. Cached, like the polyphase kernels.
+
+    :param up: the (reduced) up-sampling factor
+    :type up: int
+    :param down: the (reduced) down-sampling factor
+    :type down: int
+    :param res_type: the resampy filter (kaiser_best/kaiser_fast)
+    :type res_type: str
+    :param dtype: the data type of the samples
+    :type dtype: str
+    :return: the tuple of matrix (phases x window, read-only) and number of zeros to pad on the left, None if too large
+    :rtype: tuple
+    """
+    import resampy.filters
+    interp_win, num_table, _ = resampy.filters.get_filter(res_type)
+    sample_ratio = float(up) / down
+    if sample_ratio < 1:
+        interp_win = sample_ratio * interp_win
+    interp_delta = np.diff(interp_win, append=interp_win[-1])
+    scale = min(1.0, sample_ratio)
+    index_step = int(scale * num_table)
+    nwin = len(interp_win)
+    num_taps = nwin // index_step + 1
+    width = down + 2 * num_taps
+    if up * width > MAX_KAISER_MATRIX_SIZE:
+        return None
+
+    # same computations as resampy's per-sample loop, for each phase
+    left = []
+    right = []
+    for phase in range(up):
+        frac = scale * ((phase * down) % up) / up
+        weights = []
+        for f in [frac, scale - frac]:
+            index_frac = f * num_table
+            offset = int(index_frac)
+            eta = index_frac - offset
+            indices = offset + np.arange((nwin - offset) // index_step) * index_step
+            weights.append(interp_win[indices] + eta * interp_delta[indices])
+        left.append(weights[0])
+        right.append(weights[1])
+
+    # column j of the window corresponds to input sample j - pad (relative to the first input of the period)
+    pad = max([len(x) for x in left]) - 1
+    width = down + pad + max([len(x) for x in right])
+    result = np.zeros((up, width), dtype=np.float64)
+    for phase in range(up):
+        n = (phase * down) // up + pad
+        result[phase, n - len(left[phase]) + 1:n + 1] = left[phase][::-1]
+        result[phase, n + 1:n + 1 + len(right[phase])] = right[phase]
+    result = result.astype(dtype)
+    result.flags.writeable = False
+    return result, pad
+
+
+def _resample_kaiser(rows: np.ndarray, orig_sr: int, target_sr: int, res_type: str) -> Optional[np.ndarray]:
+    """
+    Resamples the rows with resampy's kaiser filters using the cached phase matrix: the input gets
+    split into overlapping windows (one per period of 'up' outputs, a strided view) that get multiplied
+    with the matrix. Equivalent to resampy up to floating point rounding.
+
+    :param rows: the signals to resample (rows x frames)
+    :type rows: np.ndarray
+    :param orig_sr: the original sample rate
+    :type orig_sr: int
+    :param target_sr: the target sample rate
+    :type target_sr: int
+    :param res_type: the resampy filter (kaiser_best/kaiser_fast)
+    :type res_type: str
+    :return: the resampled signals (rows x frames, length as computed by resampy), None if not supported
+    :rtype: np.ndarray
+    """
+    if (int(orig_sr) != orig_sr) or (int(target_sr) != target_sr) or (rows.dtype.kind != "f"):
+        return None
+    num_out = int(rows.shape[-1] * float(target_sr) / float(orig_sr))
+    if num_out < 1:
+        return None
+    gcd = math.gcd(int(orig_sr), int(target_sr))
+    up = int(target_sr) // gcd
+    down = int(orig_sr) // gcd
+    kernel = _kaiser_matrix(up, down, res_type, rows.dtype.str)
+    if kernel is None:
+        return None
+    matrix, pad = kernel
+    num_periods = (num_out + up - 1) // up
+    width = matrix.shape[1]
+    padded = np.zeros((rows.shape[0], pad + (num_periods - 1) * down + width), dtype=rows.dtype)
+    padded[:, pad:pad + rows.shape[-1]] = rows
+    windows = np.lib.stride_tricks.sliding_window_view(padded, width, axis=-1)[:, ::down][:, :num_periods]
+    result = np.matmul(windows, matrix.T)
+    return result.reshape((rows.shape[0], -1))[:, :num_out]
+
+
+def resampled_length(num_samples: int, orig_sr: int, target_sr: int) -> int:
+    """
+    Returns the number of samples after resampling (same as librosa.resample).
+
+    :param num_samples: the number of samples of the input
+    :type num_samples: int
+    :param orig_sr: the original sample rate
+    :type orig_sr: int
+    :param target_sr: the target sample rate
+    :type target_sr: int
+    :return: the number of output samples
+    :rtype: int
+    """
+    return int(np.ceil(num_samples * float(target_sr) / orig_sr))
+
+
+def resample_rows(rows: np.ndarray, orig_sr: int, target_sr: int, res_type: str) -> np.ndarray:
+    """
+    Resamples all rows (ie signals) of the 2-D array in a single, vectorized call.
+
+    :param rows: the signals to resample (rows x frames)
+    :type rows: np.ndarray
+    :param orig_sr: the original sample rate
+    :type orig_sr: int
+    :param target_sr: the target sample rate
+    :type target_sr: int
+    :param res_type: the resampling type (see librosa.resample)
+    :type res_type: str
+    :return: the resampled signals (rows x frames)
+    :rtype: np.ndarray
+    """
+    num_samples = resampled_length(rows.shape[-1], orig_sr, target_sr)
+    result = None
+    if res_type == RESAMPLE_TYPE_POLYPHASE:
+        gcd = math.gcd(int(orig_sr), int(target_sr))
+        up = int(target_sr) // gcd
+        down = int(orig_sr) // gcd
+        result = scipy.signal.resample_poly(rows, up, down, axis=-1, window=_polyphase_kernel(up, down, rows.dtype.str))
+    elif res_type.startswith(RESAMPLE_TYPE_KAISER_PREFIX):
+        result = _resample_kaiser(rows, orig_sr, target_sr, res_type)
+    elif res_type.startswith("soxr"):
+        import soxr
+        # soxr handles multiple channels natively (frames x channels)
+        result = soxr.resample(np.ascontiguousarray(rows.T), orig_sr, target_sr, quality=res_type).T
+    if result is None:
+        result = librosa.resample(rows, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type, axis=-1, fix=False)
+    result = librosa.util.fix_length(result, size=num_samples, axis=-1)
+    return np.asarray(result, dtype=rows.dtype)
+
+
+def resample_batch(signals: List[np.ndarray], orig_sr: int, target_sr: int, res_type: str) -> List[np.ndarray]:
+    """
+    Resamples the signals with the same sample rate in one go, padding them with zeros to the
+    same length. Signals can be mono (frames) or multi-channel (channels x frames), ie librosa's layout.
+
+    :param signals: the signals to resample
+    :type signals: list
+    :param orig_sr: the original sample rate of all the signals
+    :type orig_sr: int
+    :param target_sr: the target sample rate
+    :type target_sr: int
+    :param res_type: the resampling type (see librosa.resample)
+    :type res_type: str
+    :return: the resampled signals, in the same layout
+    :rtype: list
+    """
+    max_len = max([x.shape[-1] for x in signals])
+    num_rows = sum([1 if (x.ndim == 1) else x.shape[0] for x in signals])
+    rows = np.zeros((num_rows, max_len), dtype=np.result_type(*signals))
+    row = 0
+    for signal in signals:
+        if signal.ndim == 1:
+            rows[row, :len(signal)] = signal
+            row += 1
+        else:
+            rows[row:row + signal.shape[0], :signal.shape[-1]] = signal
+            row += signal.shape[0]
+
+    resampled = resample_rows(rows, orig_sr, target_sr, res_type)
+
+    result = []
+    row = 0
+    for signal in signals:
+        num_samples = resampled_length(signal.shape[-1], orig_sr, target_sr)
+        if signal.ndim == 1:
+            output = resampled[row, :num_samples]
+            row += 1
+        else:
+            output = resampled[row:row + signal.shape[0], :num_samples]
+            row += signal.shape[0]
+        # resampy/soxr generate fewer samples for a single signal, which librosa pads with zeros
+        ratio = float(target_sr) / orig_sr
+        if res_type.startswith("kaiser"):
+            output[..., int(signal.shape[-1] * ratio):] = 0
+        elif res_type.startswith("soxr"):
+            output[..., int(signal.shape[-1] * ratio + 0.5):] = 0
+        result.append(output)
+    return result
+
+
+class BatchResampler(object):
+    """
+    Resamples signals in batches: groups them by sample rate (and length, for FFT-based resampling
+    which is sensitive to padding), sorts them by length to minimize padding and processes the
+    batches in a thread pool.
+    """
+
+    def __init__(self, target_sr: int, res_type: str, batch_size: int = 32, num_workers: int = 1):
+        """
+        Initializes the resampler.
+
+        :param target_sr: the target sample rate
+        :type target_sr: int
+        :param res_type: the resampling type (see librosa.resample)
+        :type res_type: str
+        :param batch_size: the maximum number of signals per batch
+        :type batch_size: int
+        :param num_workers: the number of threads to use for processing batches
+        :type num_workers: int
+        """
+        if batch_size < 1:
+            raise Exception("Batch size must be at least 1, provided: %d" % batch_size)
+        if num_workers < 1:
+            raise Exception("Number of workers must be at least 1, provided: %d" % num_workers)
+        self.target_sr = target_sr
+        self.res_type = res_type
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self._executor = None
+
+    def _batches(self, signals: List[Tuple[np.ndarray, int]]) -> List[Tuple[int, List[int]]]:
+        """
+        Groups the signals into batches.
+
+        :param signals: the list of signal/sample rate tuples
+        :type signals: list
+        :return: the list of sample rate/indices tuples
+        :rtype: list
+        """
+        groups: Dict[tuple, List[int]] = dict()
+        for i, (signal, sr) in enumerate(signals):
+            key = (sr, signal.shape[-1]) if (self.res_type == RESAMPLE_TYPE_FFT) else (sr,)
+            if key not in groups:
+                groups[key] = []
+            groups[key].append(i)
+        result = []
+        for key, indices in groups.items():
+            indices.sort(key=lambda x: signals[x][0].shape[-1])
+            for n in range(0, len(indices), self.batch_size):
+                result.append((key[0], indices[n:n + self.batch_size]))
+        return result
+
+    def resample(self, signals: List[Tuple[np.ndarray, int]]) -> List[np.ndarray]:
+        """
+        Resamples the signals.
+
+        :param signals: the list of signal (librosa layout)/sample rate tuples
+        :type signals: list
+        :return: the resampled signals, in the same order
+        :rtype: list
+        """
+        result = [None] * len(signals)
+        batches = self._batches(signals)
+
+        def _process(batch):
+            sr, indices = batch
+            return indices, resample_batch([signals[i][0] for i in indices], sr, self.target_sr, self.res_type)
+
+        if (self.num_workers == 1) or (len(batches) == 1):
+            outputs = map(_process, batches)
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="resample")
+            outputs = self._executor.map(_process, batches)
+        for indices, resampled in outputs:
+            for i, signal in zip(indices, resampled):
+                result[i] = signal
+        return result
+
+    def close(self):
+        """
+        Shuts down the thread pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,191 @@
+import argparse
+import fnmatch
+import os
+import zlib
+from typing import List
+
+SHARD_MODE_HASH = "hash"
+SHARD_MODE_ROUNDROBIN = "roundrobin"
+SHARD_MODES = [
+    SHARD_MODE_HASH,
+    SHARD_MODE_ROUNDROBIN,
+]
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """
+    Determines the shard for the key. Uses CRC32 of the file name (ie without the directory)
+    rather than hash(), as the latter is randomized per Python process.
+
+    :param key: the key to get the shard for, eg a file name or path
+    :type key: str
+    :param num_shards: the total number of shards
+    :type num_shards: int
+    :return: the 0-based shard index
+    :rtype: int
+    """
+    return zlib.crc32(os.path.basename(key).encode("utf-8")) % num_shards
+
+
+class Sharder(object):
+    """
+    Decides which keys (files, manifest rows) belong to a shard, so that several
+    processes can work on disjoint and reproducible slices of the same data.
+    """
+
+    def __init__(self, shard_index: int, num_shards: int, shard_mode: str = SHARD_MODE_HASH):
+        """
+        Initializes the sharder.
+
+        :param shard_index: the 0-based index of the shard to keep
+        :type shard_index: int
+        :param num_shards: the total number of shards
+        :type num_shards: int
+        :param shard_mode: how to assign keys to shards (hash of the key or round-robin)
+        :type shard_mode: str
+        """
+        if num_shards < 1:
+            raise Exception("Number of shards must be at least 1, provided: %d" % num_shards)
+        if (shard_index < 0) or (shard_index >= num_shards):
+            raise Exception("Shard index must be in [0, %d), provided: %d" % (num_shards, shard_index))
+        if shard_mode not in SHARD_MODES:
+            raise Exception("Unknown shard mode: %s" % shard_mode)
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.shard_mode = shard_mode
+
+    def accepts(self, key: str, index: int = None) -> bool:
+        """
+        Checks whether the key belongs to the shard. Round-robin mode requires the
+        absolute index of the key (eg the position in the full file list or the
+        manifest row), so that assignments don't shift when resuming.
+
+        :param key: the key to check, eg the file name
+        :type key: str
+        :param index: the 0-based absolute index of the key, required for round-robin
+        :type index: int
+        :return: True if part of the shard
+        :rtype: bool
+        """
+        if self.num_shards == 1:
+            return True
+        if self.shard_mode == SHARD_MODE_ROUNDROBIN:
+            if index is None:
+                raise Exception("Round-robin sharding requires the index of: %s" % key)
+            return (index % self.num_shards) == self.shard_index
+        return shard_of(key, self.num_shards) == self.shard_index
+
+    def filter(self, keys: List[str]) -> List[str]:
+        """
+        Returns the keys that belong to the shard, using their position in the list
+        as index for round-robin.
+
+        :param keys: the keys to filter
+        :type keys: list
+        :return: the keys of the shard
+        :rtype: list
+        """
+        return [x for i, x in enumerate(keys) if self.accepts(x, i)]
+
+    def __str__(self):
+        """
+        Returns a short description of the sharder.
+
+        :return: the description
+        :rtype: str
+        """
+        return "shard %d/%d (%s)" % (self.shard_index + 1, self.num_shards, self.shard_mode)
+
+
+class ShardSupporter(object):
+    """
+    Mixin for readers that can restrict their output to a shard via --shard_index/--num_shards/--shard_mode.
+    """
+
+    shard_index = None
+    """ the 0-based index of the shard to output. """
+
+    num_shards = None
+    """ the total number of shards, no sharding if None or 1. """
+
+    shard_mode = None
+    """ how to assign records to shards. """
+
+    _sharder = None
+
+    def _add_shard_arguments(self, parser: argparse.ArgumentParser):
+        """
+        Adds the sharding options to the parser.
+
+        :param parser: the parser to extend
+        :type parser: argparse.ArgumentParser
+        """
+        parser.add_argument("--shard_index", type=int, help="The 0-based index of the shard to output (requires --num_shards).", required=False, default=None)
+        parser.add_argument("--num_shards", type=int, help="The total number of shards to split the data into, for processing disjoint slices in separate processes.", required=False, default=None)
+        parser.add_argument("--shard_mode", choices=SHARD_MODES, type=str, help="How to assign records to shards: by hash of the file name (without directory) or round-robin on the position in the full file list/manifest.", required=False, default=SHARD_MODE_HASH)
+
+    def _apply_shard_arguments(self, ns: argparse.Namespace):
+        """
+        Initializes the sharding from the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        self.shard_index = ns.shard_index
+        self.num_shards = ns.num_shards
+        self.shard_mode = ns.shard_mode
+
+    def _initialize_sharding(self):
+        """
+        Sets up the sharder, if sharding is enabled.
+        """
+        self._sharder = None
+        if (self.num_shards is None) or (self.num_shards <= 1):
+            return
+        if self.shard_index is None:
+            raise Exception("No shard index specified (--shard_index)!")
+        self._sharder = Sharder(self.shard_index, self.num_shards, SHARD_MODE_HASH if (self.shard_mode is None) else self.shard_mode)
+
+    def _shard_files(self, files: List[str], resume_from: str = None) -> List[str]:
+        """
+        Returns the files that belong to the shard. Expects the full list of located files,
+        as the resume point gets only applied after the sharding (glob, same as locate_files),
+        keeping the round-robin assignments stable when resuming.
+
+        :param files: the located files (without applying resume_from)
+        :type files: list
+        :param resume_from: the file to resume from (glob), ignored if None
+        :type resume_from: str
+        :return: the files of the shard
+        :rtype: list
+        """
+        start = 0
+        if resume_from is not None:
+            start = None
+            for i, f in enumerate(files):
+                if fnmatch.fnmatch(f, resume_from):
+                    start = i
+                    break
+            if start is None:
+                self.logger().warning("Resume from '%s' not found!" % resume_from)
+                start = 0
+        if self._sharder is None:
+            return files[start:]
+        result = [x for i, x in enumerate(files) if (i >= start) and self._sharder.accepts(x, i)]
+        self.logger().info("%s: %d of %d file(s)" % (str(self._sharder), len(result), len(files) - start))
+        return result
+
+    def _in_shard(self, key: str, index: int = None) -> bool:
+        """
+        Checks whether the record with the key (eg the file listed in a manifest) belongs to the shard.
+
+        :param key: the key to check
+        :type key: str
+        :param index: the 0-based absolute index of the record (eg the manifest row), required for round-robin
+        :type index: int
+        :return: True if part of the shard
+        :rtype: bool
+        """
+        if self._sharder is None:
+            return True
+        return self._sharder.accepts(key, index)
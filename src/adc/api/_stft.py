@@ -0,0 +1,108 @@
+import librosa
+import numpy as np
+
+
+class PhaseVocoder(object):
+    """
+    Phase vocoder (same algorithm as librosa.phase_vocoder) for deriving multiple time-stretched
+    variants from the same STFT: magnitudes, phases and phase advances of the STFT frames only
+    get computed once and the stretching is vectorized across all output frames.
+    """
+
+    def __init__(self, stft: np.ndarray, hop_length: int = None, n_fft: int = None):
+        """
+        Initializes the vocoder.
+
+        :param stft: the STFT (... x bins x frames)
+        :type stft: np.ndarray
+        :param hop_length: the hop length of the STFT, uses n_fft // 4 if None
+        :type hop_length: int
+        :param n_fft: the number of FFT components, derived from the number of bins if None
+        :type n_fft: int
+        """
+        if n_fft is None:
+            n_fft = 2 * (stft.shape[-2] - 1)
+        if hop_length is None:
+            hop_length = int(n_fft // 4)
+        self.stft = stft
+        self.num_frames = stft.shape[-1]
+        # expected phase advance in each bin per frame
+        self._phi_advance = hop_length * librosa.fft_frequencies(sr=2 * np.pi, n_fft=n_fft)
+        # pad 0 columns to simplify boundary logic
+        padding = [(0, 0) for _ in stft.shape]
+        padding[-1] = (0, 2)
+        padded = np.pad(stft, padding, mode="constant")
+        self._mag = np.abs(padded)
+        self._phase = np.angle(padded)
+        # wrapped phase advance between consecutive frames
+        dphase = self._phase[..., 1:] - self._phase[..., :-1] - self._phi_advance[:, np.newaxis]
+        self._dphase = dphase - 2.0 * np.pi * np.round(dphase / (2.0 * np.pi))
+
+    def stretch(self, rate: float) -> np.ndarray:
+        """
+        Time-stretches the STFT.
+
+        :param rate: the stretch factor (<1: slow down, 1: same, >1: speed up)
+        :type rate: float
+        :return: the stretched STFT
+        :rtype: np.ndarray
+        """
+        if rate <= 0:
+            raise Exception("Rate must be a positive number: %f" % rate)
+        time_steps = np.arange(0, self.num_frames, rate, dtype=np.float64)
+        index = time_steps.astype(int)
+        # weighting for linear magnitude interpolation
+        alpha = np.mod(time_steps, 1.0)
+        mag = (1.0 - alpha) * self._mag[..., index] + alpha * self._mag[..., index + 1]
+        # accumulated phase: phase of first frame plus the advances of all preceding output frames
+        advance = self._phi_advance[:, np.newaxis] + self._dphase[..., index[:-1]]
+        phase = np.concatenate([self._phase[..., :1], advance], axis=-1)
+        phase = np.cumsum(phase, axis=-1)
+        return librosa.util.phasor(phase, mag=mag).astype(self.stft.dtype, copy=False)
+
+
+def time_stretch_from_stft(vocoder: PhaseVocoder, num_samples: int, rate: float, dtype=np.float32) -> np.ndarray:
+    """
+    Time-stretches the signal that the STFT of the vocoder was computed from (librosa.stft with
+    default parameters), the same way as librosa.effects.time_stretch does.
+
+    :param vocoder: the phase vocoder with the STFT of the signal
+    :type vocoder: PhaseVocoder
+    :param num_samples: the number of samples of the signal
+    :type num_samples: int
+    :param rate: the stretch factor (<1: slow down, 1: same, >1: speed up)
+    :type rate: float
+    :param dtype: the data type for the generated signal
+    :return: the stretched signal
+    :rtype: np.ndarray
+    """
+    return librosa.istft(vocoder.stretch(rate), dtype=dtype, length=int(round(num_samples / rate)))
+
+
+def pitch_shift_from_stft(vocoder: PhaseVocoder, num_samples: int, sample_rate: int, n_steps: float,
+                          bins_per_octave: int = 12, res_type: str = "soxr_hq", dtype=np.float32) -> np.ndarray:
+    """
+    Pitch-shifts the signal that the STFT of the vocoder was computed from (librosa.stft with
+    default parameters), the same way as librosa.effects.pitch_shift does (time-stretch followed
+    by resampling).
+
+    :param vocoder: the phase vocoder with the STFT of the signal
+    :type vocoder: PhaseVocoder
+    :param num_samples: the number of samples of the signal
+    :type num_samples: int
+    :param sample_rate: the sample rate of the signal
+    :type sample_rate: int
+    :param n_steps: the (fractional) steps to shift
+    :type n_steps: float
+    :param bins_per_octave: how many steps per octave
+    :type bins_per_octave: int
+    :param res_type: the resampling type (see librosa.resample)
+    :type res_type: str
+    :param dtype: the data type for the generated signal
+    :return: the shifted signal
+    :rtype: np.ndarray
+    """
+    rate = 2.0 ** (-float(n_steps) / bins_per_octave)
+    result = librosa.resample(time_stretch_from_stft(vocoder, num_samples, rate, dtype=dtype),
+                              orig_sr=float(sample_rate) / rate, target_sr=sample_rate, res_type=res_type)
+    return librosa.util.fix_length(result, size=num_samples)
@@ -1,19 +1,349 @@
+import hashlib
 import io
 import os
+import shutil
+import struct
+import subprocess
 import tempfile
+import threading
 import traceback
-from typing import Optional, Union, Tuple
+from collections import Counter, OrderedDict
+from typing import Optional, Union, Tuple, Iterator, Iterable, List, Dict
 
 import librosa
 import numpy as np
 import soundfile as sf
+from tinytag import TinyTag
 
-from kasperl.api import locate_file
+from kasperl.api import strip_suffix
+from adc.core import ENV_ADC_MEMMAP_WAV, ENV_ADC_DTYPE, ENV_ADC_AUDIO_CACHE_MB
 
+DEFAULT_BLOCK_SIZE = 65536
+""" the default number of frames per block when streaming audio. """
 
-def locate_audio(path: str, rel_path: str = None, suffix: str = None) -> Optional[str]:
+DEFAULT_AUDIO_EXTENSIONS = [".mp3", ".wav"]
+""" the default extensions to look for when locating audio files (case-insensitive, in order of preference). """
+
+DTYPE_FLOAT32 = "float32"
+DTYPE_INT16 = "int16"
+DTYPE_FLOAT64 = "float64"
+DTYPES = [
+    DTYPE_FLOAT32,
+    DTYPE_INT16,
+    DTYPE_FLOAT64,
+]
+
+DECODE_BACKEND_SOUNDFILE = "soundfile"
+DECODE_BACKEND_FFMPEG = "ffmpeg"
+DECODE_BACKEND_TEMPFILE = "tempfile"
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_memmap_wav = os.getenv(ENV_ADC_MEMMAP_WAV, "false").lower() == "true"
+""" whether to use memory-mapping for PCM WAV files. """
+
+
+_dtype = os.getenv(ENV_ADC_DTYPE, DTYPE_FLOAT64)
+""" the data type for audio samples in memory. """
+if _dtype not in DTYPES:
+    raise Exception("Unsupported data type in environment variable %s: %s" % (ENV_ADC_DTYPE, _dtype))
+
+
+def set_dtype(dtype: str):
+    """
+    Sets the data type to use for the audio samples in memory.
+
+    :param dtype: the data type, see DTYPES
+    :type dtype: str
+    """
+    global _dtype
+    if dtype not in DTYPES:
+        raise Exception("Unsupported data type: %s" % dtype)
+    _dtype = dtype
+
+
+def get_dtype() -> str:
+    """
+    Returns the data type to use for the audio samples in memory.
+
+    :return: the data type, see DTYPES
+    :rtype: str
+    """
+    return _dtype
+
+
+def to_dtype(audio, dtype: str = None) -> np.ndarray:
+    """
+    Converts the audio samples to the specified data type. Floating point samples are
+    expected to be in the range -1 to 1, int16 samples get scaled accordingly.
+
+    :param audio: the audio to convert
+    :param dtype: the data type to convert to, uses the global data type if None (see set_dtype)
+    :type dtype: str
+    :return: the converted audio, the same array if already of the correct type
+    :rtype: np.ndarray
+    """
+    if dtype is None:
+        dtype = _dtype
+    audio = np.asarray(audio)
+    if audio.dtype == dtype:
+        return audio
+    if dtype == DTYPE_INT16:
+        return np.clip(np.round(audio * 32768.0), -32768, 32767).astype(np.int16)
+    if audio.dtype == np.int16:
+        result = audio.astype(dtype)
+        result *= 1.0 / 32768.0
+        return result
+    return audio.astype(dtype)
+
+
+def to_float(audio) -> np.ndarray:
+    """
+    Ensures that the audio samples are floating point values, e.g., for processing with librosa.
+    Floating point audio is left as is (no upcasting), int16 gets converted to float32.
+
+    :param audio: the audio to convert
+    :return: the floating point audio
+    :rtype: np.ndarray
+    """
+    audio = np.asarray(audio)
+    if np.issubdtype(audio.dtype, np.floating):
+        return audio
+    return to_dtype(audio, DTYPE_FLOAT32)
+
+
+def audio_to_librosa(audio) -> np.ndarray:
+    """
+    Turns the audio (frames or frames x channels, as loaded by soundfile) into the layout
+    that librosa expects (frames or channels x frames) using floating point samples.
+
+    :param audio: the audio to convert
+    :return: the converted audio (a view, if possible)
+    :rtype: np.ndarray
+    """
+    audio = to_float(audio)
+    if audio.ndim == 2:
+        audio = audio.T
+    return audio
+
+
+def audio_from_librosa(audio: np.ndarray) -> np.ndarray:
+    """
+    Turns the audio generated by librosa (frames or channels x frames) back into the
+    soundfile layout (frames or frames x channels) using the global data type.
+
+    :param audio: the audio to convert
+    :type audio: np.ndarray
+    :return: the converted audio
+    :rtype: np.ndarray
+    """
+    if audio.ndim == 2:
+        audio = audio.T
+    return to_dtype(audio)
+
+
+def set_memmap_wav(enabled: bool):
+    """
+    Sets whether uncompressed PCM WAV files get loaded as memory-mapped arrays.
+
+    :param enabled: whether to use memory-mapping
+    :type enabled: bool
+    """
+    global _memmap_wav
+    _memmap_wav = enabled
+
+
+def is_memmap_wav() -> bool:
+    """
+    Returns whether uncompressed PCM WAV files get loaded as memory-mapped arrays.
+
+    :return: True if memory-mapping is used
+    :rtype: bool
+    """
+    return _memmap_wav
+
+
+class AudioInfo(object):
+    """
+    Container for the header information of an audio file.
+    """
+
+    def __init__(self, channels: int, frames: int, sample_rate: int, subtype: str = None, audio_format: str = None):
+        """
+        Initializes the container.
+
+        :param channels: the number of channels
+        :type channels: int
+        :param frames: the number of frames (samples per channel)
+        :type frames: int
+        :param sample_rate: the sample rate (samples per second)
+        :type sample_rate: int
+        :param subtype: the subtype of the audio data (e.g., PCM_16), can be None
+        :type subtype: str
+        :param audio_format: the container format (e.g., WAV), can be None
+        :type audio_format: str
+        """
+        self.channels = channels
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.subtype = subtype
+        self.audio_format = audio_format
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        Returns the duration in seconds.
+
+        :return: the duration, None if no sample rate available
+        :rtype: float
+        """
+        if not self.sample_rate:
+            return None
+        return self.frames / self.sample_rate
+
+    def __str__(self) -> str:
+        """
+        Returns a short description of the header information.
+
+        :return: the description
+        :rtype: str
+        """
+        return "channels=%s, frames=%s, sample_rate=%s, subtype=%s, format=%s" \
+            % (str(self.channels), str(self.frames), str(self.sample_rate), str(self.subtype), str(self.audio_format))
+
+
+class DirectoryIndex(object):
+    """
+    Lazily built index of the files in directories: each directory gets listed once
+    (os.scandir), subsequent lookups are dictionary accesses. A directory only gets
+    listed again if a lookup fails and its modification time has changed since.
+    """
+
+    def __init__(self):
+        """
+        Initializes the index.
+        """
+        self._dirs = dict()
+        self._lock = threading.Lock()
+
+    def _scan(self, dir_path: str) -> Tuple[int, Dict[Tuple[str, str], str]]:
+        """
+        Lists the files in the directory.
+
+        :param dir_path: the directory to list
+        :type dir_path: str
+        :return: the tuple of modification time and dictionary (name without extension, lower-case extension) -> file name
+        :rtype: tuple
+        """
+        files = dict()
+        try:
+            mtime = os.stat(dir_path or ".").st_mtime_ns
+            with os.scandir(dir_path or ".") as it:
+                for entry in it:
+                    if entry.is_dir():
+                        continue
+                    name, ext = os.path.splitext(entry.name)
+                    key = (name, ext.lower())
+                    # prefer lower-case extensions, like .wav over .WAV
+                    if (key not in files) or (ext == ext.lower()):
+                        files[key] = entry.name
+        except OSError:
+            mtime = None
+        return mtime, files
+
+    def _files(self, dir_path: str, rescan: bool = False) -> Dict[Tuple[str, str], str]:
+        """
+        Returns the files of the directory, lists it if necessary.
+
+        :param dir_path: the directory to get the files for
+        :type dir_path: str
+        :param rescan: whether to list the directory again if it got modified
+        :type rescan: bool
+        :return: the dictionary (name without extension, lower-case extension) -> file name
+        :rtype: dict
+        """
+        with self._lock:
+            cached = self._dirs.get(dir_path)
+        if cached is not None:
+            if not rescan:
+                return cached[1]
+            try:
+                if os.stat(dir_path or ".").st_mtime_ns == cached[0]:
+                    return cached[1]
+            except OSError:
+                return cached[1]
+        mtime, files = self._scan(dir_path)
+        with self._lock:
+            self._dirs[dir_path] = (mtime, files)
+        return files
+
+    def find(self, dir_path: str, name: str, extensions: List[str]) -> Optional[str]:
+        """
+        Looks for a file with the name (no extension) and one of the extensions in the directory.
+
+        :param dir_path: the directory to look in
+        :type dir_path: str
+        :param name: the file name without extension
+        :type name: str
+        :param extensions: the extensions to try (incl dot, case-insensitive), in order of preference
+        :type extensions: list
+        :return: the full path of the first match, None if not found
+        :rtype: str
+        """
+        for rescan in [False, True]:
+            files = self._files(dir_path, rescan=rescan)
+            for ext in extensions:
+                file = files.get((name, ext.lower()))
+                if file is not None:
+                    return os.path.join(dir_path, file)
+        return None
+
+    def exists(self, path: str) -> bool:
+        """
+        Checks whether the file exists, using the listing of its directory.
+
+        :param path: the file to check
+        :type path: str
+        :return: True if the file exists
+        :rtype: bool
+        """
+        dir_path, file_name = os.path.split(path)
+        name, ext = os.path.splitext(file_name)
+        for rescan in [False, True]:
+            file = self._files(dir_path, rescan=rescan).get((name, ext.lower()))
+            if file is not None:
+                # only one spelling of the extension is indexed
+                return (file == file_name) or os.path.exists(path)
+        return False
+
+    def clear(self):
+        """
+        Removes all cached directory listings.
+        """
+        with self._lock:
+            self._dirs.clear()
+
+
+_directory_index = DirectoryIndex()
+""" the process-wide index of directories that audio files got located in. """
+
+
+def get_directory_index() -> DirectoryIndex:
+    """
+    Returns the process-wide index of directories used for locating audio files.
+
+    :return: the index
+    :rtype: DirectoryIndex
+    """
+    return _directory_index
+
+
+def locate_audio(path: str, rel_path: str = None, suffix: str = None, extensions: List[str] = None) -> Optional[str]:
     """
-    Tries to locate the audio file (mp3 or wav) for the given path by replacing its extension.
+    Tries to locate the audio file for the given path by replacing its extension.
+    Uses the process-wide directory index rather than checking each extension on disk.
 
     :param path: the base path to use
     :type path: str
@@ -21,20 +351,534 @@ def locate_audio(path: str, rel_path: str = None, suffix: str = None) -> Optiona
     :type rel_path: str
     :param suffix: the suffix to strip from the files, ignored if None or ""
     :type suffix: str
+    :param extensions: the extensions to look for (incl dot, case-insensitive), in order of preference, uses DEFAULT_AUDIO_EXTENSIONS if None
+    :type extensions: list
     :return: the located audio, None if not found
     :rtype: str
     """
-    ext = [".mp3", ".MP3", ".wav", ".WAV"]
-    audio_files = locate_file(path, ext, rel_path=rel_path, suffix=suffix)
-    if len(audio_files) == 0:
+    if extensions is None:
+        extensions = DEFAULT_AUDIO_EXTENSIONS
+    if rel_path is not None:
+        path = os.path.join(os.path.dirname(path), rel_path, os.path.basename(path))
+    path = strip_suffix(path, suffix)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return _directory_index.find(os.path.dirname(path), name, extensions)
+
+
+class PCMMemMap(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    Wraps a memory-mapped PCM data chunk. The raw samples only get converted
+    to the global data type (the same scaling as soundfile uses) for the slices that
+    are being accessed, the full conversion only happens when used as numpy array.
+    """
+
+    def __init__(self, raw: np.memmap, scale: float = None, offset: float = None, dtype: str = None):
+        """
+        Initializes the wrapper.
+
+        :param raw: the memory-mapped samples (frames or frames x channels)
+        :type raw: np.memmap
+        :param scale: the factor to multiply the raw samples with, ignored if None
+        :type scale: float
+        :param offset: the value to subtract from the raw samples before scaling (unsigned PCM), ignored if None
+        :type offset: float
+        :param dtype: the data type to convert the samples to, uses the global data type if None (see set_dtype)
+        :type dtype: str
+        """
+        self.raw = raw
+        self.scale = scale
+        self.offset = offset
+        self._dtype = get_dtype() if (dtype is None) else dtype
+
+    @property
+    def shape(self) -> Tuple:
+        """
+        Returns the shape of the audio.
+
+        :return: the shape (frames or frames x channels)
+        :rtype: tuple
+        """
+        return self.raw.shape
+
+    @property
+    def ndim(self) -> int:
+        """
+        Returns the number of dimensions.
+
+        :return: the dimensions
+        :rtype: int
+        """
+        return self.raw.ndim
+
+    @property
+    def dtype(self):
+        """
+        Returns the type of the converted samples.
+
+        :return: the data type
+        """
+        return np.dtype(self._dtype)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of frames.
+
+        :return: the number of frames
+        :rtype: int
+        """
+        return len(self.raw)
+
+    def _convert(self, a) -> np.ndarray:
+        """
+        Turns the raw samples into the data type of the wrapper.
+
+        :param a: the raw samples to convert
+        :return: the converted samples
+        :rtype: np.ndarray
+        """
+        if a.dtype == self.dtype:
+            return np.array(a)
+        work = DTYPE_FLOAT32 if (self._dtype == DTYPE_FLOAT32) else DTYPE_FLOAT64
+        result = np.asarray(a, dtype=work)
+        if self.offset is not None:
+            result -= self.offset
+        if self.scale is not None:
+            result *= self.scale
+        return to_dtype(result, self._dtype)
+
+    def __getitem__(self, item) -> np.ndarray:
+        """
+        Returns the converted samples of the specified slice.
+
+        :param item: the index/slice
+        :return: the converted samples
+        :rtype: np.ndarray
+        """
+        return self._convert(self.raw[item])
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """
+        Converts all the samples.
+
+        :param dtype: the data type to return, uses the one of the wrapper if None
+        :param copy: ignored, always returns a new array
+        :return: the converted samples
+        :rtype: np.ndarray
+        """
+        result = self._convert(self.raw)
+        if dtype is not None:
+            result = result.astype(dtype, copy=False)
+        return result
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """
+        Applies numpy ufuncs (and therefore arithmetic operators) to the converted samples.
+        """
+        inputs = tuple(np.asarray(x) if isinstance(x, PCMMemMap) else x for x in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+
+def memmap_wav(path: str) -> Optional[Tuple[PCMMemMap, int]]:
+    """
+    Memory-maps the data chunk of an uncompressed PCM/float WAV file.
+
+    :param path: the WAV file to map
+    :type path: str
+    :return: the tuple of memory-mapped audio and sample rate, None if not an 8/16/32-bit PCM or float WAV file
+    :rtype: tuple
+    """
+    with open(path, "rb") as fp:
+        header = fp.read(12)
+        if (len(header) < 12) or (header[0:4] != b"RIFF") or (header[8:12] != b"WAVE"):
+            return None
+        fmt = None
+        while True:
+            chunk = fp.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = fp.read(chunk_size)
+                if chunk_size % 2 == 1:
+                    fp.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                offset = fp.tell()
+                data_size = chunk_size
+                break
+            else:
+                fp.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+    if (fmt is None) or (len(fmt) < 16):
         return None
+    format_tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[0:16])
+    if (format_tag == WAVE_FORMAT_EXTENSIBLE) and (len(fmt) >= 26):
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+
+    scale = None
+    sample_offset = None
+    if format_tag == WAVE_FORMAT_PCM:
+        if bits == 8:
+            dtype = np.uint8
+            sample_offset = 128.0
+            scale = 1.0 / 128
+        elif bits == 16:
+            dtype = np.dtype("<i2")
+            scale = 1.0 / 2**15
+        elif bits == 32:
+            dtype = np.dtype("<i4")
+            scale = 1.0 / 2**31
+        else:
+            return None
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        if bits == 32:
+            dtype = np.dtype("<f4")
+        elif bits == 64:
+            dtype = np.dtype("<f8")
+        else:
+            return None
     else:
-        return audio_files[0]
+        return None
+    if block_align != channels * np.dtype(dtype).itemsize:
+        return None
 
+    # size of data chunk is unreliable for streamed files (0 or 0xFFFFFFFF), limit to file size
+    available = os.path.getsize(path) - offset
+    if (data_size == 0) or (data_size > available):
+        data_size = available
+    frames = data_size // block_align
+    if frames == 0:
+        return None
+    if channels == 1:
+        shape = (frames,)
+    else:
+        shape = (frames, channels)
+    raw = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    return PCMMemMap(raw, scale=scale, offset=sample_offset), sample_rate
+
+
+def _probe_audio(f) -> Optional[AudioInfo]:
+    """
+    Reads the header information via soundfile, falls back on TinyTag
+    for formats that the libsndfile build cannot handle.
+
+    :param f: the file name or file-like object to probe
+    :return: the header information, None if failed to determine
+    :rtype: AudioInfo
+    """
+    try:
+        info = sf.info(f)
+        return AudioInfo(info.channels, info.frames, info.samplerate, subtype=info.subtype, audio_format=info.format)
+    except:
+        pass
+    try:
+        if hasattr(f, "seek"):
+            f.seek(0)
+        if hasattr(f, "read"):
+            tag = TinyTag.get(file_obj=f, tags=False)
+        else:
+            tag = TinyTag.get(f, tags=False)
+        if (tag.samplerate is None) or (tag.duration is None):
+            return None
+        return AudioInfo(tag.channels, int(round(tag.duration * tag.samplerate)), tag.samplerate)
+    except:
+        return None
 
-def load_audio_from_file(path: str) -> Union[Tuple[np.ndarray, int], Tuple[None, None]]:
+
+def probe_audio_from_file(path: str) -> Optional[AudioInfo]:
+    """
+    Reads only the header of the audio file, without decoding the audio.
+
+    :param path: the file to probe
+    :type path: str
+    :return: the header information, None if failed to determine
+    :rtype: AudioInfo
     """
-    Loads the audio from the file.
+    return _probe_audio(path)
+
+
+def probe_audio_from_bytes(data: bytes) -> Optional[AudioInfo]:
+    """
+    Reads only the header of the binary audio data, without decoding the audio.
+
+    :param data: the bytes of the audio file
+    :type data: bytes
+    :return: the header information, None if failed to determine
+    :rtype: AudioInfo
+    """
+    return _probe_audio(io.BytesIO(data))
+
+
+def iter_array_blocks(audio, block_size: int, overlap: int = 0, start: int = 0, stop: int = None) -> Iterator[np.ndarray]:
+    """
+    Iterates over the frames of in-memory audio in blocks (same semantics as soundfile.blocks).
+
+    :param audio: the audio to iterate over (frames or frames x channels)
+    :param block_size: the number of frames per block
+    :type block_size: int
+    :param overlap: the number of frames that consecutive blocks overlap
+    :type overlap: int
+    :param start: the first frame to return
+    :type start: int
+    :param stop: the frame to stop at (excluded), uses all frames if None
+    :type stop: int
+    :return: the iterator over the blocks (frames x channels)
+    """
+    if overlap >= block_size:
+        raise Exception("Overlap must be smaller than block size: overlap=%d, block_size=%d" % (overlap, block_size))
+    if (stop is None) or (stop > len(audio)):
+        stop = len(audio)
+    pos = start
+    while pos < stop:
+        block = np.asarray(audio[pos:min(pos + block_size, stop)])
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+        yield block
+        if pos + block_size >= stop:
+            break
+        pos += block_size - overlap
+
+
+def open_audio_blocks(f, block_size: int, overlap: int = 0, start: int = 0, stop: int = None) -> Iterator[np.ndarray]:
+    """
+    Opens the audio file (raises an exception if not supported) and returns an iterator over
+    its frames in blocks, reading only one block at a time from disk.
+
+    :param f: the file name or file-like object to read from
+    :param block_size: the number of frames per block
+    :type block_size: int
+    :param overlap: the number of frames that consecutive blocks overlap
+    :type overlap: int
+    :param start: the first frame to return
+    :type start: int
+    :param stop: the frame to stop at (excluded), uses all frames if None
+    :type stop: int
+    :return: the iterator over the blocks (frames x channels)
+    """
+    sfile = sf.SoundFile(f)
+    if start > 0:
+        sfile.seek(start)
+    frames = -1 if (stop is None) else max(0, stop - start)
+
+    def _blocks():
+        try:
+            for block in sfile.blocks(blocksize=block_size, overlap=overlap, frames=frames, dtype=get_dtype(), always_2d=True):
+                yield block
+        finally:
+            sfile.close()
+
+    return _blocks()
+
+
+def save_audio_blocks(f, blocks: Iterable[np.ndarray], sample_rate: int, audio_format: str = None) -> bool:
+    """
+    Writes the audio blocks to the file, one block at a time.
+
+    :param f: the file name or file-like object to write to
+    :param blocks: the audio blocks (frames or frames x channels) to write
+    :type blocks: Iterable
+    :param sample_rate: the sample rate to use
+    :type sample_rate: int
+    :param audio_format: the format to use (e.g., WAV), determined from the extension of the file if None
+    :type audio_format: str
+    :return: whether any blocks were written
+    :rtype: bool
+    """
+    blocks = iter(blocks)
+    first = next(blocks, None)
+    if first is None:
+        return False
+    channels = 1 if (first.ndim == 1) else first.shape[1]
+    with sf.SoundFile(f, "w", samplerate=sample_rate, channels=channels, format=audio_format) as sfile:
+        sfile.write(first)
+        for block in blocks:
+            sfile.write(block)
+    return True
+
+
+class AudioCache(object):
+    """
+    Process-wide, size-bounded LRU cache for decoded audio. The cached arrays are
+    read-only, so that containers sharing them have to copy before modifying
+    them (see AudioData.mutable_audio).
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        """
+        Initializes the cache.
+
+        :param max_bytes: the budget in bytes, 0 disables the cache
+        :type max_bytes: int
+        """
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Returns whether the cache is in use.
+
+        :return: True if a budget is set
+        :rtype: bool
+        """
+        return self._max_bytes > 0
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        Returns the budget in bytes.
+
+        :return: the budget
+        :rtype: int
+        """
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int):
+        """
+        Sets the budget in bytes, evicts entries if necessary.
+
+        :param max_bytes: the budget, 0 disables the cache
+        :type max_bytes: int
+        """
+        with self._lock:
+            self._max_bytes = max(0, max_bytes)
+            self._evict()
+
+    @property
+    def num_bytes(self) -> int:
+        """
+        Returns the number of bytes currently occupied.
+
+        :return: the number of bytes
+        :rtype: int
+        """
+        return self._num_bytes
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the budget is met. Lock must be held.
+        """
+        while (self._num_bytes > self._max_bytes) and (len(self._entries) > 0):
+            _, (audio, _) = self._entries.popitem(last=False)
+            self._num_bytes -= audio.nbytes
+            self.evictions += 1
+
+    def get(self, key) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Returns the cached audio for the key.
+
+        :param key: the key to look up
+        :return: the audio data tuple (audio/np.ndarray, sample_rate/int), None if not cached
+        :rtype: tuple
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        """
+        Adds the audio to the cache, marking it read-only. Audio that exceeds the budget is not cached.
+
+        :param key: the key to store the audio under
+        :param audio: the decoded audio
+        :type audio: np.ndarray
+        :param sample_rate: the sample rate
+        :type sample_rate: int
+        :return: the audio data tuple (audio/np.ndarray, sample_rate/int)
+        :rtype: tuple
+        """
+        if not isinstance(audio, np.ndarray):
+            return audio, sample_rate
+        audio.setflags(write=False)
+        with self._lock:
+            if (audio.nbytes > self._max_bytes) or (key in self._entries):
+                return audio, sample_rate
+            self._entries[key] = (audio, sample_rate)
+            self._num_bytes += audio.nbytes
+            self._evict()
+        return audio, sample_rate
+
+    def clear(self):
+        """
+        Removes all entries and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache statistics.
+
+        :return: the statistics (entries, bytes, max_bytes, hits, misses, evictions)
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._num_bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __str__(self):
+        """
+        Returns a short description of the cache.
+
+        :return: the description
+        :rtype: str
+        """
+        stats = self.stats()
+        return "entries=%d, bytes=%d/%d, hits=%d, misses=%d, evictions=%d" % (
+            stats["entries"], stats["bytes"], stats["max_bytes"], stats["hits"], stats["misses"], stats["evictions"])
+
+
+_audio_cache = AudioCache()
+""" the process-wide cache for decoded audio. """
+try:
+    _audio_cache.max_bytes = int(float(os.getenv(ENV_ADC_AUDIO_CACHE_MB, "0")) * 1024 * 1024)
+except ValueError:
+    raise Exception("Invalid cache size in environment variable %s: %s" % (ENV_ADC_AUDIO_CACHE_MB, os.getenv(ENV_ADC_AUDIO_CACHE_MB)))
+
+
+def set_audio_cache_size(size_mb: float):
+    """
+    Sets the size of the process-wide cache for decoded audio.
+
+    :param size_mb: the size in MB, 0 disables the cache
+    :type size_mb: float
+    """
+    _audio_cache.max_bytes = int(size_mb * 1024 * 1024)
+
+
+def get_audio_cache() -> AudioCache:
+    """
+    Returns the process-wide cache for decoded audio.
+
+    :return: the cache
+    :rtype: AudioCache
+    """
+    return _audio_cache
+
+
+def _read_audio_file(path: str) -> Union[Tuple[np.ndarray, int], Tuple[None, None]]:
+    """
+    Decodes the audio file, using soundfile with librosa as fallback.
 
     :param path: the file to load the audio from
     :type path: str
@@ -42,38 +886,217 @@ def load_audio_from_file(path: str) -> Union[Tuple[np.ndarray, int], Tuple[None,
     :rtype: tuple
     """
     try:
-        return sf.read(path)
+        return sf.read(path, dtype=get_dtype())
     except:
         try:
-            return librosa.load(path)
+            audio, sample_rate = librosa.load(path)
+            return to_dtype(audio), sample_rate
         except:
             print("Failed to read: %s" % path)
             traceback.print_exc()
             return None, None
 
 
-def load_audio_from_bytes(data: bytes, ext: str) -> Union[Tuple[np.ndarray, int], Tuple[None, None]]:
+def load_audio_from_file(path: str, memmap: bool = None) -> Union[Tuple[np.ndarray, int], Tuple[None, None]]:
     """
-    Loads the audio from the bytes. Falls back loading from disk, if not possible.
+    Loads the audio from the file. Decoded audio is shared via the process-wide
+    cache if enabled (see set_audio_cache_size), keyed by path, modification time,
+    file size and dtype.
 
-    :param data: the bytes to load the audio from
-    :type data: bytes
-    :param ext: the audio extension to use
+    :param path: the file to load the audio from
+    :type path: str
+    :param memmap: whether to memory-map uncompressed PCM WAV files rather than decoding them, uses the global setting if None (see set_memmap_wav)
+    :type memmap: bool
+    :return: the audio data tuple (audio/np.ndarray, sample_rate/int), None if failed to load
+    :rtype: tuple
+    """
+    if memmap is None:
+        memmap = is_memmap_wav()
+    if memmap and path.lower().endswith(".wav"):
+        try:
+            result = memmap_wav(path)
+            if result is not None:
+                return result
+        except:
+            pass
+    key = None
+    if _audio_cache.enabled:
+        try:
+            stat = os.stat(path)
+            key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size, get_dtype())
+            result = _audio_cache.get(key)
+            if result is not None:
+                return result
+        except OSError:
+            key = None
+    audio, sample_rate = _read_audio_file(path)
+    if (key is not None) and (audio is not None):
+        return _audio_cache.put(key, audio, sample_rate)
+    return audio, sample_rate
+
+
+def _normalize_decode_format(ext: Optional[str]) -> str:
+    """
+    Turns the extension/format into an upper-case format name as used by soundfile.
+
+    :param ext: the extension or format (eg .mp3 or MP3), can be None
     :type ext: str
-    :return: the audio data, None if failed to load
-    :rtype: np.ndarray
+    :return: the format name, "UNKNOWN" if not available
+    :rtype: str
+    """
+    if (ext is None) or (len(ext) == 0):
+        return "UNKNOWN"
+    return ext.lstrip(".").upper()
+
+
+def _decode_soundfile(data: bytes, fmt: str) -> Tuple[np.ndarray, int]:
+    """
+    Decodes the audio in memory using soundfile.
+
+    :param data: the bytes to decode
+    :type data: bytes
+    :param fmt: the audio format
+    :type fmt: str
+    :return: the audio data tuple (audio/np.ndarray, sample_rate/int)
+    :rtype: tuple
+    """
+    return sf.read(io.BytesIO(data), dtype=get_dtype())
+
+
+def _decode_ffmpeg(data: bytes, fmt: str) -> Tuple[np.ndarray, int]:
+    """
+    Decodes the audio by piping it through an ffmpeg process, no files get written.
+
+    :param data: the bytes to decode
+    :type data: bytes
+    :param fmt: the audio format
+    :type fmt: str
+    :return: the audio data tuple (audio/np.ndarray, sample_rate/int)
+    :rtype: tuple
+    """
+    info = _probe_audio(io.BytesIO(data))
+    if (info is None) or (info.sample_rate is None) or (info.channels is None):
+        raise Exception("Failed to determine sample rate/channels of %s data!" % fmt)
+    channels = int(info.channels)
+    sample_rate = int(info.sample_rate)
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", "pipe:0",
+           "-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(sample_rate), "pipe:1"]
+    proc = subprocess.run(cmd, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    audio = np.frombuffer(proc.stdout, dtype=np.float32)
+    if channels > 1:
+        audio = audio.reshape((-1, channels))
+    return to_dtype(audio), sample_rate
+
+
+def _decode_tempfile(data: bytes, fmt: str) -> Tuple[np.ndarray, int]:
+    """
+    Decodes the audio by writing it to a temporary file first, last resort.
+
+    :param data: the bytes to decode
+    :type data: bytes
+    :param fmt: the audio format
+    :type fmt: str
+    :return: the audio data tuple (audio/np.ndarray, sample_rate/int)
+    :rtype: tuple
     """
     path = None
     try:
-        buf = io.BytesIO(data)
-        result = sf.read(buf)
-    except:
-        with tempfile.NamedTemporaryFile(suffix=ext, delete_on_close=False) as fp:
-            fp.write(data)
-            fp.close()
+        with tempfile.NamedTemporaryFile(suffix="." + fmt.lower(), delete=False) as fp:
             path = fp.name
-            result = load_audio_from_file(path)
+            fp.write(data)
+        result = _read_audio_file(path)
     finally:
-        if path is not None:
+        if (path is not None) and os.path.exists(path):
             os.remove(path)
+    if result[0] is None:
+        raise Exception("Failed to decode %s data from temporary file!" % fmt)
     return result
+
+
+_decoders = {
+    DECODE_BACKEND_SOUNDFILE: _decode_soundfile,
+    DECODE_BACKEND_FFMPEG: _decode_ffmpeg,
+    DECODE_BACKEND_TEMPFILE: _decode_tempfile,
+}
+""" the decoding methods per backend. """
+
+_decode_backends = None
+""" the available backends for decoding audio from bytes, determined once. """
+
+_soundfile_formats = None
+""" the formats that the installed libsndfile supports. """
+
+_decode_stats = Counter()
+""" the number of decoded records per (format, backend) tuple. """
+
+_decode_lock = threading.Lock()
+
+
+def decode_backends() -> List[str]:
+    """
+    Returns the backends for decoding audio from bytes, in the order they get tried.
+    The available backends are determined on first call by probing the capabilities
+    (libsndfile formats, ffmpeg executable on the path).
+
+    :return: the list of backend names
+    :rtype: list
+    """
+    global _decode_backends, _soundfile_formats
+    with _decode_lock:
+        if _decode_backends is None:
+            _soundfile_formats = set(sf.available_formats().keys())
+            backends = [DECODE_BACKEND_SOUNDFILE]
+            if shutil.which("ffmpeg") is not None:
+                backends.append(DECODE_BACKEND_FFMPEG)
+            backends.append(DECODE_BACKEND_TEMPFILE)
+            _decode_backends = backends
+    return _decode_backends[:]
+
+
+def decode_stats() -> Dict[Tuple[str, str], int]:
+    """
+    Returns how many records each backend decoded per format.
+
+    :return: the counts per (format, backend) tuple, backend "failed" if none of them could decode the data
+    :rtype: dict
+    """
+    with _decode_lock:
+        return dict(_decode_stats)
+
+
+def load_audio_from_bytes(data: bytes, ext: str) -> Union[Tuple[np.ndarray, int], Tuple[None, None]]:
+    """
+    Loads the audio from the bytes. Tries the available decode backends in turn (see decode_backends),
+    falling back on writing a temporary file only if none of the in-memory ones succeeded.
+
+    :param data: the bytes to load the audio from
+    :type data: bytes
+    :param ext: the audio format or extension to use (eg MP3 or .mp3)
+    :type ext: str
+    :return: the audio data tuple (audio/np.ndarray, sample_rate/int), None if failed to load
+    :rtype: tuple
+    """
+    fmt = _normalize_decode_format(ext)
+    key = None
+    if _audio_cache.enabled:
+        key = (hashlib.blake2b(data, digest_size=16).digest(), len(data), get_dtype())
+        result = _audio_cache.get(key)
+        if result is not None:
+            return result
+    for backend in decode_backends():
+        # skip in-memory decoding with libsndfile builds that are known to lack the format
+        if (backend == DECODE_BACKEND_SOUNDFILE) and (fmt != "UNKNOWN") and (fmt not in _soundfile_formats):
+            continue
+        try:
+            result = _decoders[backend](data, fmt)
+        except:
+            continue
+        with _decode_lock:
+            _decode_stats[(fmt, backend)] += 1
+        if key is not None:
+            return _audio_cache.put(key, *result)
+        return result
+    with _decode_lock:
+        _decode_stats[(fmt, "failed")] += 1
+    print("Failed to decode %s data!" % fmt)
+    return None, None
@@ -0,0 +1,76 @@
+import os
+from typing import Tuple
+
+from ._classification import AudioClassificationData
+from ._data import AudioData
+from ._speech import SpeechData
+
+WEBDATASET_EXT_TRANSCRIPT = ".txt"
+""" the extension of the members with the transcript of speech data. """
+
+WEBDATASET_EXT_LABEL = ".cls"
+""" the extension of the members with the label of classification data. """
+
+WEBDATASET_EXT_METADATA = ".json"
+""" the extension of the members with the meta-data. """
+
+WEBDATASET_KEY_TRANSCRIPT = "transcript"
+""" the key in the JSON meta-data that can hold the transcript. """
+
+WEBDATASET_KEY_LABEL = "label"
+""" the key in the JSON meta-data that can hold the label. """
+
+WEBDATASET_KEY_AUDIO_NAME = "audio_name"
+""" the key in the JSON meta-data that holds the original name of the audio. """
+
+
+def split_webdataset_name(name: str) -> Tuple[str, str]:
+    """
+    Splits the name of a tar member into sample key and extension, following the WebDataset
+    convention: the key is the path up to the first dot in the file name, the extension is the rest
+    (eg "train/a.b.wav" -> ("train/a", ".b.wav")).
+
+    :param name: the member name to split
+    :type name: str
+    :return: the tuple of key and extension (lower case, incl dot)
+    :rtype: tuple
+    """
+    dir_name, base_name = os.path.split(name)
+    if "." in base_name:
+        pos = base_name.index(".")
+        key, ext = base_name[:pos], base_name[pos:]
+    else:
+        key, ext = base_name, ""
+    if len(dir_name) > 0:
+        key = dir_name + "/" + key
+    return key, ext.lower()
+
+
+def webdataset_key(audio_name: str) -> str:
+    """
+    Generates the sample key for the audio name: the name without extension and directory,
+    with any remaining dots replaced by underscores (eg "rec.01.wav" -> "rec_01"), as
+    the key must not contain dots.
+
+    :param audio_name: the audio name to generate the key for
+    :type audio_name: str
+    :return: the key
+    :rtype: str
+    """
+    return os.path.splitext(os.path.basename(audio_name))[0].replace(".", "_")
+
+
+def webdataset_annotation_ext(item: AudioData) -> str:
+    """
+    Returns the extension of the member to store the annotation of the container in.
+
+    :param item: the container to get the extension for
+    :type item: AudioData
+    :return: the extension, None if no annotation member is used
+    :rtype: str
+    """
+    if isinstance(item, SpeechData):
+        return WEBDATASET_EXT_TRANSCRIPT
+    if isinstance(item, AudioClassificationData):
+        return WEBDATASET_EXT_LABEL
+    return None
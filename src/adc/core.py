@@ -1,2 +1,11 @@
 ENV_ADC_LOGLEVEL = "ADC_LOGLEVEL"
 """ environment variable for the global default logging level. """
+
+ENV_ADC_MEMMAP_WAV = "ADC_MEMMAP_WAV"
+""" environment variable for enabling memory-mapped loading of PCM WAV files (true|false). """
+
+ENV_ADC_DTYPE = "ADC_DTYPE"
+""" environment variable for the data type to use for the audio samples in memory (float32|int16|float64). """
+
+ENV_ADC_AUDIO_CACHE_MB = "ADC_AUDIO_CACHE_MB"
+""" environment variable for the size in MB of the process-wide cache for decoded audio (0 disables it). """
@@ -4,12 +4,14 @@ from ._change_volume import ChangeVolume
 from ._convert_to_mono import ConvertToMono
 from ._convert_to_wav import ConvertToWav
 from ._discard_negatives import DiscardNegatives
+from ._dsp_chain import DSPChain, DSP_OPERATIONS, DSP_OPERATION_MONO, DSP_OPERATION_RESAMPLE, DSP_OPERATION_GAIN, DSP_OPERATION_TRIM
 from ._generate_chunks import GenerateChunks
 from ._pitch_shift import PitchShift
 from ._pyfunc_filter import PythonFunctionFilter
 from ._rename import Rename
 from ._resample import Resample, RESAMPLE_TYPES
 from ._sanitize_name import SanitizeName
+from ._split_on_silence import SplitOnSilence, frame_energy
 from ._strip_annotations import StripAnnotations
 from ._sub_process import SubProcess
 from ._tee import Tee
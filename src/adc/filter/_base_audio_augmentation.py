@@ -2,6 +2,7 @@ import abc
 import argparse
 import os
 from random import Random
+from typing import List
 
 from seppl.io import BatchFilter
 from wai.logging import LOGGING_WARNING
@@ -28,7 +29,7 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
 
     def __init__(self, mode: str = AUG_MODE_REPLACE, suffix: str = None,
                  seed: int = None, seed_augmentation: bool = False, threshold: float = 0.0,
-                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+                 num_variants: int = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the filter.
 
@@ -42,6 +43,8 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
         :type seed_augmentation: bool
         :param threshold: the threshold to use for Random.rand(): if equal or above, augmentation gets applied; range: 0-1; default: 0 (= always)
         :type threshold: float
+        :param num_variants: the number of augmented variants to generate per record (only one if not randomized)
+        :type num_variants: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -53,7 +56,9 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
         self.seed = seed
         self.seed_augmentation = seed_augmentation
         self.threshold = threshold
+        self.num_variants = num_variants
         self._random = None
+        self._num_variants = None
 
     def _create_argparser(self) -> argparse.ArgumentParser:
         """
@@ -68,6 +73,7 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
         parser.add_argument("-s", "--seed", type=int, help="The seed value to use for the random number generator; randomly seeded if not provided", default=None, required=False)
         parser.add_argument("-a", "--seed_augmentation", action="store_true", help="Whether to seed the augmentation; if specified, uses the seeded random generator to produce a seed value from %d to %d for the augmentation." % (MIN_RAND, MAX_RAND), required=False)
         parser.add_argument("-T", "--threshold", type=float, help="the threshold to use for Random.rand(): if equal or above, augmentation gets applied; range: 0-1; default: 0 (= always)", default=0.0, required=False)
+        parser.add_argument("-n", "--num_variants", type=int, help="The number of augmented variants to generate per record; requires a random range, otherwise only a single variant gets generated.", default=1, required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -83,6 +89,7 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
         self.seed = ns.seed
         self.seed_augmentation = ns.seed_augmentation
         self.threshold = ns.threshold
+        self.num_variants = ns.num_variants
 
     def initialize(self):
         """
@@ -95,7 +102,15 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
             self.seed_augmentation = False
         if self.threshold is None:
             self.threshold = 0.0
+        if self.num_variants is None:
+            self.num_variants = 1
+        if self.num_variants < 1:
+            raise Exception("Number of variants must be at least 1, provided: %d" % self.num_variants)
         self._random = Random(self.seed)
+        self._num_variants = self.num_variants
+        if (self.num_variants > 1) and self._can_augment() and not self._is_randomized():
+            self.logger().warning("No random range specified, all %d variants would be identical; generating only a single variant!" % self.num_variants)
+            self._num_variants = 1
 
     @abc.abstractmethod
     def _default_suffix(self) -> str:
@@ -128,6 +143,16 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
         """
         return True
 
+    def _is_randomized(self) -> bool:
+        """
+        Checks whether the augmentation parameters get drawn randomly, ie whether
+        multiple variants of the same record differ.
+
+        :return: whether randomized
+        :rtype: bool
+        """
+        return True
+
     @abc.abstractmethod
     def _augment(self, item: AudioData, aug_seed: int, audio_name: str) -> AudioData:
         """
@@ -144,6 +169,22 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
         """
         raise NotImplementedError()
 
+    def _augment_variants(self, item: AudioData, aug_seeds: List[int], audio_names: List[str]) -> List[AudioData]:
+        """
+        Generates multiple augmented variants of the audio data. Calls _augment for each variant,
+        derived classes can override this method to share computations between the variants.
+
+        :param item: the data to augment
+        :type item: AudioData
+        :param aug_seeds: the seed values to use (one per variant), can be None
+        :type aug_seeds: list
+        :param audio_names: the new audio names (one per variant)
+        :type audio_names: list
+        :return: the augmented variants
+        :rtype: list
+        """
+        return [self._augment(item, aug_seed, audio_name) for aug_seed, audio_name in zip(aug_seeds, audio_names)]
+
     def _do_process(self, data):
         """
         Processes the data record(s).
@@ -165,19 +206,25 @@ class BaseAudioAugmentationFilter(BatchFilter, abc.ABC):
                 continue
 
             # augment
-            if self.seed_augmentation:
-                aug_seed = self._random.randint(MIN_RAND, MAX_RAND)
-            else:
-                aug_seed = None
+            aug_seeds = []
+            audio_names_new = []
             audio_name_parts = os.path.splitext(item.audio_name)
-            audio_name_new = audio_name_parts[0] + self._get_suffix() + audio_name_parts[1]
-            item_new = self._augment(item, aug_seed, audio_name_new)
+            for i in range(self._num_variants):
+                if self.seed_augmentation:
+                    aug_seeds.append(self._random.randint(MIN_RAND, MAX_RAND))
+                else:
+                    aug_seeds.append(None)
+                if self._num_variants == 1:
+                    audio_names_new.append(audio_name_parts[0] + self._get_suffix() + audio_name_parts[1])
+                else:
+                    audio_names_new.append(audio_name_parts[0] + self._get_suffix() + "-" + str(i + 1) + audio_name_parts[1])
+            items_new = self._augment_variants(item, aug_seeds, audio_names_new)
 
             if self.mode == AUG_MODE_ADD:
                 result.append(item)
-                result.append(item_new)
+                result.extend(items_new)
             elif self.mode == AUG_MODE_REPLACE:
-                result.append(item_new)
+                result.extend(items_new)
             else:
                 raise Exception("Unknown augmentation mode: %s" + self.mode)
 
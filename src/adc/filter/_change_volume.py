@@ -5,7 +5,7 @@ from kasperl.api import make_list, flatten_list
 from seppl.io import BatchFilter
 from wai.logging import LOGGING_WARNING
 
-from adc.api import AudioData, AudioClassificationData, SpeechData
+from adc.api import AudioData, AudioClassificationData, SpeechData, to_dtype, to_float
 
 
 class ChangeVolume(BatchFilter):
@@ -92,6 +92,22 @@ class ChangeVolume(BatchFilter):
         if self.factor is None:
             self.factor = 1.0
 
+    def _scaled_blocks(self, item: AudioData):
+        """
+        Returns the function for streaming the audio with the factor applied.
+
+        :param item: the audio data to stream
+        :type item: AudioData
+        :return: the function generating the blocks
+        """
+        factor = self.factor
+
+        def _blocks(block_size, overlap, start, stop):
+            for block in item.iter_blocks(block_size, overlap=overlap, always_2d=True, start=start, stop=stop):
+                yield to_dtype(to_float(block) * factor)
+
+        return _blocks
+
     def _do_process(self, data):
         """
         Processes the data record(s).
@@ -105,11 +121,17 @@ class ChangeVolume(BatchFilter):
                 result.append(item)
             else:
                 self.logger().info("Applying factor %f: %s" % (self.factor, item.audio_name))
-                audio_new = item.audio * self.factor
-                item_new = type(item)(audio_name=item.audio_name, data=item.data, audio=audio_new,
-                                      audio_format=item.audio_format, duration=item.duration,
-                                      sample_rate=item.sample_rate, metadata=item.get_metadata(),
-                                      annotation=item.annotation)
+                if item.is_streamable:
+                    item_new = type(item)(audio_name=item.audio_name, blocks=self._scaled_blocks(item),
+                                          audio_format=item.audio_format, duration=item.duration,
+                                          sample_rate=item.sample_rate, metadata=item.get_metadata(),
+                                          annotation=item.annotation)
+                else:
+                    audio_new = to_dtype(to_float(item.audio) * self.factor)
+                    item_new = type(item)(audio_name=item.audio_name, data=item.data, audio=audio_new,
+                                          audio_format=item.audio_format, duration=item.duration,
+                                          sample_rate=item.sample_rate, metadata=item.get_metadata(),
+                                          annotation=item.annotation)
                 result.append(item_new)
 
         return flatten_list(result)
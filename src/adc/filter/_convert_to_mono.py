@@ -6,7 +6,7 @@ from typing import List
 from seppl.io import BatchFilter
 from wai.logging import LOGGING_WARNING
 from kasperl.api import make_list, flatten_list
-from adc.api import AudioData, AudioClassificationData, SpeechData
+from adc.api import AudioData, AudioClassificationData, SpeechData, audio_to_librosa, audio_from_librosa, to_dtype, to_float
 
 
 class ConvertToMono(BatchFilter):
@@ -93,6 +93,20 @@ class ConvertToMono(BatchFilter):
         if self.force is None:
             self.force = False
 
+    def _mono_blocks(self, item: AudioData):
+        """
+        Returns the function for streaming the audio downmixed to mono.
+
+        :param item: the audio data to stream
+        :type item: AudioData
+        :return: the function generating the blocks
+        """
+        def _blocks(block_size, overlap, start, stop):
+            for block in item.iter_blocks(block_size, overlap=overlap, always_2d=True, start=start, stop=stop):
+                yield to_dtype(to_float(block).mean(axis=1, keepdims=True))
+
+        return _blocks
+
     def _do_process(self, data):
         """
         Processes the data record(s).
@@ -104,11 +118,17 @@ class ConvertToMono(BatchFilter):
         for item in make_list(data):
             if self.force or not item.is_mono:
                 self.logger().info("Converting to mono: %s" % item.audio_name)
-                audio_new = librosa.to_mono(item.audio)
-                item_new = type(item)(audio_name=item.audio_name, data=item.data, audio=audio_new,
-                                      audio_format=item.audio_format, duration=item.duration,
-                                      sample_rate=item.sample_rate, metadata=item.get_metadata(),
-                                      annotation=item.annotation)
+                if item.is_streamable:
+                    item_new = type(item)(audio_name=item.audio_name, blocks=self._mono_blocks(item),
+                                          audio_format=item.audio_format, duration=item.duration,
+                                          sample_rate=item.sample_rate, metadata=item.get_metadata(),
+                                          annotation=item.annotation)
+                else:
+                    audio_new = audio_from_librosa(librosa.to_mono(audio_to_librosa(item.audio)))
+                    item_new = type(item)(audio_name=item.audio_name, data=item.data, audio=audio_new,
+                                          audio_format=item.audio_format, duration=item.duration,
+                                          sample_rate=item.sample_rate, metadata=item.get_metadata(),
+                                          annotation=item.annotation)
                 result.append(item_new)
             else:
                 result.append(item)
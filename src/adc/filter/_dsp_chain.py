@@ -0,0 +1,226 @@
+import argparse
+import librosa
+import numpy as np
+import os
+from typing import List
+
+from seppl.io import BatchFilter
+from wai.logging import LOGGING_WARNING
+from kasperl.api import make_list, flatten_list
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS, DTYPE_FLOAT32, to_dtype, resample_rows
+from ._resample import RESAMPLE_TYPES, RESAMPLE_TYPE_DEFAULT
+
+DSP_OPERATION_MONO = "mono"
+DSP_OPERATION_RESAMPLE = "resampling"
+DSP_OPERATION_GAIN = "gain"
+DSP_OPERATION_TRIM = "trim"
+DSP_OPERATIONS = [
+    DSP_OPERATION_MONO,
+    DSP_OPERATION_RESAMPLE,
+    DSP_OPERATION_GAIN,
+    DSP_OPERATION_TRIM,
+]
+
+
+class DSPChain(BatchFilter):
+    """
+    Applies a sequence of DSP operations to the audio in a single pass.
+    """
+
+    def __init__(self, operations: List[str] = None, sample_rate: int = None, resample_type: str = None,
+                 factor: float = None, top_db: int = None, frame_length: int = None, hop_length: int = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the filter.
+
+        :param operations: the operations to apply, in order (see DSP_OPERATIONS)
+        :type operations: list
+        :param sample_rate: the sample rate to resample to
+        :type sample_rate: int
+        :param resample_type: how to perform the resampling
+        :type resample_type: str
+        :param factor: the gain factor to apply to the audio
+        :type factor: float
+        :param top_db: the threshold (in decibels) below reference to consider as silence when trimming
+        :type top_db: int
+        :param frame_length: the number of samples per analysis frame when trimming
+        :type frame_length: int
+        :param hop_length: the number of samples between analysis frames when trimming
+        :type hop_length: int
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.operations = operations
+        self.sample_rate = sample_rate
+        self.resample_type = resample_type
+        self.factor = factor
+        self.top_db = top_db
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "dsp-chain"
+
+    def description(self) -> str:
+        """
+        Returns a description of the handler.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Applies the specified operations (" + "|".join(DSP_OPERATIONS) + ") in the given order to the audio " \
+               "in a single pass, using a float32 buffer that gets modified in-place where possible, and outputs WAV. " \
+               "Equivalent to chaining convert-to-mono, resample, change-volume, trim-silence and convert-to-wav, " \
+               "but without creating intermediate containers."
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioData]
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioClassificationData, SpeechData]
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-O", "--operations", choices=DSP_OPERATIONS, nargs="+", help="The operations to apply, in the order specified.", required=True)
+        parser.add_argument("-s", "--sample_rate", type=int, help="The sample rate to use for the audio (" + DSP_OPERATION_RESAMPLE + ").", default=22050, required=False)
+        parser.add_argument("-t", "--resample_type", choices=RESAMPLE_TYPES, help="The resampling type to apply (" + DSP_OPERATION_RESAMPLE + ").", default=RESAMPLE_TYPE_DEFAULT, required=False)
+        parser.add_argument("-f", "--factor", type=float, help="The factor to apply to the audio (" + DSP_OPERATION_GAIN + ").", default=1.0, required=False)
+        parser.add_argument("--top_db", type=int, help="The threshold (in decibels) below reference to consider as silence (" + DSP_OPERATION_TRIM + ").", default=60, required=False)
+        parser.add_argument("--frame_length", type=int, help="The number of samples per analysis frame (" + DSP_OPERATION_TRIM + ").", default=2048, required=False)
+        parser.add_argument("--hop_length", type=int, help="The number of samples between analysis frames (" + DSP_OPERATION_TRIM + ").", default=512, required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.operations = ns.operations
+        self.sample_rate = ns.sample_rate
+        self.resample_type = ns.resample_type
+        self.factor = ns.factor
+        self.top_db = ns.top_db
+        self.frame_length = ns.frame_length
+        self.hop_length = ns.hop_length
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if (self.operations is None) or (len(self.operations) == 0):
+            raise Exception("No operations specified!")
+        for op in self.operations:
+            if op not in DSP_OPERATIONS:
+                raise Exception("Unsupported operation: %s" % op)
+        if self.sample_rate is None:
+            self.sample_rate = 22050
+        if self.resample_type is None:
+            self.resample_type = RESAMPLE_TYPE_DEFAULT
+        if self.factor is None:
+            self.factor = 1.0
+        if self.top_db is None:
+            self.top_db = 60
+        if self.frame_length is None:
+            self.frame_length = 2048
+        if self.hop_length is None:
+            self.hop_length = 512
+
+    def _apply(self, audio: np.ndarray, sample_rate: int):
+        """
+        Applies the operations to the audio (frames or frames x channels).
+        The input audio is never modified.
+
+        :param audio: the audio to process
+        :type audio: np.ndarray
+        :param sample_rate: the sample rate of the audio
+        :type sample_rate: int
+        :return: the tuple of processed audio (float32) and sample rate
+        :rtype: tuple
+        """
+        buf = to_dtype(audio, DTYPE_FLOAT32)
+        # whether buf is a private array that can be modified in-place (memory-mapped audio never is)
+        owned = isinstance(audio, np.ndarray) and (not isinstance(audio, np.memmap)) and (not np.may_share_memory(buf, audio))
+
+        for op in self.operations:
+            if op == DSP_OPERATION_MONO:
+                if buf.ndim == 2:
+                    if buf.shape[1] == 1:
+                        buf = buf[:, 0]
+                    else:
+                        buf = buf.mean(axis=1, dtype=np.float32)
+                        owned = True
+            elif op == DSP_OPERATION_RESAMPLE:
+                if sample_rate != self.sample_rate:
+                    rows = buf[np.newaxis, :] if (buf.ndim == 1) else buf.T
+                    rows = resample_rows(rows, sample_rate, self.sample_rate, self.resample_type)
+                    buf = rows[0] if (buf.ndim == 1) else rows.T
+                    sample_rate = self.sample_rate
+                    owned = True
+            elif op == DSP_OPERATION_GAIN:
+                if self.factor != 1.0:
+                    if owned:
+                        buf *= self.factor
+                    else:
+                        buf = buf * np.float32(self.factor)
+                        owned = True
+            elif op == DSP_OPERATION_TRIM:
+                _, index = librosa.effects.trim(buf if (buf.ndim == 1) else buf.T, top_db=self.top_db,
+                                                frame_length=self.frame_length, hop_length=self.hop_length)
+                # slicing only creates a view
+                buf = buf[index[0]:index[1]]
+            else:
+                raise Exception("Unsupported operation: %s" % op)
+
+        return buf, sample_rate
+
+    def _do_process(self, data):
+        """
+        Processes the data record(s).
+
+        :param data: the record(s) to process
+        :return: the potentially updated record(s)
+        """
+        result = []
+        for item in make_list(data):
+            self.logger().info("Applying %s: %s" % ("|".join(self.operations), item.audio_name))
+            audio_new, sample_rate_new = self._apply(item.audio, item.sample_rate)
+            audio_new = np.ascontiguousarray(to_dtype(audio_new))
+            audio_name_new = os.path.splitext(item.audio_name)[0] + FORMAT_EXTENSIONS[FORMAT_WAV]
+            item_new = type(item)(audio_name=audio_name_new, audio=audio_new,
+                                  audio_format=FORMAT_WAV, duration=audio_new.shape[0] / sample_rate_new,
+                                  sample_rate=sample_rate_new, metadata=item.get_metadata(),
+                                  annotation=item.annotation)
+            result.append(item_new)
+
+        return flatten_list(result)
@@ -2,25 +2,32 @@ import argparse
 import os
 from typing import List
 
+import numpy as np
 from kasperl.api import make_list, flatten_list, safe_deepcopy
-from seppl.io import BatchFilter
+from seppl.io import StreamFilter
 from wai.logging import LOGGING_WARNING
 
-from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS, get_dtype
 
 
-class GenerateChunks(BatchFilter):
+class GenerateChunks(StreamFilter):
     """
     Splits the audio into chunks of the specified length.
     """
 
-    def __init__(self, length: float = None, metadata_key: str = None,
-                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+    def __init__(self, length: float = None, hop: float = None, min_length: float = None, pad: bool = None,
+                 metadata_key: str = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the filter.
 
         :param length: the length in seconds
         :type length: float
+        :param hop: the offset in seconds between the start of consecutive chunks, uses the length if None
+        :type hop: float
+        :param min_length: the minimum length in seconds for chunks, shorter ones get discarded
+        :type min_length: float
+        :param pad: whether to pad chunks that are shorter than the length with silence
+        :type pad: bool
         :param metadata_key: the key in the meta-data for storing the offset
         :type metadata_key: str
         :param logger_name: the name to use for the logger
@@ -30,7 +37,11 @@ class GenerateChunks(BatchFilter):
         """
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.length = length
+        self.hop = hop
+        self.min_length = min_length
+        self.pad = pad
         self.metadata_key = metadata_key
+        self._pending = None
 
     def name(self) -> str:
         """
@@ -48,7 +59,8 @@ class GenerateChunks(BatchFilter):
         :return: the description
         :rtype: str
         """
-        return "Splits the audio into chunks of the specified length."
+        return "Splits the audio into chunks of the specified length, optionally overlapping (hop smaller than length). " \
+               "The chunks get generated one at a time and file-backed audio only gets read for the chunk being output."
 
     def accepts(self) -> List:
         """
@@ -77,6 +89,9 @@ class GenerateChunks(BatchFilter):
         """
         parser = super()._create_argparser()
         parser.add_argument("-L", "--length", type=float, help="The length of the chunks in seconds.", default=1.0, required=False)
+        parser.add_argument("-H", "--hop", type=float, help="The offset in seconds between the start of consecutive chunks; uses the length if not specified (no overlap).", default=None, required=False)
+        parser.add_argument("-m", "--min_length", type=float, help="The minimum length in seconds for chunks, shorter ones get discarded.", default=0.0, required=False)
+        parser.add_argument("-p", "--pad", action="store_true", help="Whether to pad chunks that are shorter than the length with silence.", required=False)
         parser.add_argument("-k", "--metadata_key", type=str, help="The key in the meta-data to store the offset under.", default="offset", required=False)
         return parser
 
@@ -89,6 +104,9 @@ class GenerateChunks(BatchFilter):
         """
         super()._apply_args(ns)
         self.length = ns.length
+        self.hop = ns.hop
+        self.min_length = ns.min_length
+        self.pad = ns.pad
         self.metadata_key = ns.metadata_key
 
     def initialize(self):
@@ -98,8 +116,144 @@ class GenerateChunks(BatchFilter):
         super().initialize()
         if self.length is None:
             self.length = 1.0
+        if self.length <= 0:
+            raise Exception("Length must be greater than zero: %f" % self.length)
+        if self.hop is None:
+            self.hop = self.length
+        if self.hop <= 0:
+            raise Exception("Hop must be greater than zero: %f" % self.hop)
+        if self.min_length is None:
+            self.min_length = 0.0
+        if self.pad is None:
+            self.pad = False
         if self.metadata_key is None:
             self.metadata_key = "offset"
+        self._pending = None
+
+    def _chunk_blocks(self, item: AudioData, offset: int, length: int, padded: int):
+        """
+        Returns the function for streaming a chunk of the audio.
+
+        :param item: the audio data to stream
+        :type item: AudioData
+        :param offset: the first frame of the chunk
+        :type offset: int
+        :param length: the number of frames in the chunk available from the audio
+        :type length: int
+        :param padded: the number of frames in the chunk, including the padding with silence
+        :type padded: int
+        :return: the function generating the blocks
+        """
+        def _blocks(block_size, overlap, start, stop):
+            if (stop is None) or (stop > padded):
+                stop = padded
+            if start < length:
+                for block in item.iter_blocks(block_size, overlap=overlap, always_2d=True, start=offset + start, stop=offset + min(stop, length)):
+                    yield block
+            if stop > length:
+                yield np.zeros((stop - max(start, length), item.channels), dtype=get_dtype())
+
+        return _blocks
+
+    def _chunks(self, item: AudioData):
+        """
+        Generates the chunks for the audio, one at a time. The offsets are calculated from the frame
+        positions, i.e., they do not accumulate rounding errors.
+
+        :param item: the audio data to split
+        :type item: AudioData
+        :return: the generator for the chunks
+        """
+        sample_rate = item.sample_rate
+        length = int(round(self.length * sample_rate))
+        hop = max(1, int(round(self.hop * sample_rate)))
+        min_length = int(round(self.min_length * sample_rate))
+
+        streamable = item.is_streamable
+        samples_total = item.frames if streamable else None
+        if samples_total is None:
+            streamable = False
+            audio = item.audio
+            samples_total = len(audio)
+        else:
+            audio = None
+
+        # nothing to split?
+        if (samples_total <= length) and ((samples_total == length) or not self.pad):
+            if samples_total >= min_length:
+                yield item
+            return
+
+        self.logger().info("Generating chunks of length %f (hop %f): %s" % (self.length, self.hop, item.audio_name))
+        name, _ = os.path.splitext(item.audio_name)
+        meta = item.get_metadata()
+        count = 0
+        start = 0
+        while start < samples_total:
+            available = min(length, samples_total - start)
+            if available < min_length:
+                break
+            padded = length if self.pad else available
+            offset = round(start / sample_rate, 6)
+            audio_name_new = name + "-" + str(offset) + FORMAT_EXTENSIONS[FORMAT_WAV]
+            # each chunk gets its own deep copy, as nested values could get modified further down the pipeline
+            meta_new = dict() if (meta is None) else safe_deepcopy(meta)
+            meta_new[self.metadata_key] = offset
+            if streamable:
+                item_new = type(item)(audio_name=audio_name_new, blocks=self._chunk_blocks(item, start, available, padded),
+                                      audio_format=FORMAT_WAV, sample_rate=sample_rate,
+                                      duration=padded / sample_rate,
+                                      metadata=meta_new, annotation=item.annotation)
+            else:
+                block = audio[start:start + available]
+                if padded > available:
+                    block = np.concatenate([block, np.zeros((padded - available,) + block.shape[1:], dtype=block.dtype)])
+                item_new = type(item)(audio_name=audio_name_new, audio=block,
+                                      audio_format=FORMAT_WAV, sample_rate=sample_rate,
+                                      duration=padded / sample_rate,
+                                      metadata=meta_new, annotation=item.annotation)
+            count += 1
+            yield item_new
+            # last chunk reached the end?
+            if start + length >= samples_total:
+                break
+            start += hop
+
+        self.logger().info("# of chunks generated: %d" % count)
+
+    def _generate(self, data):
+        """
+        Generates the chunks for all the records.
+
+        :param data: the record(s) to split
+        :return: the generator for the chunks
+        """
+        for item in make_list(data):
+            for chunk in self._chunks(item):
+                yield chunk
+
+    def _do_process_stream(self, data):
+        """
+        Filters the data.
+
+        :param data: the data to filter
+        """
+        # chunks only get generated when requested via has_output/output
+        self._pending = self._generate(data)
+
+    def has_output(self) -> bool:
+        """
+        Whether any output is available.
+
+        :return: True if output can be collected
+        :rtype: bool
+        """
+        if (len(self._stream_output) == 0) and (self._pending is not None):
+            try:
+                self._stream_output.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+        return len(self._stream_output) > 0
 
     def _do_process(self, data):
         """
@@ -108,41 +262,11 @@ class GenerateChunks(BatchFilter):
         :param data: the record(s) to process
         :return: the potentially updated record(s)
         """
-        result = []
-        for item in make_list(data):
-            if item.duration <= self.length:
-                result.append(item)
-            else:
-                subset = []
-                self.logger().info("Generating chunks of length %f: %s" % (self.length, item.audio_name))
-
-                # get number of samples for "length" seconds
-                buffer = int(self.length * item.sample_rate)
-
-                audio = item.audio
-                samples_total = len(audio)
-                samples_written = 0
-                counter = 1
-                time = 0
-                while samples_written < samples_total:
-                    # check if the buffer is not exceeding total samples
-                    if buffer > (samples_total - samples_written):
-                        buffer = samples_total - samples_written
-                    block = audio[samples_written: (samples_written + buffer)]
-                    audio_name_new = os.path.splitext(item.audio_name)[0] + "-" + str(time) + FORMAT_EXTENSIONS[FORMAT_WAV]
-                    meta_new = safe_deepcopy(item.get_metadata())
-                    if meta_new is None:
-                        meta_new = dict()
-                    meta_new[self.metadata_key] = time
-                    item_new = type(item)(audio_name=audio_name_new, audio=block,
-                                          audio_format=FORMAT_WAV, sample_rate=item.sample_rate,
-                                          metadata=meta_new, annotation=item.annotation)
-                    subset.append(item_new)
-                    counter += 1
-                    time += self.length
-                    samples_written += buffer
-
-                self.logger().info("# of chunks generated: %d" % len(subset))
-                result.extend(subset)
-
-        return flatten_list(result)
+        return flatten_list(list(self._generate(data)))
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        self._pending = None
@@ -1,11 +1,11 @@
 import argparse
 from random import Random
-from typing import List
+from typing import List, Optional
 
 import librosa
 from wai.logging import LOGGING_WARNING
 
-from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, audio_to_librosa, audio_from_librosa, PhaseVocoder, pitch_shift_from_stft
 from ._base_audio_augmentation import BaseAudioAugmentationFilter, AUG_MODE_REPLACE
 from ._resample import RESAMPLE_TYPES, RESAMPLE_TYPE_DEFAULT
 
@@ -16,7 +16,7 @@ class PitchShift(BaseAudioAugmentationFilter):
     """
 
     def __init__(self, mode: str = AUG_MODE_REPLACE, suffix: str = None,
-                 seed: int = None, seed_augmentation: bool = False, threshold: float = 0.0,
+                 seed: int = None, seed_augmentation: bool = False, threshold: float = 0.0, num_variants: int = None,
                  from_steps: float = None, to_steps: float = None,
                  bins_per_octave: int = None, resample_type: str = RESAMPLE_TYPE_DEFAULT,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
@@ -33,6 +33,8 @@ class PitchShift(BaseAudioAugmentationFilter):
         :type seed_augmentation: bool
         :param threshold: the threshold to use for Random.rand(): if equal or above, augmentation gets applied; range: 0-1; default: 0 (= always)
         :type threshold: float
+        :param num_variants: the number of augmented variants to generate per record
+        :type num_variants: int
         :param from_steps: the minimum (fractional) steps to shift
         :type from_steps: float
         :param to_steps: the maximum (fractional) steps to shift
@@ -47,7 +49,7 @@ class PitchShift(BaseAudioAugmentationFilter):
         :type logging_level: str
         """
         super().__init__(mode=mode, suffix=suffix, seed=seed,
-                         seed_augmentation=seed_augmentation, threshold=threshold,
+                         seed_augmentation=seed_augmentation, threshold=threshold, num_variants=num_variants,
                          logger_name=logger_name, logging_level=logging_level)
         self.from_steps = from_steps
         self.to_steps = to_steps
@@ -145,6 +147,34 @@ class PitchShift(BaseAudioAugmentationFilter):
         """
         return (self.from_steps is not None) and (self.to_steps is not None)
 
+    def _is_randomized(self) -> bool:
+        """
+        Checks whether the number of steps gets drawn randomly, ie whether multiple variants differ.
+
+        :return: whether randomized
+        :rtype: bool
+        """
+        return self.from_steps != self.to_steps
+
+    def _steps(self, aug_seed: int) -> Optional[float]:
+        """
+        Determines the steps to shift.
+
+        :param aug_seed: the seed value to use, can be None
+        :type aug_seed: int
+        :return: the steps, None if none can be determined
+        :rtype: float
+        """
+        steps = None
+        if (self.from_steps is not None) and (self.to_steps is not None):
+            if self.from_steps == self.to_steps:
+                steps = self.from_steps
+            else:
+                rnd = Random(aug_seed)
+                steps = rnd.random() * (self.to_steps - self.from_steps) + self.from_steps
+            self.logger().info("steps: %f" % steps)
+        return steps
+
     def _augment(self, item: AudioData, aug_seed: int, audio_name: str) -> AudioData:
         """
         Augments the audio data.
@@ -158,21 +188,38 @@ class PitchShift(BaseAudioAugmentationFilter):
         :return: the potentially updated audio data
         :rtype: AudioData
         """
+        return self._augment_variants(item, [aug_seed], [audio_name])[0]
 
-        # determine steps
-        steps = None
-        if (self.from_steps is not None) and (self.to_steps is not None):
-            if self.from_steps == self.to_steps:
-                steps = self.from_steps
-            else:
-                rnd = Random(aug_seed)
-                steps = rnd.random() * (self.to_steps - self.from_steps) + self.from_steps
-            self.logger().info("steps: %f" % steps)
+    def _augment_variants(self, item: AudioData, aug_seeds: List[int], audio_names: List[str]) -> List[AudioData]:
+        """
+        Generates multiple augmented variants of the audio data. The STFT of the audio only gets
+        computed once and all the variants get derived from it (time-stretch via the phase vocoder,
+        followed by resampling).
 
-        if steps is None:
-            return item
-        else:
+        :param item: the data to augment
+        :type item: AudioData
+        :param aug_seeds: the seed values to use (one per variant), can be None
+        :type aug_seeds: list
+        :param audio_names: the new audio names (one per variant)
+        :type audio_names: list
+        :return: the augmented variants
+        :rtype: list
+        """
+        result = []
+        audio = None
+        vocoder = None
+        for aug_seed, audio_name in zip(aug_seeds, audio_names):
+            steps = self._steps(aug_seed)
+            if steps is None:
+                result.append(item)
+                continue
+            if vocoder is None:
+                audio = audio_to_librosa(item.audio)
+                vocoder = PhaseVocoder(librosa.stft(audio))
             # apply shift
-            audio_new = librosa.effects.pitch_shift(item.audio, sr=item.sample_rate, n_steps=steps, bins_per_octave=self.bins_per_octave, res_type=self.resample_type)
+            audio_new = pitch_shift_from_stft(vocoder, audio.shape[-1], item.sample_rate, steps, bins_per_octave=self.bins_per_octave,
+                                              res_type=self.resample_type, dtype=audio.dtype)
+            audio_new = audio_from_librosa(audio_new)
             item_new = type(item)(audio=audio_new, audio_format=FORMAT_WAV, audio_name=audio_name, sample_rate=item.sample_rate, metadata=item.get_metadata(), annotation=item.annotation)
-            return item_new
+            result.append(item_new)
+        return result
@@ -1,12 +1,11 @@
 import argparse
-import librosa
 import os
 from typing import List
 
 from seppl.io import BatchFilter
 from wai.logging import LOGGING_WARNING
 from kasperl.api import make_list, flatten_list
-from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS, audio_to_librosa, audio_from_librosa, BatchResampler
 
 RESAMPLE_TYPE_DEFAULT = "kaiser_best"
 
@@ -34,6 +33,7 @@ class Resample(BatchFilter):
     """
 
     def __init__(self, sample_rate: int = None, resample_type: str = RESAMPLE_TYPE_DEFAULT,
+                 batch_size: int = None, num_workers: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the filter.
@@ -42,6 +42,10 @@ class Resample(BatchFilter):
         :type sample_rate: int
         :param resample_type: how to perform the resampling
         :type resample_type: str
+        :param batch_size: the maximum number of clips with the same sample rate to resample in one go
+        :type batch_size: int
+        :param num_workers: the number of threads for processing the batches
+        :type num_workers: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -50,6 +54,9 @@ class Resample(BatchFilter):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.sample_rate = sample_rate
         self.resample_type = resample_type
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self._resampler = None
 
     def name(self) -> str:
         """
@@ -67,7 +74,8 @@ class Resample(BatchFilter):
         :return: the description
         :rtype: str
         """
-        return "Resamples the audio data with the supplied sample rate."
+        return "Resamples the audio data with the supplied sample rate. " \
+               "When processing lists of records (e.g., in batch mode), the clips get grouped by sample rate and resampled in batches."
 
     def accepts(self) -> List:
         """
@@ -97,6 +105,8 @@ class Resample(BatchFilter):
         parser = super()._create_argparser()
         parser.add_argument("-s", "--sample_rate", type=int, help="The sample rate to use for the audio.", default=22050, required=False)
         parser.add_argument("-t", "--resample_type", choices=RESAMPLE_TYPES, help="The resampling type to apply.", default=RESAMPLE_TYPE_DEFAULT, required=False)
+        parser.add_argument("-b", "--batch_size", type=int, help="The maximum number of clips with the same sample rate to resample in one go (padded to the same length).", default=32, required=False)
+        parser.add_argument("-w", "--num_workers", type=int, help="The number of threads to use for processing the batches.", default=1, required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -109,6 +119,8 @@ class Resample(BatchFilter):
         super()._apply_args(ns)
         self.sample_rate = ns.sample_rate
         self.resample_type = ns.resample_type
+        self.batch_size = ns.batch_size
+        self.num_workers = ns.num_workers
 
     def initialize(self):
         """
@@ -119,6 +131,20 @@ class Resample(BatchFilter):
             self.sample_rate = 22050
         if self.resample_type is None:
             self.resample_type = RESAMPLE_TYPE_DEFAULT
+        if self.batch_size is None:
+            self.batch_size = 32
+        if self.num_workers is None:
+            self.num_workers = 1
+        self._resampler = BatchResampler(self.sample_rate, self.resample_type, batch_size=self.batch_size, num_workers=self.num_workers)
+
+    def _requires_list_input(self) -> bool:
+        """
+        Returns whether lists are expected as input for the _process method.
+
+        :return: True if list inputs are expected by the filter
+        :rtype: bool
+        """
+        return True
 
     def _do_process(self, data):
         """
@@ -127,19 +153,29 @@ class Resample(BatchFilter):
         :param data: the record(s) to process
         :return: the potentially updated record(s)
         """
-        result = []
-        for item in make_list(data):
-            if item.sample_rate == self.sample_rate:
-                result.append(item)
-            else:
-                self.logger().info("Resampling with %d/%s: %s" % (self.sample_rate, self.resample_type, item.audio_name))
-                audio_new = librosa.resample(item.audio, orig_sr=item.sample_rate, target_sr=self.sample_rate,
-                                             res_type=self.resample_type)
-                audio_name_new = os.path.splitext(item.audio_name)[0] + FORMAT_EXTENSIONS[FORMAT_WAV]
-                item_new = type(item)(audio_name=audio_name_new, audio=audio_new,
-                                      audio_format=FORMAT_WAV, duration=item.duration,
-                                      sample_rate=self.sample_rate, metadata=item.get_metadata(),
-                                      annotation=item.annotation)
-                result.append(item_new)
+        result = make_list(data)[:]
+        todo = [i for i, item in enumerate(result) if item.sample_rate != self.sample_rate]
+        if len(todo) == 0:
+            return flatten_list(result)
+
+        self.logger().info("Resampling %d record(s) with %d/%s" % (len(todo), self.sample_rate, self.resample_type))
+        resampled = self._resampler.resample([(audio_to_librosa(result[i].audio), result[i].sample_rate) for i in todo])
+        for i, audio_new in zip(todo, resampled):
+            item = result[i]
+            audio_new = audio_from_librosa(audio_new)
+            audio_name_new = os.path.splitext(item.audio_name)[0] + FORMAT_EXTENSIONS[FORMAT_WAV]
+            result[i] = type(item)(audio_name=audio_name_new, audio=audio_new,
+                                   audio_format=FORMAT_WAV, duration=item.duration,
+                                   sample_rate=self.sample_rate, metadata=item.get_metadata(),
+                                   annotation=item.annotation)
 
         return flatten_list(result)
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._resampler is not None:
+            self._resampler.close()
+            self._resampler = None
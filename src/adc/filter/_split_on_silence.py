@@ -0,0 +1,327 @@
+import argparse
+import os
+from typing import List
+
+import numpy as np
+from kasperl.api import make_list, flatten_list, safe_deepcopy
+from seppl.io import StreamFilter
+from wai.logging import LOGGING_WARNING
+
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS, DEFAULT_BLOCK_SIZE, to_float
+
+
+def frame_energy(samples: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """
+    Computes the energy (in dBFS) of the frames of the mono signal, using a strided view
+    of the squared samples rather than copying the frames. A signal shorter than the frame
+    length gets padded with zeros.
+
+    :param samples: the mono signal
+    :type samples: np.ndarray
+    :param frame_length: the number of samples per frame
+    :type frame_length: int
+    :param hop_length: the number of samples between frames
+    :type hop_length: int
+    :return: the energy per frame
+    :rtype: np.ndarray
+    """
+    power = np.square(samples, dtype=np.float64)
+    if len(power) < frame_length:
+        power = np.pad(power, (0, frame_length - len(power)))
+    frames = np.lib.stride_tricks.sliding_window_view(power, frame_length)[::hop_length]
+    return 10.0 * np.log10(np.maximum(frames.mean(axis=-1), 1e-20))
+
+
+class SplitOnSilence(StreamFilter):
+    """
+    Splits the audio into segments of speech/sound, using the silence between them.
+    """
+
+    def __init__(self, threshold: float = None, frame_length: int = None, hop_length: int = None,
+                 min_silence: float = None, min_speech: float = None, padding: float = None,
+                 metadata_key: str = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the filter.
+
+        :param threshold: the energy threshold in dBFS, frames below it are considered silence
+        :type threshold: float
+        :param frame_length: the number of samples per analysis frame
+        :type frame_length: int
+        :param hop_length: the number of samples between analysis frames
+        :type hop_length: int
+        :param min_silence: the minimum duration in seconds of silence between segments, shorter silences get merged
+        :type min_silence: float
+        :param min_speech: the minimum duration in seconds of a segment, shorter ones get discarded
+        :type min_speech: float
+        :param padding: the amount of silence in seconds to keep before and after each segment
+        :type padding: float
+        :param metadata_key: the key in the meta-data for storing the offset
+        :type metadata_key: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.threshold = threshold
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.min_silence = min_silence
+        self.min_speech = min_speech
+        self.padding = padding
+        self.metadata_key = metadata_key
+        self._pending = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "split-on-silence"
+
+    def description(self) -> str:
+        """
+        Returns a description of the handler.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Splits the audio into segments (e.g., utterances) using an energy-based voice activity detection: " \
+               "frames above the threshold are considered speech, segments separated by less than the minimum silence " \
+               "get merged and segments shorter than the minimum speech duration discarded. The audio gets analyzed " \
+               "in blocks and the segments reference the original audio rather than copying it."
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioData]
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioClassificationData, SpeechData]
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-t", "--threshold", type=float, help="The energy threshold in dBFS, frames below it are considered silence.", default=-40.0, required=False)
+        parser.add_argument("--frame_length", type=int, help="The number of samples per analysis frame.", default=2048, required=False)
+        parser.add_argument("--hop_length", type=int, help="The number of samples between analysis frames.", default=512, required=False)
+        parser.add_argument("-s", "--min_silence", type=float, help="The minimum duration in seconds of silence between segments, segments with shorter silences between them get merged.", default=0.3, required=False)
+        parser.add_argument("-S", "--min_speech", type=float, help="The minimum duration in seconds of a segment, shorter ones get discarded.", default=0.25, required=False)
+        parser.add_argument("-p", "--padding", type=float, help="The amount of silence in seconds to keep before and after each segment.", default=0.1, required=False)
+        parser.add_argument("-k", "--metadata_key", type=str, help="The key in the meta-data to store the offset under.", default="offset", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.threshold = ns.threshold
+        self.frame_length = ns.frame_length
+        self.hop_length = ns.hop_length
+        self.min_silence = ns.min_silence
+        self.min_speech = ns.min_speech
+        self.padding = ns.padding
+        self.metadata_key = ns.metadata_key
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.threshold is None:
+            self.threshold = -40.0
+        if self.frame_length is None:
+            self.frame_length = 2048
+        if self.hop_length is None:
+            self.hop_length = 512
+        if (self.hop_length < 1) or (self.hop_length > self.frame_length):
+            raise Exception("Hop length must be between 1 and the frame length (%d): %d" % (self.frame_length, self.hop_length))
+        if self.min_silence is None:
+            self.min_silence = 0.3
+        if self.min_speech is None:
+            self.min_speech = 0.25
+        if self.padding is None:
+            self.padding = 0.1
+        if self.metadata_key is None:
+            self.metadata_key = "offset"
+        self._pending = None
+
+    def _regions(self, item: AudioData):
+        """
+        Detects the regions with speech/sound, analyzing the audio block by block.
+        A region gets generated as soon as it is followed by enough silence.
+
+        :param item: the audio to analyze
+        :type item: AudioData
+        :return: the generator for the regions, tuples of first frame and last frame (excluded)
+        """
+        hop = self.hop_length
+        frames_per_block = max(1, DEFAULT_BLOCK_SIZE // hop)
+        # consecutive blocks overlap so that every frame is contained in exactly one block
+        overlap = self.frame_length - hop
+        block_size = frames_per_block * hop + overlap
+        min_silence = int(round(self.min_silence * item.sample_rate / hop))
+
+        current = None
+        frame_offset = 0
+        for block in item.iter_blocks(block_size, overlap=overlap, always_2d=True):
+            samples = to_float(block)
+            samples = samples[:, 0] if (samples.shape[1] == 1) else samples.mean(axis=1)
+            voiced = frame_energy(samples, self.frame_length, hop) > self.threshold
+            # the first frames of the next block start within the overlap
+            voiced = voiced[:frames_per_block]
+            # start/end frames of the voiced runs
+            changes = np.diff(voiced.astype(np.int8), prepend=0, append=0)
+            starts = np.flatnonzero(changes == 1) + frame_offset
+            ends = np.flatnonzero(changes == -1) + frame_offset
+            for start, end in zip(starts, ends):
+                if (current is not None) and (start - current[1] < min_silence):
+                    current = (current[0], end)
+                else:
+                    if current is not None:
+                        yield current
+                    current = (start, end)
+            frame_offset += len(voiced)
+        if current is not None:
+            yield current
+
+    def _segment_blocks(self, item: AudioData, offset: int, length: int):
+        """
+        Returns the function for streaming a segment of the audio.
+
+        :param item: the audio data to stream
+        :type item: AudioData
+        :param offset: the first frame of the segment
+        :type offset: int
+        :param length: the number of frames in the segment
+        :type length: int
+        :return: the function generating the blocks
+        """
+        def _blocks(block_size, overlap, start, stop):
+            if (stop is None) or (stop > length):
+                stop = length
+            return item.iter_blocks(block_size, overlap=overlap, always_2d=True, start=offset + start, stop=offset + stop)
+
+        return _blocks
+
+    def _segments(self, item: AudioData):
+        """
+        Generates the segments for the audio, one at a time.
+
+        :param item: the audio data to split
+        :type item: AudioData
+        :return: the generator for the segments
+        """
+        self.logger().info("Splitting on silence: %s" % item.audio_name)
+        sample_rate = item.sample_rate
+        samples_total = item.frames
+        min_speech = int(round(self.min_speech * sample_rate))
+        padding = int(round(self.padding * sample_rate))
+        streamable = item.is_streamable
+        name, _ = os.path.splitext(item.audio_name)
+        meta = item.get_metadata()
+
+        count = 0
+        for first, last in self._regions(item):
+            # samples covered by the centers of the frames
+            start = int(first) * self.hop_length + (self.frame_length - self.hop_length) // 2
+            end = (int(last) - 1) * self.hop_length + (self.frame_length + self.hop_length) // 2
+            if samples_total is not None:
+                end = min(end, samples_total)
+            if end - start < min_speech:
+                continue
+            start = max(0, start - padding)
+            end = end + padding
+            if samples_total is not None:
+                end = min(end, samples_total)
+            offset = round(start / sample_rate, 6)
+            audio_name_new = name + "-" + str(offset) + FORMAT_EXTENSIONS[FORMAT_WAV]
+            meta_new = dict() if (meta is None) else safe_deepcopy(meta)
+            meta_new[self.metadata_key] = offset
+            if streamable:
+                item_new = type(item)(audio_name=audio_name_new, blocks=self._segment_blocks(item, start, end - start),
+                                      audio_format=FORMAT_WAV, sample_rate=sample_rate,
+                                      duration=(end - start) / sample_rate,
+                                      metadata=meta_new, annotation=item.annotation)
+            else:
+                # slicing creates a view, no copy
+                block = item.audio[start:end]
+                item_new = type(item)(audio_name=audio_name_new, audio=block,
+                                      audio_format=FORMAT_WAV, sample_rate=sample_rate,
+                                      duration=len(block) / sample_rate,
+                                      metadata=meta_new, annotation=item.annotation)
+            count += 1
+            yield item_new
+
+        self.logger().info("# of segments generated: %d" % count)
+
+    def _generate(self, data):
+        """
+        Generates the segments for all the records.
+
+        :param data: the record(s) to split
+        :return: the generator for the segments
+        """
+        for item in make_list(data):
+            for segment in self._segments(item):
+                yield segment
+
+    def _do_process_stream(self, data):
+        """
+        Filters the data.
+
+        :param data: the data to filter
+        """
+        # segments only get generated when requested via has_output/output
+        self._pending = self._generate(data)
+
+    def has_output(self) -> bool:
+        """
+        Whether any output is available.
+
+        :return: True if output can be collected
+        :rtype: bool
+        """
+        if (len(self._stream_output) == 0) and (self._pending is not None):
+            try:
+                self._stream_output.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+        return len(self._stream_output) > 0
+
+    def _do_process(self, data):
+        """
+        Processes the data record(s).
+
+        :param data: the record(s) to process
+        :return: the potentially updated record(s)
+        """
+        return flatten_list(list(self._generate(data)))
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        self._pending = None
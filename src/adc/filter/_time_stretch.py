@@ -1,11 +1,11 @@
 import argparse
 from random import Random
-from typing import List
+from typing import List, Optional
 
 import librosa
 from wai.logging import LOGGING_WARNING
 
-from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, audio_to_librosa, audio_from_librosa, PhaseVocoder, time_stretch_from_stft
 from ._base_audio_augmentation import BaseAudioAugmentationFilter, AUG_MODE_REPLACE
 
 
@@ -15,7 +15,7 @@ class TimeStretch(BaseAudioAugmentationFilter):
     """
 
     def __init__(self, mode: str = AUG_MODE_REPLACE, suffix: str = None,
-                 seed: int = None, seed_augmentation: bool = False, threshold: float = 0.0,
+                 seed: int = None, seed_augmentation: bool = False, threshold: float = 0.0, num_variants: int = None,
                  from_rate: float = None, to_rate: float = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -31,6 +31,8 @@ class TimeStretch(BaseAudioAugmentationFilter):
         :type seed_augmentation: bool
         :param threshold: the threshold to use for Random.rand(): if equal or above, augmentation gets applied; range: 0-1; default: 0 (= always)
         :type threshold: float
+        :param num_variants: the number of augmented variants to generate per record
+        :type num_variants: int
         :param from_rate: the minimum (fractional) steps to shift
         :type from_rate: float
         :param to_rate: the maximum (fractional) steps to shift
@@ -41,7 +43,7 @@ class TimeStretch(BaseAudioAugmentationFilter):
         :type logging_level: str
         """
         super().__init__(mode=mode, suffix=suffix, seed=seed,
-                         seed_augmentation=seed_augmentation, threshold=threshold,
+                         seed_augmentation=seed_augmentation, threshold=threshold, num_variants=num_variants,
                          logger_name=logger_name, logging_level=logging_level)
         self.from_rate = from_rate
         self.to_rate = to_rate
@@ -123,6 +125,34 @@ class TimeStretch(BaseAudioAugmentationFilter):
         """
         return (self.from_rate is not None) and (self.to_rate is not None)
 
+    def _is_randomized(self) -> bool:
+        """
+        Checks whether the stretch factor gets drawn randomly, ie whether multiple variants differ.
+
+        :return: whether randomized
+        :rtype: bool
+        """
+        return self.from_rate != self.to_rate
+
+    def _rate(self, aug_seed: int) -> Optional[float]:
+        """
+        Determines the stretch factor to use.
+
+        :param aug_seed: the seed value to use, can be None
+        :type aug_seed: int
+        :return: the factor, None if none can be determined
+        :rtype: float
+        """
+        rate = None
+        if (self.from_rate is not None) and (self.to_rate is not None):
+            if self.from_rate == self.to_rate:
+                rate = self.from_rate
+            else:
+                rnd = Random(aug_seed)
+                rate = rnd.random() * (self.to_rate - self.from_rate) + self.from_rate
+            self.logger().info("rate: %f" % rate)
+        return rate
+
     def _augment(self, item: AudioData, aug_seed: int, audio_name: str) -> AudioData:
         """
         Augments the audio data.
@@ -136,21 +166,35 @@ class TimeStretch(BaseAudioAugmentationFilter):
         :return: the potentially updated audio data
         :rtype: AudioData
         """
+        return self._augment_variants(item, [aug_seed], [audio_name])[0]
 
-        # determine steps
-        rate = None
-        if (self.from_rate is not None) and (self.to_rate is not None):
-            if self.from_rate == self.to_rate:
-                rate = self.from_rate
-            else:
-                rnd = Random(aug_seed)
-                rate = rnd.random() * (self.to_rate - self.from_rate) + self.from_rate
-            self.logger().info("rate: %f" % rate)
+    def _augment_variants(self, item: AudioData, aug_seeds: List[int], audio_names: List[str]) -> List[AudioData]:
+        """
+        Generates multiple augmented variants of the audio data. The STFT of the audio only gets
+        computed once and all the variants get derived from it via the phase vocoder.
 
-        if rate is None:
-            return item
-        else:
-            # apply shift
-            audio_new = librosa.effects.time_stretch(item.audio, rate=rate)
+        :param item: the data to augment
+        :type item: AudioData
+        :param aug_seeds: the seed values to use (one per variant), can be None
+        :type aug_seeds: list
+        :param audio_names: the new audio names (one per variant)
+        :type audio_names: list
+        :return: the augmented variants
+        :rtype: list
+        """
+        result = []
+        audio = None
+        vocoder = None
+        for aug_seed, audio_name in zip(aug_seeds, audio_names):
+            rate = self._rate(aug_seed)
+            if rate is None:
+                result.append(item)
+                continue
+            if vocoder is None:
+                audio = audio_to_librosa(item.audio)
+                vocoder = PhaseVocoder(librosa.stft(audio))
+            # apply stretch
+            audio_new = audio_from_librosa(time_stretch_from_stft(vocoder, audio.shape[-1], rate, dtype=audio.dtype))
             item_new = type(item)(audio=audio_new, audio_format=FORMAT_WAV, audio_name=audio_name, sample_rate=item.sample_rate, metadata=item.get_metadata(), annotation=item.annotation)
-            return item_new
+            result.append(item_new)
+        return result
@@ -6,7 +6,7 @@ from typing import List
 from seppl.io import BatchFilter
 from wai.logging import LOGGING_WARNING
 from kasperl.api import make_list, flatten_list
-from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS
+from adc.api import AudioData, AudioClassificationData, SpeechData, FORMAT_WAV, FORMAT_EXTENSIONS, audio_to_librosa, audio_from_librosa
 
 
 class TrimSilence(BatchFilter):
@@ -118,8 +118,13 @@ class TrimSilence(BatchFilter):
         result = []
         for item in make_list(data):
             self.logger().info("before trim: %s" % str(item.audio.shape))
-            audio_new, index = librosa.effects.trim(item.audio, top_db=self.top_db, frame_length=self.frame_length,
+            audio_new, index = librosa.effects.trim(audio_to_librosa(item.audio), top_db=self.top_db, frame_length=self.frame_length,
                                                     hop_length=self.hop_length)
+            if (index[0] == 0) and (index[1] == len(item.audio)):
+                self.logger().info("nothing to trim")
+                result.append(item)
+                continue
+            audio_new = audio_from_librosa(audio_new)
             audio_name_new = os.path.splitext(item.audio_name)[0] + FORMAT_EXTENSIONS[FORMAT_WAV]
             self.logger().info("after trim: %s" % str(audio_new.shape))
             item_new = type(item)(audio_name=audio_name_new, audio=audio_new,
@@ -2,6 +2,10 @@ from kasperl.reader import POLL_ACTIONS, POLL_ACTION_NOTHING, POLL_ACTION_MOVE,
 from kasperl.reader import EVENTS, EVENT_MODIFIED, EVENT_CREATED, WATCH_ACTIONS, WATCH_ACTION_NOTHING, WATCH_ACTION_MOVE, WATCH_ACTION_DELETE, POLLING_TYPES, POLLING_TYPE_NEVER, POLLING_TYPE_INITIAL, POLLING_TYPE_ALWAYS
 from ._data import DataReader
 from ._multi import MultiReader
+from ._notify_dir import NotifyDir, Inotify
 from ._poll_dir import PollDir
+from ._prefetch import PrefetchReader, PREFETCH_MODES, PREFETCH_MODE_PROBE, PREFETCH_MODE_DECODE
 from ._pyfunc import PythonFunctionReader
+from ._records import RecordsReader
 from ._watch_dir import WatchDir
+from ._webdataset import WebDatasetReader
@@ -6,10 +6,10 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader
-from adc.api import DATATYPES, data_type_to_class, AudioData
+from adc.api import DATATYPES, data_type_to_class, AudioData, ShardSupporter
 
 
-class DataReader(Reader, VariableSupporter):
+class DataReader(Reader, VariableSupporter, ShardSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
                  data_type: str = None, resume_from: str = None,
@@ -67,6 +67,7 @@ class DataReader(Reader, VariableSupporter):
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the audio files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.wav'", required=False)
         parser.add_argument("-t", "--data_type", choices=DATATYPES, type=str, default=None, help="The type of data to forward", required=True)
+        self._add_shard_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -81,6 +82,7 @@ class DataReader(Reader, VariableSupporter):
         self.source_list = ns.input_list
         self.data_type = ns.data_type
         self.resume_from = ns.resume_from
+        self._apply_shard_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -103,6 +105,7 @@ class DataReader(Reader, VariableSupporter):
             raise Exception("No data type defined!")
         self._inputs = None
         self._output_cls = data_type_to_class(self.data_type)
+        self._initialize_sharding()
 
     def read(self) -> Iterable:
         """
@@ -112,7 +115,9 @@ class DataReader(Reader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, resume_from=self.resume_from)
+            self._inputs = self._shard_files(locate_files(self.source, input_lists=self.source_list, fail_if_empty=True), resume_from=self.resume_from)
+            if len(self._inputs) == 0:
+                return
         self._current_input = self._inputs.pop(0)
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
@@ -1,4 +1,7 @@
 import argparse
+import copy
+import queue
+import threading
 from typing import List, Iterable
 
 from seppl import Plugin
@@ -9,15 +12,34 @@ from adc.api import DATATYPES, data_type_to_class, AudioData
 
 READ_ORDER_SEQUENTIAL = "sequential"
 READ_ORDER_INTERLEAVED = "interleaved"
+READ_ORDER_CONCURRENT = "concurrent"
 READ_ORDERS = [
     READ_ORDER_SEQUENTIAL,
     READ_ORDER_INTERLEAVED,
+    READ_ORDER_CONCURRENT,
 ]
 
+FAIRNESS_ROUNDROBIN = "round-robin"
+FAIRNESS_FIRST_AVAILABLE = "first-available"
+FAIRNESS = [
+    FAIRNESS_ROUNDROBIN,
+    FAIRNESS_FIRST_AVAILABLE,
+]
+
+DEFAULT_QUEUE_DEPTH = 16
+
+DEFAULT_JOIN_TIMEOUT = 5.0
+""" the number of seconds to wait for each worker thread to finish when stopping. """
+
+_ENTRY_DATA = "data"
+_ENTRY_ERROR = "error"
+_ENTRY_DONE = "done"
+
 
 class MultiReader(Reader):
 
     def __init__(self, readers: List[str] = None, read_order: str = None, data_type: str = None,
+                 fairness: str = None, queue_depth: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -27,6 +49,10 @@ class MultiReader(Reader):
         :type read_order: str
         :param data_type: the type of output to generate from the images
         :type data_type: str
+        :param fairness: how to pick the next record in concurrent mode (round-robin or first-available)
+        :type fairness: str
+        :param queue_depth: the maximum number of records to buffer per reader in concurrent mode
+        :type queue_depth: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -36,8 +62,13 @@ class MultiReader(Reader):
         self.readers = readers
         self.read_order = read_order
         self.data_type = data_type
+        self.fairness = fairness
+        self.queue_depth = queue_depth
         self._readers = None
         self._finalize = None
+        self._threads = None
+        self._queues = None
+        self._stop = None
 
     def name(self) -> str:
         """
@@ -55,7 +86,8 @@ class MultiReader(Reader):
         :return: the description
         :rtype: str
         """
-        return "Reads data using the specified base readers and combines their output."
+        return "Reads data using the specified base readers and combines their output. " \
+               "In concurrent mode, each reader runs in its own thread, feeding a bounded queue."
 
     def _create_argparser(self) -> argparse.ArgumentParser:
         """
@@ -68,6 +100,8 @@ class MultiReader(Reader):
         parser.add_argument("-r", "--reader", type=str, default=None, help="The command-line defining the base reader.", required=True, nargs="+")
         parser.add_argument("-o", "--read_order", choices=READ_ORDERS, type=str, default=READ_ORDER_SEQUENTIAL, help="How to use the output from the readers.", required=False)
         parser.add_argument("-t", "--data_type", choices=DATATYPES, type=str, default=None, help="The type of data to forward", required=True)
+        parser.add_argument("-f", "--fairness", choices=FAIRNESS, type=str, default=FAIRNESS_FIRST_AVAILABLE, help="How to pick the next record in concurrent mode: cycle through the readers or take whatever record is available first.", required=False)
+        parser.add_argument("-q", "--queue_depth", type=int, default=DEFAULT_QUEUE_DEPTH, help="The maximum number of records to buffer per reader in concurrent mode.", required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -81,6 +115,8 @@ class MultiReader(Reader):
         self.readers = ns.reader
         self.read_order = ns.read_order
         self.data_type = ns.data_type
+        self.fairness = ns.fairness
+        self.queue_depth = ns.queue_depth
 
     def generates(self) -> List:
         """
@@ -124,6 +160,14 @@ class MultiReader(Reader):
             self.read_order = READ_ORDER_SEQUENTIAL
         if self.read_order not in READ_ORDERS:
             raise Exception("Unknown read order: %s" % self.read_order)
+        if self.fairness is None:
+            self.fairness = FAIRNESS_FIRST_AVAILABLE
+        if self.fairness not in FAIRNESS:
+            raise Exception("Unknown fairness: %s" % self.fairness)
+        if self.queue_depth is None:
+            self.queue_depth = DEFAULT_QUEUE_DEPTH
+        if self.queue_depth < 1:
+            raise Exception("Queue depth must be at least 1, provided: %d" % self.queue_depth)
         self._readers = []
         for reader in self.readers:
             objs = self._parse_commandline(reader)
@@ -140,6 +184,132 @@ class MultiReader(Reader):
             reader.session = self.session
         self.logger().info("# readers: %d" % len(self._readers))
         self._finalize = []
+        self._threads = []
+        self._queues = []
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, entry: tuple) -> bool:
+        """
+        Adds the entry to the queue, blocking while it is full (unless stopped).
+
+        :param q: the queue to add to
+        :type q: queue.Queue
+        :param entry: the entry to add
+        :type entry: tuple
+        :return: False if stopped before the entry could be added
+        :rtype: bool
+        """
+        while not self._stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _work(self, index: int, reader: Reader, q: queue.Queue, ready: queue.Queue):
+        """
+        Drains the reader and feeds its records into the queue (executed in a worker thread).
+
+        :param index: the index of the reader
+        :type index: int
+        :param reader: the reader to drain
+        :type reader: Reader
+        :param q: the queue of the reader
+        :type q: queue.Queue
+        :param ready: the queue for announcing new entries (first-available), None if not used
+        :type ready: queue.Queue
+        """
+        entry = (_ENTRY_DONE, None, None)
+        try:
+            while not reader.has_finished() and not self._stop.is_set():
+                for data in reader.read():
+                    if not self._put(q, (_ENTRY_DATA, data, reader.session.current_input)):
+                        return
+                    if ready is not None:
+                        ready.put(index)
+        except Exception as e:
+            entry = (_ENTRY_ERROR, e, None)
+        if self._put(q, entry) and (ready is not None):
+            ready.put(index)
+
+    def _read_concurrently(self) -> Iterable:
+        """
+        Runs each reader in its own thread and returns the records from their queues,
+        either cycling through the readers or in the order they become available.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        readers = self._readers[:]
+        queues = [queue.Queue(maxsize=self.queue_depth) for _ in readers]
+        ready = queue.Queue() if (self.fairness == FAIRNESS_FIRST_AVAILABLE) else None
+        self._queues = queues + ([] if (ready is None) else [ready])
+        self._stop.clear()
+        for i, reader in enumerate(readers):
+            # separate session copy, as each thread sets its own current input
+            reader.session = copy.copy(self.session)
+            thread = threading.Thread(target=self._work, args=(i, reader, queues[i], ready), name="multi-%d" % i, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+        active = list(range(len(readers)))
+        try:
+            while len(active) > 0:
+                if ready is None:
+                    indices = active[:]
+                else:
+                    indices = [ready.get()]
+                for i in indices:
+                    if ready is None:
+                        kind, payload, current_input = queues[i].get()
+                    else:
+                        kind, payload, current_input = queues[i].get_nowait()
+                    if kind == _ENTRY_DATA:
+                        self.session.current_input = current_input
+                        yield payload
+                    else:
+                        active.remove(i)
+                        self._readers.remove(readers[i])
+                        self._finalize.append(readers[i])
+                        if kind == _ENTRY_ERROR:
+                            raise payload
+                    if self.session.stopped:
+                        return
+        finally:
+            self._stop_threads()
+
+    def _drain_queues(self):
+        """
+        Discards any buffered entries, releasing the records and unblocking workers waiting for space.
+        """
+        for q in self._queues:
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _stop_threads(self):
+        """
+        Signals the worker threads to stop and waits for them to finish (up to DEFAULT_JOIN_TIMEOUT
+        seconds each). Threads blocked inside a base reader get abandoned, as they are daemon threads.
+        """
+        if (self._threads is None) or (len(self._threads) == 0):
+            return
+        self._stop.set()
+        for reader in self._readers:
+            reader.session.stopped = True
+        self._drain_queues()
+        for thread in self._threads:
+            thread.join(timeout=DEFAULT_JOIN_TIMEOUT)
+            if thread.is_alive():
+                self.logger().warning("Thread did not finish within %.1f seconds, abandoning it: %s" % (DEFAULT_JOIN_TIMEOUT, thread.name))
+        self._drain_queues()
+        self._threads = []
+        self._queues = []
+        self._finalize.extend(self._readers)
+        self._readers = []
 
     def read(self) -> Iterable:
         """
@@ -164,6 +334,8 @@ class MultiReader(Reader):
                     if reader.has_finished():
                         self._readers.remove(reader)
                         self._finalize.append(reader)
+        elif self.read_order == READ_ORDER_CONCURRENT:
+            yield from self._read_concurrently()
         else:
             raise Exception("Unhandled read order: %s" % self.read_order)
 
@@ -181,6 +353,7 @@ class MultiReader(Reader):
         Finishes the processing, e.g., for closing files or databases.
         """
         super().finalize()
+        self._stop_threads()
         if self._finalize is not None:
             for reader in self._finalize:
                 reader.finalize()
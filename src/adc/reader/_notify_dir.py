@@ -0,0 +1,449 @@
+import argparse
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import struct
+import sys
+from time import sleep, time
+from typing import List, Iterable, Dict, Optional, Tuple
+
+from wai.logging import LOGGING_WARNING
+
+from kasperl.api import MetaFileReader, check_dir
+from kasperl.reader import WATCH_ACTIONS, WATCH_ACTION_NOTHING, WATCH_ACTION_MOVE, WATCH_ACTION_DELETE
+from seppl import Plugin
+from seppl.io import InfiniteReader
+from seppl.variables import VariableSupporter, variable_list
+
+GLOB_NAME_PLACEHOLDER = "{NAME}"
+""" The glob placeholder for identifying other input files. """
+
+# see /usr/include/linux/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+""" wd, mask, cookie, length of name. """
+
+
+class Inotify(object):
+    """
+    Minimal wrapper around Linux' inotify API (via ctypes) for watching a single directory
+    for files that were closed after writing or moved into it.
+    """
+
+    def __init__(self, dir_path: str):
+        """
+        Initializes the watch. Raises an OSError if inotify is not available.
+
+        :param dir_path: the directory to watch
+        :type dir_path: str
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_init1 failed: %s" % os.strerror(err))
+        if libc.inotify_add_watch(self._fd, os.fsencode(dir_path), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            self._fd = None
+            raise OSError(err, "inotify_add_watch failed for %s: %s" % (dir_path, os.strerror(err)))
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """
+        Waits for events and returns the names of the files that were written or moved in.
+
+        :param timeout: the maximum number of seconds to wait for events
+        :type timeout: float
+        :return: the file names (relative to the directory), None if the event queue overflowed
+        :rtype: list
+        """
+        result = []
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if len(ready) == 0:
+            return result
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return result
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if (mask & IN_ISDIR) or (len(name) == 0):
+                continue
+            result.append(os.fsdecode(name))
+        return result
+
+    def close(self):
+        """
+        Closes the inotify file descriptor.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class NotifyDir(MetaFileReader, InfiniteReader, VariableSupporter):
+
+    def __init__(self, dir_in: str = None, dir_out: str = None, action: str = None, extensions: List[str] = None,
+                 other_input_files: List[str] = None, max_files: int = None, batch_wait: float = None,
+                 process_wait: float = None, poll_wait: float = None, force_polling: bool = False,
+                 initial: bool = False, base_reader: str = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param dir_in: the directory to watch for new files
+        :type dir_in: str
+        :param dir_out: the directory to move the files to once processed
+        :type dir_out: str
+        :param action: the action to apply to the input files
+        :type action: str
+        :param extensions: the list of extensions to watch the directory for
+        :type extensions: list
+        :param other_input_files: other files that need to be present, glob expression (use placeholder GLOB_NAME_PLACEHOLDER)
+        :type other_input_files: list
+        :param max_files: the maximum number of files per batch (<1 for no limit)
+        :type max_files: int
+        :param batch_wait: the seconds to wait for further events after the first one before processing the batch
+        :type batch_wait: float
+        :param process_wait: the seconds to wait before processing a batch
+        :type process_wait: float
+        :param poll_wait: the seconds between listings when falling back to polling
+        :type poll_wait: float
+        :param force_polling: whether to use polling even if inotify is available
+        :type force_polling: bool
+        :param initial: whether to process the files already present at the start
+        :type initial: bool
+        :param base_reader: the base reader to use (command-line)
+        :type base_reader: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(base_reader=base_reader, logger_name=logger_name, logging_level=logging_level)
+        self.dir_in = dir_in
+        self.dir_out = dir_out
+        self.action = action
+        self.extensions = extensions
+        self.other_input_files = other_input_files
+        self.max_files = max_files
+        self.batch_wait = batch_wait
+        self.process_wait = process_wait
+        self.poll_wait = poll_wait
+        self.force_polling = force_polling
+        self.initial = initial
+        self._actual_dir_in = None
+        self._actual_dir_out = None
+        self._extensions = None
+        self._inotify = None
+        self._pending = None
+        self._polled = None
+        self._seen = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "notify-dir"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Watches a directory for files that were written (closed after writing) or moved into it, " \
+            + "using Linux' inotify, and presents them in batches to the base reader as soon as they arrive. " \
+            + "Falls back to polling the directory if inotify is not available (files get processed once their size " \
+            + "and modification time no longer change)."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--dir_in", type=str, help="The directory to watch; " + variable_list(obj=self), required=True)
+        parser.add_argument("-o", "--dir_out", type=str, help="The directory to move the files to; " + variable_list(obj=self), required=False)
+        parser.add_argument("-a", "--action", choices=WATCH_ACTIONS, help="The action to apply to the input files; 'move' moves the files to --dir_out directory", required=False, default=WATCH_ACTION_MOVE)
+        parser.add_argument("-e", "--extensions", type=str, help="The extensions of the files to watch (incl. dot, case-insensitive)", required=True, nargs="+")
+        parser.add_argument("-O", "--other_input_files", type=str, help="The glob expression(s) for capturing other files apart from the input files; use " + GLOB_NAME_PLACEHOLDER + " in the glob expression for the current name (without extension)", required=False, default=None, nargs="*")
+        parser.add_argument("-m", "--max_files", type=int, help="The maximum number of files in a single batch; <1 for unlimited", required=False, default=-1)
+        parser.add_argument("-B", "--batch_wait", type=float, help="The number of seconds to wait for further files after the first one before processing the batch; 0 for processing them immediately.", required=False, default=0.0)
+        parser.add_argument("-W", "--process_wait", type=float, help="The number of seconds to wait before processing a batch.", required=False, default=0.0)
+        parser.add_argument("-w", "--poll_wait", type=float, help="The number of seconds between listing the directory when falling back to polling.", required=False, default=1.0)
+        parser.add_argument("--force_polling", action="store_true", help="Whether to use polling even if inotify is available.")
+        parser.add_argument("--initial", action="store_true", help="Whether to process the files already present in the directory at the start.")
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.dir_in = ns.dir_in
+        self.dir_out = ns.dir_out
+        self.action = ns.action
+        self.extensions = ns.extensions
+        self.other_input_files = ns.other_input_files
+        self.max_files = ns.max_files
+        self.batch_wait = ns.batch_wait
+        self.process_wait = ns.process_wait
+        self.poll_wait = ns.poll_wait
+        self.force_polling = ns.force_polling
+        self.initial = ns.initial
+
+    def _available_readers(self) -> Dict[str, Plugin]:
+        """
+        Return the available readers.
+
+        :return: the reader plugins
+        :rtype: dict
+        """
+        from adc.registry import available_readers
+        return available_readers()
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+
+        if self.action is None:
+            self.action = WATCH_ACTION_MOVE
+        if (self.extensions is None) or (len(self.extensions) == 0):
+            raise Exception("No extensions defined for watching!")
+        if self.max_files is None:
+            self.max_files = -1
+        if self.batch_wait is None:
+            self.batch_wait = 0.0
+        if self.process_wait is None:
+            self.process_wait = 0.0
+        if self.poll_wait is None:
+            self.poll_wait = 1.0
+        self._extensions = set([x.lower() for x in self.extensions])
+
+        # check dirs
+        self._actual_dir_in = self.session.expand_variables(self.dir_in)
+        check_dir(self._actual_dir_in, "Input")
+        if self.action == WATCH_ACTION_MOVE:
+            self._actual_dir_out = self.session.expand_variables(self.dir_out)
+            check_dir(self._actual_dir_out, "Output")
+
+        self._inotify = None
+        if not self.force_polling:
+            try:
+                self._inotify = Inotify(self._actual_dir_in)
+                self.logger().info("Using inotify for: %s" % self._actual_dir_in)
+            except Exception:
+                self.logger().warning("inotify not available, falling back to polling: %s" % self._actual_dir_in, exc_info=True)
+        self._pending = []
+        self._polled = dict()
+        self._seen = dict()
+        if self._inotify is None:
+            # files present at the start are not considered new when polling
+            self._seen = self._stat_files()
+        if self.initial:
+            self._pending.extend(self._list_files())
+
+    def _accepts(self, file_name: str) -> bool:
+        """
+        Checks whether the file has one of the monitored extensions.
+
+        :param file_name: the file name to check
+        :type file_name: str
+        :return: True if to be processed
+        :rtype: bool
+        """
+        return os.path.splitext(file_name)[1].lower() in self._extensions
+
+    def _list_files(self) -> List[str]:
+        """
+        Lists the files with matching extensions in the input directory.
+
+        :return: the sorted files
+        :rtype: list
+        """
+        result = []
+        with os.scandir(self._actual_dir_in) as it:
+            for entry in it:
+                if entry.is_file() and self._accepts(entry.name):
+                    result.append(entry.path)
+        result.sort()
+        return result
+
+    def _stat_files(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Lists the files with matching extensions in the input directory together with their size and modification time.
+
+        :return: the mapping of file to size/modification time (ns)
+        :rtype: dict
+        """
+        result = dict()
+        with os.scandir(self._actual_dir_in) as it:
+            for entry in it:
+                if not entry.is_file() or not self._accepts(entry.name):
+                    continue
+                stat = entry.stat()
+                result[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return result
+
+    def _poll(self) -> List[str]:
+        """
+        Lists the directory and returns the new or changed files, once their size and modification
+        time are stable between two polls. Files that were already present at the start or have been
+        returned before only get returned again once their size or modification time changes.
+
+        :return: the files that are ready
+        :rtype: list
+        """
+        result = []
+        current = self._stat_files()
+        polled = dict()
+        for path, stat in current.items():
+            if self._seen.get(path) == stat:
+                continue
+            if self._polled.get(path) == stat:
+                result.append(path)
+                self._seen[path] = stat
+            else:
+                polled[path] = stat
+        # forget about files that are gone
+        self._seen = {k: v for k, v in self._seen.items() if k in current}
+        self._polled = polled
+        result.sort()
+        return result
+
+    def _wait_for_files(self, timeout: float) -> List[str]:
+        """
+        Waits for new files, using inotify or polling.
+
+        :param timeout: the maximum number of seconds to wait
+        :type timeout: float
+        :return: the new files
+        :rtype: list
+        """
+        if self._inotify is None:
+            sleep(timeout)
+            return self._poll()
+        names = self._inotify.read(timeout)
+        if names is None:
+            self.logger().warning("inotify event queue overflowed, listing directory: %s" % self._actual_dir_in)
+            return self._list_files()
+        return [os.path.join(self._actual_dir_in, x) for x in names if self._accepts(x)]
+
+    def _next_batch(self) -> List[str]:
+        """
+        Assembles the next batch of files, returns as soon as files are available
+        (or after waiting for --batch_wait seconds for more files).
+
+        :return: the files, empty if none available yet
+        :rtype: list
+        """
+        if len(self._pending) == 0:
+            timeout = self.poll_wait if (self._inotify is None) else 0.1
+            self._pending.extend(self._wait_for_files(timeout))
+            if (len(self._pending) > 0) and (self.batch_wait > 0):
+                end = time() + self.batch_wait
+                while (time() < end) and ((self.max_files < 1) or (len(self._pending) < self.max_files)):
+                    self._pending.extend(self._wait_for_files(max(0.0, end - time())))
+
+        # remove duplicates (eg moved in and then re-written), preserving the order
+        files = list(dict.fromkeys(self._pending))
+        if (self.max_files > 0) and (len(files) > self.max_files):
+            self._pending = files[self.max_files:]
+            files = files[:self.max_files]
+        else:
+            self._pending = []
+        return [x for x in files if os.path.exists(x)]
+
+    def _apply_action(self, path: str, kind: str = "input"):
+        """
+        Applies the action to the file.
+
+        :param path: the file to delete/move
+        :type path: str
+        :param kind: the type of file, for logging
+        :type kind: str
+        """
+        if self.action == WATCH_ACTION_DELETE:
+            self.logger().debug("Deleting %s: %s" % (kind, path))
+            os.remove(path)
+        elif self.action == WATCH_ACTION_MOVE:
+            self.logger().debug("Moving %s: %s -> %s" % (kind, path, self._actual_dir_out))
+            os.rename(path, os.path.join(self._actual_dir_out, os.path.basename(path)))
+        elif self.action == WATCH_ACTION_NOTHING:
+            pass
+        else:
+            raise Exception("Unhandled action: %s" % self.action)
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        while not self.session.stopped:
+            files = self._next_batch()
+            if len(files) == 0:
+                continue
+
+            if self.process_wait > 0:
+                self.logger().info("Waiting for %s seconds before processing" % str(self.process_wait))
+                sleep(self.process_wait)
+            self.logger().info("Processing %d file(s)" % len(files))
+            for item in self._read_files(files):
+                yield item
+
+            # delete or move files (once processed, as the audio gets loaded lazily)
+            for file_path in files:
+                self._apply_action(file_path)
+                if self.other_input_files is not None:
+                    name = os.path.splitext(os.path.basename(file_path))[0]
+                    for other_input_file in self.other_input_files:
+                        for other_path in glob.glob(os.path.join(self._actual_dir_in, other_input_file.replace(GLOB_NAME_PLACEHOLDER, name))):
+                            self._apply_action(other_path, kind="other input")
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return False
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,219 @@
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Iterable
+
+from seppl import Plugin
+from wai.logging import LOGGING_WARNING
+
+from kasperl.api import Reader
+from adc.api import AudioData
+
+PREFETCH_MODE_PROBE = "probe"
+PREFETCH_MODE_DECODE = "decode"
+PREFETCH_MODES = [
+    PREFETCH_MODE_PROBE,
+    PREFETCH_MODE_DECODE,
+]
+
+
+class PrefetchReader(Reader):
+
+    def __init__(self, reader: str = None, num_ahead: int = None, num_workers: int = None, mode: str = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param reader: the command-line of the base reader
+        :type reader: str
+        :param num_ahead: the maximum number of records to prefetch
+        :type num_ahead: int
+        :param num_workers: the number of threads to use for prefetching
+        :type num_workers: int
+        :param mode: what to prefetch, ie header information or the decoded audio
+        :type mode: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.reader = reader
+        self.num_ahead = num_ahead
+        self.num_workers = num_workers
+        self.mode = mode
+        self._reader = None
+        self._executor = None
+        self._pending = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-prefetch"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Wraps the specified base reader and decodes the audio (or probes the headers) of the next records in background threads while the current ones get processed. The order of the records is preserved."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-r", "--reader", type=str, default=None, help="The command-line defining the base reader.", required=True)
+        parser.add_argument("-n", "--num_ahead", type=int, default=16, help="The maximum number of records to prefetch.", required=False)
+        parser.add_argument("-w", "--num_workers", type=int, default=4, help="The number of threads to use for prefetching.", required=False)
+        parser.add_argument("-m", "--mode", choices=PREFETCH_MODES, type=str, default=PREFETCH_MODE_DECODE, help="Whether to decode the audio or only probe the headers (sample rate, channels, duration).", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.reader = ns.reader
+        self.num_ahead = ns.num_ahead
+        self.num_workers = ns.num_workers
+        self.mode = ns.mode
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        if self._reader is None:
+            if self.reader is None:
+                return [AudioData]
+            self._reader = self._parse_commandline(self.reader)
+        return self._reader.generates()
+
+    def _parse_commandline(self, cmdline: str) -> Plugin:
+        """
+        Parses the command-line and returns the reader it represents.
+        Raises an exception in case of an invalid command-line.
+
+        :param cmdline: the command-line to parse
+        :type cmdline: str
+        :return: the reader
+        """
+        from adc.registry import available_readers
+        from seppl import args_to_objects, split_args, split_cmdline
+
+        valid = available_readers()
+        args = split_args(split_cmdline(cmdline), list(valid.keys()))
+        objs = args_to_objects(args, valid, allow_global_options=False)
+        if len(objs) != 1:
+            raise Exception("Failed to obtain a single reader from command-line: %s" % cmdline)
+        return objs[0]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.reader is None:
+            raise Exception("No base reader defined!")
+        if self.num_ahead is None:
+            self.num_ahead = 16
+        if self.num_ahead < 1:
+            raise Exception("Number of records to prefetch must be at least 1, provided: %d" % self.num_ahead)
+        if self.num_workers is None:
+            self.num_workers = 4
+        if self.num_workers < 1:
+            raise Exception("Number of workers must be at least 1, provided: %d" % self.num_workers)
+        if self.mode is None:
+            self.mode = PREFETCH_MODE_DECODE
+        if self.mode not in PREFETCH_MODES:
+            raise Exception("Unknown prefetch mode: %s" % self.mode)
+        if self._reader is None:
+            self._reader = self._parse_commandline(self.reader)
+        self._reader.session = self.session
+        self._reader.initialize()
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="prefetch")
+        self._pending = deque()
+
+    def _prefetch(self, item):
+        """
+        Loads the audio or header information of the item (executed in a worker thread).
+
+        :param item: the item to prefetch
+        """
+        if not isinstance(item, AudioData):
+            return
+        if self.mode == PREFETCH_MODE_DECODE:
+            _ = item.audio
+        else:
+            _ = item.audio_info
+
+    def _next(self):
+        """
+        Waits for the oldest pending item to be prefetched and returns it,
+        restoring the input that it was read from in the session.
+
+        :return: the item
+        """
+        item, current_input, future = self._pending.popleft()
+        try:
+            future.result()
+        except Exception:
+            # the filter/writer accessing the audio will report the problem
+            self.logger().debug("Failed to prefetch: %s" % str(current_input), exc_info=True)
+        self.session.current_input = current_input
+        return item
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        while not self._reader.has_finished():
+            for item in self._reader.read():
+                self._pending.append((item, self.session.current_input, self._executor.submit(self._prefetch, item)))
+                # backpressure: only hand out (and read further) once enough records are in flight
+                if len(self._pending) >= self.num_ahead:
+                    yield self._next()
+                if self.session.stopped:
+                    break
+            if self.session.stopped:
+                break
+        while len(self._pending) > 0:
+            yield self._next()
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return self._reader.has_finished() and (len(self._pending) == 0)
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._reader is not None:
+            self._reader.finalize()
@@ -6,10 +6,10 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader, load_function
-from adc.api import DATATYPES, data_type_to_class, AudioData
+from adc.api import DATATYPES, data_type_to_class, AudioData, ShardSupporter
 
 
-class PythonFunctionReader(Reader, VariableSupporter):
+class PythonFunctionReader(Reader, VariableSupporter, ShardSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
                  function: str = None, data_type: str = None, resume_from: str = None,
@@ -72,6 +72,7 @@ class PythonFunctionReader(Reader, VariableSupporter):
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.wav'", required=False)
         parser.add_argument("-f", "--function", type=str, default=None, help="The Python function to use, format: module_name:function_name", required=True)
         parser.add_argument("-t", "--data_type", choices=DATATYPES, type=str, default=None, help="The type of data to forward", required=True)
+        self._add_shard_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -87,6 +88,7 @@ class PythonFunctionReader(Reader, VariableSupporter):
         self.function = ns.function
         self.data_type = ns.data_type
         self.resume_from = ns.resume_from
+        self._apply_shard_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -110,6 +112,7 @@ class PythonFunctionReader(Reader, VariableSupporter):
         self._inputs = None
         self._output_cls = data_type_to_class(self.data_type)
         self._function = load_function(self.function)
+        self._initialize_sharding()
 
     def read(self) -> Iterable:
         """
@@ -119,7 +122,9 @@ class PythonFunctionReader(Reader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, resume_from=self.resume_from)
+            self._inputs = self._shard_files(locate_files(self.source, input_lists=self.source_list, fail_if_empty=True), resume_from=self.resume_from)
+            if len(self._inputs) == 0:
+                return
         self._current_input = self._inputs.pop(0)
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
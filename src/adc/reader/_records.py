@@ -0,0 +1,134 @@
+import argparse
+import sys
+from typing import List, Iterable, Union
+
+from seppl.io import locate_files
+from seppl.variables import VariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from kasperl.api import Reader
+from adc.api import AudioClassificationData, SpeechData, iter_records, ShardSupporter
+
+
+class RecordsReader(Reader, VariableSupporter, ShardSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 resume_from: str = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the filename(s), - for stdin
+        :param source_list: the file(s) with filename(s)
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.resume_from = resume_from
+        self._inputs = None
+        self._current_input = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-records"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Loads audio data from binary records as written by to-records, e.g., from spool files or piped in from another adc-convert process."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the record file(s) to read; glob syntax is supported; use - for stdin; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the record files to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.records'", required=False)
+        self._add_shard_arguments(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.resume_from = ns.resume_from
+        self._apply_shard_arguments(ns)
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioClassificationData, SpeechData]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        self._inputs = None
+        self._initialize_sharding()
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            if self.source in ["-", ["-"]]:
+                self._inputs = ["-"]
+            else:
+                self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, resume_from=self.resume_from)
+        self._current_input = self._inputs.pop(0)
+        self.session.current_input = self._current_input
+        if self._current_input == "-":
+            self.logger().info("Reading from: stdin")
+            for index, item in enumerate(iter_records(sys.stdin.buffer)):
+                if not self._in_shard(item.audio_name, index):
+                    continue
+                yield item
+        else:
+            self.logger().info("Reading from: " + str(self.session.current_input))
+            with open(self._current_input, "rb") as fp:
+                # the position within the file is used for round-robin sharding
+                for index, item in enumerate(iter_records(fp)):
+                    if not self._in_shard(item.audio_name, index):
+                        continue
+                    yield item
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and len(self._inputs) == 0
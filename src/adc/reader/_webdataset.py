@@ -0,0 +1,204 @@
+import argparse
+import json
+import tarfile
+from typing import List, Iterable, Union, Dict, Optional
+
+from seppl.io import locate_files
+from seppl.variables import VariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from kasperl.api import Reader
+from adc.api import DATATYPES, data_type_to_class, AudioData, ShardSupporter, FORMAT_EXTENSIONS, determine_audio_format_from_ext
+from adc.api import split_webdataset_name, WEBDATASET_EXT_TRANSCRIPT, WEBDATASET_EXT_LABEL, WEBDATASET_EXT_METADATA, WEBDATASET_KEY_TRANSCRIPT, WEBDATASET_KEY_LABEL, WEBDATASET_KEY_AUDIO_NAME
+
+
+class WebDatasetReader(Reader, VariableSupporter, ShardSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 data_type: str = None, resume_from: str = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the tar file(s)
+        :param source_list: the file(s) with tar file(s)
+        :param data_type: the type of output to generate from the samples
+        :type data_type: str
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.data_type = data_type
+        self.resume_from = resume_from
+        self._inputs = None
+        self._current_input = None
+        self._output_cls = None
+        self._audio_exts = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-webdataset"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Streams samples from tar shards in WebDataset layout (members grouped by key, ie the name up to the first dot), " \
+               "without extracting them to disk. The audio gets kept in memory, the transcript/label is read from the " \
+               + WEBDATASET_EXT_TRANSCRIPT + "/" + WEBDATASET_EXT_LABEL + " member or from the '" + WEBDATASET_KEY_TRANSCRIPT + "'/'" + WEBDATASET_KEY_LABEL + "' " \
+               "key of the " + WEBDATASET_EXT_METADATA + " member, which provides the meta-data."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the tar file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the tar files to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-t", "--data_type", choices=DATATYPES, type=str, default=None, help="The type of data to generate", required=True)
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/shard-000012.tar'", required=False)
+        self._add_shard_arguments(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.data_type = ns.data_type
+        self.resume_from = ns.resume_from
+        self._apply_shard_arguments(ns)
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        if self.data_type is None:
+            return [AudioData]
+        else:
+            return [data_type_to_class(self.data_type)]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.data_type is None:
+            raise Exception("No data type defined!")
+        self._inputs = None
+        self._output_cls = data_type_to_class(self.data_type)
+        self._audio_exts = set(FORMAT_EXTENSIONS.values())
+        self._initialize_sharding()
+
+    def _to_item(self, key: str, members: Dict[str, bytes]) -> Optional[AudioData]:
+        """
+        Turns the members of a sample into a container.
+
+        :param key: the key of the sample
+        :type key: str
+        :param members: the extension -> content mapping
+        :type members: dict
+        :return: the container, None if no audio
+        :rtype: AudioData
+        """
+        audio_ext = None
+        for ext in members:
+            # the last part of the extension determines the format, eg ".flac" from ".seg1.flac"
+            if ("." + ext.split(".")[-1]) in self._audio_exts:
+                audio_ext = ext
+                break
+        if audio_ext is None:
+            self.logger().warning("No audio in sample, skipping: %s" % key)
+            return None
+
+        metadata = None
+        annotation = None
+        audio_name = key.split("/")[-1] + audio_ext
+        if WEBDATASET_EXT_METADATA in members:
+            metadata = json.loads(members[WEBDATASET_EXT_METADATA].decode("utf-8"))
+            for ann_key in [WEBDATASET_KEY_TRANSCRIPT, WEBDATASET_KEY_LABEL]:
+                if ann_key in metadata:
+                    annotation = str(metadata.pop(ann_key))
+            # original name, eg if it contained dots
+            if WEBDATASET_KEY_AUDIO_NAME in metadata:
+                audio_name = str(metadata.pop(WEBDATASET_KEY_AUDIO_NAME))
+        for ann_ext in [WEBDATASET_EXT_TRANSCRIPT, WEBDATASET_EXT_LABEL]:
+            if ann_ext in members:
+                annotation = members[ann_ext].decode("utf-8").strip()
+
+        return self._output_cls(audio_name=audio_name, data=members[audio_ext],
+                                audio_format=determine_audio_format_from_ext(audio_name),
+                                metadata=metadata if ((metadata is not None) and (len(metadata) > 0)) else None,
+                                annotation=annotation)
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            self._inputs = self._shard_files(locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.tar"), resume_from=self.resume_from)
+            if len(self._inputs) == 0:
+                return
+        self._current_input = self._inputs.pop(0)
+        self.session.current_input = self._current_input
+        self.logger().info("Reading from: " + str(self.session.current_input))
+
+        # stream mode: members are read sequentially, no seeking or random access
+        key = None
+        members = dict()
+        with tarfile.open(self._current_input, mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                member_key, ext = split_webdataset_name(member.name)
+                # a repeated extension means a new sample, even if the key is the same
+                if (key is not None) and (member_key == key) and (ext in members):
+                    self.logger().warning("Duplicate member '%s' in %s, starting new sample" % (member.name, self._current_input))
+                if (key is not None) and ((member_key != key) or (ext in members)):
+                    item = self._to_item(key, members)
+                    if item is not None:
+                        yield item
+                    members = dict()
+                key = member_key
+                members[ext] = tar.extractfile(member).read()
+            if key is not None:
+                item = self._to_item(key, members)
+                if item is not None:
+                    yield item
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and len(self._inputs) == 0
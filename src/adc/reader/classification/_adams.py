@@ -6,14 +6,14 @@ from wai.common.file.report import loadf
 from seppl.io import locate_files
 from seppl.variables import VariableSupporter, variable_list
 from kasperl.api import Reader
-from adc.api import AudioClassificationData, locate_audio
+from adc.api import AudioClassificationData, locate_audio, ShardSupporter, DEFAULT_AUDIO_EXTENSIONS
 
 
-class AdamsAudioClassificationReader(Reader, VariableSupporter):
+class AdamsAudioClassificationReader(Reader, VariableSupporter, ShardSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
                  class_field: str = None, resume_from: str = None,
-                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+                 audio_extensions: List[str] = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
 
@@ -23,6 +23,8 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         :type class_field: str
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param audio_extensions: the extensions of the audio files to look for, in order of preference
+        :type audio_extensions: list
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -33,6 +35,7 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         self.source_list = source_list
         self.class_field = class_field
         self.resume_from = resume_from
+        self.audio_extensions = audio_extensions
         self._inputs = None
         self._current_input = None
 
@@ -66,6 +69,8 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the report files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.report'", required=False)
         parser.add_argument("-c", "--class_field", metavar="FIELD", type=str, default=None, help="The report field containing the audio classification label", required=True)
+        parser.add_argument("--audio_extensions", type=str, help="The extensions of the audio files to look for (case-insensitive), in order of preference.", required=False, default=DEFAULT_AUDIO_EXTENSIONS, nargs="+")
+        self._add_shard_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -80,6 +85,8 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         self.source_list = ns.input_list
         self.class_field = ns.class_field
         self.resume_from = ns.resume_from
+        self.audio_extensions = ns.audio_extensions
+        self._apply_shard_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -98,6 +105,9 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         if self.class_field is None:
             raise Exception("No class field defined!")
         self._inputs = None
+        if self.audio_extensions is None:
+            self.audio_extensions = DEFAULT_AUDIO_EXTENSIONS
+        self._initialize_sharding()
 
     def read(self) -> Iterable:
         """
@@ -107,7 +117,9 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.report", resume_from=self.resume_from)
+            self._inputs = self._shard_files(locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.report"), resume_from=self.resume_from)
+            if len(self._inputs) == 0:
+                return
         self._current_input = self._inputs.pop(0)
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
@@ -119,7 +131,7 @@ class AdamsAudioClassificationReader(Reader, VariableSupporter):
         if len(meta) == 0:
             meta = None
 
-        audio = locate_audio(self._current_input)
+        audio = locate_audio(self._current_input, extensions=self.audio_extensions)
         if audio is None:
             self.logger().warning("No associated audio file found: %s" % self._current_input)
             yield None
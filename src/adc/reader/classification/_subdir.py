@@ -1,22 +1,31 @@
 import argparse
+import json
 import os
-from typing import List, Iterable, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Iterable, Union, Tuple, Dict
 
 from wai.logging import LOGGING_WARNING
 from kasperl.api import Reader
-from adc.api import AudioClassificationData
+from adc.api import AudioClassificationData, ShardSupporter, FORMAT_EXTENSIONS
 from seppl.variables import VariableSupporter, variable_list
 
 
-class SubDirAudioClassificationReader(Reader, VariableSupporter):
+class SubDirAudioClassificationReader(Reader, VariableSupporter, ShardSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 max_depth: int = None, num_workers: int = None, cache_file: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
 
         :param source: the top-level directories to use
         :param source_list: the file(s) with top-level dir(s)
+        :param max_depth: how many levels of nested directories below the class directories to include (0: none, -1: unlimited)
+        :type max_depth: int
+        :param num_workers: the number of threads to use for scanning the class directories
+        :type num_workers: int
+        :param cache_file: the JSON file to cache the file lists in (keyed by directory modification times)
+        :type cache_file: str
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -25,7 +34,11 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.source = source
         self.source_list = source_list
+        self.max_depth = max_depth
+        self.num_workers = num_workers
+        self.cache_file = cache_file
         self._sub_dirs = None
+        self._files = None
 
     def name(self) -> str:
         """
@@ -55,6 +68,10 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
         parser = super()._create_argparser()
         parser.add_argument("-i", "--input", type=str, help="Path to the directory with the sub-directories containing the audio files; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the directories to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-d", "--max_depth", type=int, help="How many levels of nested directories below the class directories to include (0: none, -1: unlimited); the label is always the name of the class directory.", required=False, default=0)
+        parser.add_argument("-w", "--num_workers", type=int, help="The number of threads to use for scanning the class directories.", required=False, default=4)
+        parser.add_argument("-c", "--cache_file", type=str, help="The JSON file for caching the file lists; a class directory only gets scanned again if the modification time of one of its directories changed.", required=False, default=None)
+        self._add_shard_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -67,6 +84,10 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
         super()._apply_args(ns)
         self.source = ns.input
         self.source_list = ns.input_list
+        self.max_depth = ns.max_depth
+        self.num_workers = ns.num_workers
+        self.cache_file = ns.cache_file
+        self._apply_shard_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -83,6 +104,14 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
         """
         super().initialize()
         self._sub_dirs = None
+        self._files = None
+        if self.max_depth is None:
+            self.max_depth = 0
+        if self.num_workers is None:
+            self.num_workers = 4
+        if self.num_workers < 1:
+            raise Exception("Number of workers must be at least 1, provided: %d" % self.num_workers)
+        self._initialize_sharding()
 
     def _locate_sub_dirs(self):
         """
@@ -102,7 +131,7 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
                 files = [self.source_list]
             for file in files:
                 with open(file, "r") as fp:
-                    lines = fp.readline()
+                    lines = fp.readlines()
                     lines = [x.strip() for x in lines]
                     for line in lines:
                         if len(line) == 0:
@@ -118,17 +147,103 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
             if not os.path.exists(input_dir):
                 self.logger().warning("Directory does not exist: %s" % input_dir)
                 continue
-            for f in os.listdir(input_dir):
-                path = os.path.join(input_dir, f)
-                if os.path.isdir(path):
-                    if input_dir not in self._sub_dirs:
-                        self._sub_dirs[input_dir] = []
-                    self._sub_dirs[input_dir].append(path)
+            with os.scandir(input_dir) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if input_dir not in self._sub_dirs:
+                            self._sub_dirs[input_dir] = []
+                        self._sub_dirs[input_dir].append(entry.path)
             if input_dir not in self._sub_dirs:
                 self.logger().warning("No sub-directories found in: %s" % input_dir)
             else:
+                self._sub_dirs[input_dir].sort()
                 self.logger().info("Found %d sub-directories in: %s" % (len(self._sub_dirs[input_dir]), input_dir))
 
+        # list the audio files
+        self._files = self._list_files([x for input_dir in self._sub_dirs for x in self._sub_dirs[input_dir]])
+
+    def _scan(self, sub_dir: str) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Collects the audio files in the class directory, descending into nested directories up to the maximum depth.
+
+        :param sub_dir: the class directory to scan
+        :type sub_dir: str
+        :return: the tuple of sorted audio files and the modification times of the scanned directories
+        :rtype: tuple
+        """
+        extensions = set(FORMAT_EXTENSIONS.values())
+        files = []
+        mtimes = dict()
+        todo = [(sub_dir, 0)]
+        while len(todo) > 0:
+            dir_path, depth = todo.pop()
+            mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if (self.max_depth < 0) or (depth < self.max_depth):
+                            todo.append((entry.path, depth + 1))
+                    elif os.path.splitext(entry.name)[1].lower() in extensions:
+                        files.append(entry.path)
+        files.sort()
+        return files, mtimes
+
+    def _is_current(self, cached: dict) -> bool:
+        """
+        Checks whether the cached file list is still valid, ie none of the directories changed.
+
+        :param cached: the cache entry to check
+        :type cached: dict
+        :return: True if still valid
+        :rtype: bool
+        """
+        if cached.get("max_depth") != self.max_depth:
+            return False
+        for dir_path, mtime in cached["mtimes"].items():
+            try:
+                if os.stat(dir_path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _list_files(self, sub_dirs: List[str]) -> Dict[str, List[str]]:
+        """
+        Lists the audio files of the class directories, using the cache file (if available)
+        and scanning the outdated/new directories in parallel.
+
+        :param sub_dirs: the class directories
+        :type sub_dirs: list
+        :return: the sorted audio files per class directory
+        :rtype: dict
+        """
+        cache = dict()
+        if (self.cache_file is not None) and os.path.exists(self.cache_file):
+            with open(self.cache_file, "r") as fp:
+                cache = json.load(fp)
+
+        result = dict()
+        todo = []
+        for sub_dir in sub_dirs:
+            if (sub_dir in cache) and self._is_current(cache[sub_dir]):
+                result[sub_dir] = cache[sub_dir]["files"]
+            else:
+                todo.append(sub_dir)
+        self.logger().info("Class directories to scan: %d of %d" % (len(todo), len(sub_dirs)))
+
+        if len(todo) > 0:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                for sub_dir, (files, mtimes) in zip(todo, executor.map(self._scan, todo)):
+                    result[sub_dir] = files
+                    cache[sub_dir] = {"max_depth": self.max_depth, "mtimes": mtimes, "files": files}
+            if self.cache_file is not None:
+                self.logger().info("Writing file list cache: %s" % self.cache_file)
+                with open(self.cache_file + ".tmp", "w") as fp:
+                    json.dump(cache, fp)
+                os.replace(self.cache_file + ".tmp", self.cache_file)
+
+        return result
+
     def read(self) -> Iterable:
         """
         Loads the data and returns the items one by one.
@@ -139,17 +254,16 @@ class SubDirAudioClassificationReader(Reader, VariableSupporter):
         if self._sub_dirs is None:
             self._locate_sub_dirs()
         input_dirs = sorted(list(self._sub_dirs.keys()))
+        # position in the overall file list, used for round-robin sharding
+        index = 0
         for input_dir in input_dirs:
             for sub_dir in self._sub_dirs[input_dir]:
-                files = []
-                for f in os.listdir(sub_dir):
-                    path = os.path.join(sub_dir, f)
-                    f = f.lower()
-                    if f.endswith(".wav") or f.endswith(".ogg") or f.endswith(".mp3"):
-                        self.logger().info("Reading audio file from: %s" % path)
-                        files.append(path)
-                files = sorted(files)
+                files = self._files[sub_dir]
+                self.logger().info("Reading %d audio file(s) from: %s" % (len(files), sub_dir))
                 for file in files:
+                    index += 1
+                    if not self._in_shard(file, index - 1):
+                        continue
                     yield AudioClassificationData(source=file, annotation=os.path.basename(sub_dir))
             del self._sub_dirs[input_dir]
 
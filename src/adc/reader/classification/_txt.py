@@ -7,14 +7,14 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader
-from adc.api import AudioClassificationData, locate_audio
+from adc.api import AudioClassificationData, locate_audio, ShardSupporter, DEFAULT_AUDIO_EXTENSIONS
 
 
-class TxtAudioClassificationReader(Reader, VariableSupporter):
+class TxtAudioClassificationReader(Reader, VariableSupporter, ShardSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
                  rel_path: str = None, speaker_suffix: str = None, speaker_key: str = None, resume_from: str = None,
-                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+                 audio_extensions: List[str] = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
 
@@ -30,6 +30,8 @@ class TxtAudioClassificationReader(Reader, VariableSupporter):
         self.speaker_key = speaker_key
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param audio_extensions: the extensions of the audio files to look for, in order of preference
+        :type audio_extensions: list
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -42,6 +44,7 @@ class TxtAudioClassificationReader(Reader, VariableSupporter):
         self.speaker_suffix = speaker_suffix
         self.speaker_key = speaker_key
         self.resume_from = resume_from
+        self.audio_extensions = audio_extensions
         self._inputs = None
         self._current_input = None
 
@@ -77,6 +80,8 @@ class TxtAudioClassificationReader(Reader, VariableSupporter):
         parser.add_argument("--rel_path", type=str, help="The relative path to the audio files.", required=False, default=".")
         parser.add_argument("--speaker_suffix", type=str, help="The file suffix for the companion files that contains the speaker, e.g., '.speaker'.", required=False, default=None)
         parser.add_argument("--speaker_key", type=str, help="The key in the meta-data with the speaker name/ID.", required=False, default="speaker")
+        parser.add_argument("--audio_extensions", type=str, help="The extensions of the audio files to look for (case-insensitive), in order of preference.", required=False, default=DEFAULT_AUDIO_EXTENSIONS, nargs="+")
+        self._add_shard_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -93,6 +98,8 @@ class TxtAudioClassificationReader(Reader, VariableSupporter):
         self.speaker_suffix = ns.speaker_suffix
         self.speaker_key = ns.speaker_key
         self.resume_from = ns.resume_from
+        self.audio_extensions = ns.audio_extensions
+        self._apply_shard_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -113,6 +120,9 @@ class TxtAudioClassificationReader(Reader, VariableSupporter):
             self.rel_path = "."
         if self.speaker_key is None:
             self.speaker_key = "speaker"
+        if self.audio_extensions is None:
+            self.audio_extensions = DEFAULT_AUDIO_EXTENSIONS
+        self._initialize_sharding()
 
     def read(self) -> Iterable:
         """
@@ -122,14 +132,16 @@ class TxtAudioClassificationReader(Reader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.txt", resume_from=self.resume_from)
+            self._inputs = self._shard_files(locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.txt"), resume_from=self.resume_from)
+            if len(self._inputs) == 0:
+                return
         self._current_input = self._inputs.pop(0)
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
         with open(self.session.current_input, "r") as fp:
             transcript = "".join(fp.readlines()).strip()
 
-        audio = locate_audio(self._current_input, rel_path=self.rel_path)
+        audio = locate_audio(self._current_input, rel_path=self.rel_path, extensions=self.audio_extensions)
         if audio is None:
             self.logger().warning("No associated audio file found: %s" % self._current_input)
             yield None
@@ -8,7 +8,7 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader
-from adc.api import SpeechData
+from adc.api import SpeechData, ShardSupporter, CheckpointSupporter, get_directory_index
 
 COMONVOICE_EXPECTED_HEADER = "client_id	path	sentence	up_votes	down_votes	age	gender	accents	locale	segment"
 COMONVOICE_EXPECTED_HEADER_OLD = "client_id	path	sentence	up_votes	down_votes	age	gender	accent	locale	segment"
@@ -27,10 +27,10 @@ class CommonVoiceDialect(csv.Dialect):
     quoting = csv.QUOTE_NONE
 
 
-class CommonVoiceSpeechReader(Reader, VariableSupporter):
+class CommonVoiceSpeechReader(Reader, VariableSupporter, ShardSupporter, CheckpointSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 rel_path: str = None, resume_from: str = None,
+                 rel_path: str = None, resume_from: str = None, no_check: bool = False,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -41,6 +41,8 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
         :type rel_path: str
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param no_check: whether to skip checking whether the audio files exist
+        :type no_check: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -51,6 +53,7 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
         self.source_list = source_list
         self.rel_path = rel_path
         self.resume_from = resume_from
+        self.no_check = no_check
         self._inputs = None
         self._current_input = None
 
@@ -84,6 +87,9 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the TSV files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.tsv'", required=False)
         parser.add_argument("-r", "--rel_path", type=str, help="The relative path to the audio files.", required=False, default=".")
+        parser.add_argument("--no_check", action="store_true", help="Does not check whether the audio files exist, for trusted datasets.")
+        self._add_shard_arguments(parser)
+        self._add_checkpoint_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -98,6 +104,9 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
         self.source_list = ns.input_list
         self.rel_path = ns.rel_path
         self.resume_from = ns.resume_from
+        self.no_check = ns.no_check
+        self._apply_shard_arguments(ns)
+        self._apply_checkpoint_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -116,6 +125,8 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
         self._inputs = None
         if self.rel_path is None:
             self.rel_path = "."
+        self._initialize_sharding()
+        self._initialize_checkpoint()
 
     def read(self) -> Iterable:
         """
@@ -132,39 +143,42 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
 
         basedir = os.path.dirname(self.session.current_input)
 
-        with open(self.session.current_input, 'r', newline='') as fp:
-            # Consume the header
-            header = fp.readline()
-
-            # is the header as expected?
-            if header == COMONVOICE_EXPECTED_HEADER + '\n':
-                reader = csv.DictReader(fp,
-                                        COMONVOICE_EXPECTED_HEADER.split('\t'),
-                                        dialect=CommonVoiceDialect)
-            elif header == COMONVOICE_EXPECTED_HEADER_OLD + '\n':
-                reader = csv.DictReader(fp,
-                                        COMONVOICE_EXPECTED_HEADER_OLD.split('\t'),
-                                        dialect=CommonVoiceDialect)
-            else:
-                raise ValueError(f"Expected header: {COMONVOICE_EXPECTED_HEADER} or {COMONVOICE_EXPECTED_HEADER_OLD}\n"
-                                 f"Seen header: {header}")
-
-            # Yield rows from the file
-            for row in reader:
-                audio = os.path.join(basedir, self.rel_path, row["path"])
-                if not os.path.exists(audio):
-                    self.logger().warning("Audio file not found: %s" % audio)
-                    yield None
-
-                meta = {
-                    "client_id": row["client_id"],
-                    "up_votes": row["up_votes"],
-                    "down_votes": row["down_votes"],
-                    "age": row["age"],
-                    "gender": row["gender"],
-                    "locale": row["locale"],
-                }
-                yield SpeechData(source=audio, annotation=row['sentence'], metadata=meta)
+        # stream the rows rather than loading the whole file (resumes from checkpoint, if available)
+        lines = self._iter_manifest(self.session.current_input, has_header=True)
+        # Consume the header
+        header = next(lines, "")
+
+        # is the header as expected?
+        if header == COMONVOICE_EXPECTED_HEADER + '\n':
+            reader = csv.DictReader(lines,
+                                    COMONVOICE_EXPECTED_HEADER.split('\t'),
+                                    dialect=CommonVoiceDialect)
+        elif header == COMONVOICE_EXPECTED_HEADER_OLD + '\n':
+            reader = csv.DictReader(lines,
+                                    COMONVOICE_EXPECTED_HEADER_OLD.split('\t'),
+                                    dialect=CommonVoiceDialect)
+        else:
+            raise ValueError(f"Expected header: {COMONVOICE_EXPECTED_HEADER} or {COMONVOICE_EXPECTED_HEADER_OLD}\n"
+                             f"Seen header: {header}")
+
+        # Yield rows from the file
+        for row in reader:
+            if not self._in_shard(row["path"], self._manifest_row):
+                continue
+            audio = os.path.join(basedir, self.rel_path, row["path"])
+            if (not self.no_check) and (not get_directory_index().exists(audio)):
+                self.logger().warning("Audio file not found: %s" % audio)
+                continue
+
+            meta = {
+                "client_id": row["client_id"],
+                "up_votes": row["up_votes"],
+                "down_votes": row["down_votes"],
+                "age": row["age"],
+                "gender": row["gender"],
+                "locale": row["locale"],
+            }
+            yield SpeechData(source=audio, annotation=row['sentence'], metadata=meta)
 
     def has_finished(self) -> bool:
         """
@@ -174,3 +188,10 @@ class CommonVoiceSpeechReader(Reader, VariableSupporter):
         :rtype: bool
         """
         return (self._inputs is not None) and len(self._inputs) == 0
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        self._finalize_checkpoint()
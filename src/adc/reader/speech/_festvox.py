@@ -8,7 +8,7 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader
-from adc.api import SpeechData
+from adc.api import SpeechData, ShardSupporter, CheckpointSupporter, get_directory_index
 
 # The regular expression which matches a single line from a festvox file
 LINE_REGEX = '^\\( (?P<filename>.*) "(?P<transcription>.*)" \\)$'
@@ -17,10 +17,10 @@ LINE_REGEX = '^\\( (?P<filename>.*) "(?P<transcription>.*)" \\)$'
 LINE_PATTERN = re.compile(LINE_REGEX)
 
 
-class FestVoxSpeechReader(Reader, VariableSupporter):
+class FestVoxSpeechReader(Reader, VariableSupporter, ShardSupporter, CheckpointSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 rel_path: str = None, resume_from: str = None,
+                 rel_path: str = None, resume_from: str = None, no_check: bool = False,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -31,6 +31,8 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         :type rel_path: str
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param no_check: whether to skip checking whether the audio files exist
+        :type no_check: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -41,6 +43,7 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         self.source_list = source_list
         self.rel_path = rel_path
         self.resume_from = resume_from
+        self.no_check = no_check
         self._inputs = None
         self._current_input = None
 
@@ -74,6 +77,9 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the text files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.txt'", required=False)
         parser.add_argument("-r", "--rel_path", type=str, help="The relative path to the audio files.", required=False, default=".")
+        parser.add_argument("--no_check", action="store_true", help="Does not check whether the audio files exist, for trusted datasets.")
+        self._add_shard_arguments(parser)
+        self._add_checkpoint_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -88,6 +94,9 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         self.source_list = ns.input_list
         self.rel_path = ns.rel_path
         self.resume_from = ns.resume_from
+        self.no_check = ns.no_check
+        self._apply_shard_arguments(ns)
+        self._apply_checkpoint_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -106,6 +115,8 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         self._inputs = None
         if self.rel_path is None:
             self.rel_path = "."
+        self._initialize_sharding()
+        self._initialize_checkpoint()
 
     def read(self) -> Iterable:
         """
@@ -120,11 +131,10 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
 
-        with open(self.session.current_input) as fp:
-            lines = [line.strip() for line in fp.readlines()]
-
         basedir = os.path.dirname(self.session.current_input)
-        for line in lines:
+        # stream the lines rather than loading the whole file (resumes from checkpoint, if available)
+        for line in self._iter_manifest(self.session.current_input):
+            line = line.strip()
             if len(line) == 0:
                 continue
 
@@ -136,10 +146,12 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
             if not wav_filename.lower().endswith(".wav"):
                 wav_filename += ".wav"
 
+            if not self._in_shard(wav_filename, self._manifest_row):
+                continue
             audio = os.path.join(basedir, self.rel_path, wav_filename)
-            if not os.path.exists(audio):
+            if (not self.no_check) and (not get_directory_index().exists(audio)):
                 self.logger().warning("Audio file not found: %s" % audio)
-                yield None
+                continue
 
             yield SpeechData(source=audio, annotation=transcription)
 
@@ -151,3 +163,10 @@ class FestVoxSpeechReader(Reader, VariableSupporter):
         :rtype: bool
         """
         return (self._inputs is not None) and len(self._inputs) == 0
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        self._finalize_checkpoint()
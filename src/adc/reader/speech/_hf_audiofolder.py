@@ -1,5 +1,4 @@
 import argparse
-import csv
 import os
 from typing import List, Iterable, Union
 
@@ -8,15 +7,15 @@ from seppl.io import locate_files
 from seppl.variables import VariableSupporter, variable_list
 
 from kasperl.api import Reader
-from adc.api import SpeechData
+from adc.api import SpeechData, ShardSupporter, CheckpointSupporter, get_directory_index, iter_manifest_lines
 
 HF_AUDIOFOLDER_EXPECTED_HEADER = "file_name,transcription"
 
 
-class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
+class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter, ShardSupporter, CheckpointSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 resume_from: str = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
+                 resume_from: str = None, no_check: bool = False, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
 
@@ -24,6 +23,8 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
         :param source_list: the file(s) with filename(s)
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param no_check: whether to skip checking whether the audio files exist
+        :type no_check: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -33,6 +34,7 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
         self.source = source
         self.source_list = source_list
         self.resume_from = resume_from
+        self.no_check = no_check
         self._inputs = None
         self._current_input = None
 
@@ -65,6 +67,9 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
         parser.add_argument("-i", "--input", type=str, help="Path to the CSV file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the CSV files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.csv'", required=False)
+        parser.add_argument("--no_check", action="store_true", help="Does not check whether the audio files exist, for trusted datasets.")
+        self._add_shard_arguments(parser)
+        self._add_checkpoint_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -78,6 +83,9 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
         self.source = ns.input
         self.source_list = ns.input_list
         self.resume_from = ns.resume_from
+        self.no_check = ns.no_check
+        self._apply_shard_arguments(ns)
+        self._apply_checkpoint_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -94,6 +102,8 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
         """
         super().initialize()
         self._inputs = None
+        self._initialize_sharding()
+        self._initialize_checkpoint()
 
     def read(self) -> Iterable:
         """
@@ -110,25 +120,29 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
 
         basedir = os.path.dirname(self.session.current_input)
 
-        with open(os.path.join(self.session.current_input), 'r', newline='') as fp:
-            # Consume the header
-            header = fp.readline().strip()
-
-            # is the header as expected?
-            if header == HF_AUDIOFOLDER_EXPECTED_HEADER:
-                reader = csv.DictReader(fp, HF_AUDIOFOLDER_EXPECTED_HEADER.split(','))
-            else:
-                raise ValueError(f"Expected header: {HF_AUDIOFOLDER_EXPECTED_HEADER}\n"
-                                 f"Seen header: {header}")
-
-            # Yield rows from the file
-            for row in reader:
-                audio = os.path.join(basedir, row["file_name"])
-                if not os.path.exists(audio):
-                    self.logger().warning("Audio file not found: %s" % audio)
-                    yield None
-
-                yield SpeechData(source=audio, annotation=row['transcription'])
+        # is the header as expected?
+        header = ""
+        for _, _, line in iter_manifest_lines(self.session.current_input):
+            header = line.strip()
+            break
+        if header != HF_AUDIOFOLDER_EXPECTED_HEADER:
+            raise ValueError(f"Expected header: {HF_AUDIOFOLDER_EXPECTED_HEADER}\n"
+                             f"Seen header: {header}")
+
+        # stream the records rather than loading the whole file (resumes from checkpoint, if available);
+        # quoted transcriptions can span multiple lines
+        reader = self._iter_manifest_csv(self.session.current_input, HF_AUDIOFOLDER_EXPECTED_HEADER.split(','), has_header=True)
+
+        # Yield rows from the file
+        for row in reader:
+            if not self._in_shard(row["file_name"], self._manifest_row):
+                continue
+            audio = os.path.join(basedir, row["file_name"])
+            if (not self.no_check) and (not get_directory_index().exists(audio)):
+                self.logger().warning("Audio file not found: %s" % audio)
+                continue
+
+            yield SpeechData(source=audio, annotation=row['transcription'])
 
     def has_finished(self) -> bool:
         """
@@ -138,3 +152,10 @@ class HuggingFaceAudioFolderSpeechReader(Reader, VariableSupporter):
         :rtype: bool
         """
         return (self._inputs is not None) and len(self._inputs) == 0
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        self._finalize_checkpoint()
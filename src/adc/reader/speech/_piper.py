@@ -8,7 +8,7 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader
-from adc.api import SpeechData
+from adc.api import SpeechData, ShardSupporter, CheckpointSupporter, get_directory_index
 
 COMONVOICE_EXPECTED_HEADER = "client_id	path	sentence	up_votes	down_votes	age	gender	accents	locale	segment"
 COMONVOICE_EXPECTED_HEADER_OLD = "client_id	path	sentence	up_votes	down_votes	age	gender	accent	locale	segment"
@@ -27,10 +27,10 @@ class CommonVoiceDialect(csv.Dialect):
     quoting = csv.QUOTE_NONE
 
 
-class PiperSpeechReader(Reader, VariableSupporter):
+class PiperSpeechReader(Reader, VariableSupporter, ShardSupporter, CheckpointSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 rel_path: str = None, speaker_key: str = None, resume_from: str = None,
+                 rel_path: str = None, speaker_key: str = None, resume_from: str = None, no_check: bool = False,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -43,6 +43,8 @@ class PiperSpeechReader(Reader, VariableSupporter):
         :type speaker_key: str
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param no_check: whether to skip checking whether the audio files exist
+        :type no_check: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -54,6 +56,7 @@ class PiperSpeechReader(Reader, VariableSupporter):
         self.rel_path = rel_path
         self.speaker_key = speaker_key
         self.resume_from = resume_from
+        self.no_check = no_check
         self._inputs = None
         self._current_input = None
 
@@ -88,6 +91,9 @@ class PiperSpeechReader(Reader, VariableSupporter):
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.csv'", required=False)
         parser.add_argument("--speaker_key", type=str, help="The key in the meta-data with the speaker name/ID.", required=False, default="speaker")
         parser.add_argument("-r", "--rel_path", type=str, help="The relative path to the audio files.", required=False, default="wav")
+        parser.add_argument("--no_check", action="store_true", help="Does not check whether the audio files exist, for trusted datasets.")
+        self._add_shard_arguments(parser)
+        self._add_checkpoint_arguments(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -103,6 +109,9 @@ class PiperSpeechReader(Reader, VariableSupporter):
         self.rel_path = ns.rel_path
         self.speaker_key = ns.speaker_key
         self.resume_from = ns.resume_from
+        self.no_check = ns.no_check
+        self._apply_shard_arguments(ns)
+        self._apply_checkpoint_arguments(ns)
 
     def generates(self) -> List:
         """
@@ -123,6 +132,8 @@ class PiperSpeechReader(Reader, VariableSupporter):
             self.rel_path = "."
         if self.speaker_key is None:
             self.speaker_key = "speaker"
+        self._initialize_sharding()
+        self._initialize_checkpoint()
 
     def read(self) -> Iterable:
         """
@@ -139,34 +150,36 @@ class PiperSpeechReader(Reader, VariableSupporter):
 
         basedir = os.path.dirname(self.session.current_input)
 
-        with open(self.session.current_input, 'r') as fp:
-            for row in fp.readlines():
-                row = row.strip()
-                if len(row) == 0:
-                    continue
-                if "|" not in row:
-                    self.logger().warning("Skipping row without separator '|': %s" % row)
-                    continue
-                parts = row.split("|")
-                if len(parts) == 2:
-                    id_, text = parts
-                    speaker = None
-                elif len(parts) == 3:
-                    id_, speaker, text = parts
-                else:
-                    self.logger().warning("Expected 2 or 3 column but got %d, skipping: %s" % (len(parts), row))
-                    continue
-
-                audio = os.path.join(basedir, self.rel_path, id_ + ".wav")
-                if not os.path.exists(audio):
-                    self.logger().warning("Audio file not found: %s" % audio)
-                    yield None
-
-                meta = None
-                if speaker is not None:
-                    meta = {self.speaker_key: speaker}
-
-                yield SpeechData(source=audio, annotation=text, metadata=meta)
+        # stream the rows rather than loading the whole file (resumes from checkpoint, if available)
+        for row in self._iter_manifest(self.session.current_input):
+            row = row.strip()
+            if len(row) == 0:
+                continue
+            if "|" not in row:
+                self.logger().warning("Skipping row without separator '|': %s" % row)
+                continue
+            parts = row.split("|")
+            if len(parts) == 2:
+                id_, text = parts
+                speaker = None
+            elif len(parts) == 3:
+                id_, speaker, text = parts
+            else:
+                self.logger().warning("Expected 2 or 3 column but got %d, skipping: %s" % (len(parts), row))
+                continue
+
+            if not self._in_shard(id_, self._manifest_row):
+                continue
+            audio = os.path.join(basedir, self.rel_path, id_ + ".wav")
+            if (not self.no_check) and (not get_directory_index().exists(audio)):
+                self.logger().warning("Audio file not found: %s" % audio)
+                continue
+
+            meta = None
+            if speaker is not None:
+                meta = {self.speaker_key: speaker}
+
+            yield SpeechData(source=audio, annotation=text, metadata=meta)
 
     def has_finished(self) -> bool:
         """
@@ -176,3 +189,10 @@ class PiperSpeechReader(Reader, VariableSupporter):
         :rtype: bool
         """
         return (self._inputs is not None) and len(self._inputs) == 0
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        self._finalize_checkpoint()
@@ -1,14 +1,57 @@
 import traceback
 
+from adc.api import set_memmap_wav, set_dtype, DTYPES, decode_backends, decode_stats, set_audio_cache_size, get_audio_cache
 from adc.core import ENV_ADC_LOGLEVEL
 from adc.help import generate_plugin_usage
 from adc.registry import available_readers, available_filters, available_writers, REGISTRY
-from kasperl.api import perform_conversion
+from kasperl.api import perform_conversion, CommandlineParameter
 
 CONVERT = "adc-convert"
 DESCRIPTION = "Tool for converting between audio dataset formats."
 
 
+def _additional_params():
+    """
+    Returns the audio-specific global options.
+
+    :return: the list of option definitions
+    :rtype: list
+    """
+    return [
+        CommandlineParameter(long_opt="--memmap_wav", help="Memory-maps uncompressed PCM WAV files rather than decoding them.", action="store_true"),
+        CommandlineParameter(long_opt="--audio_cache_mb", type=float, help="The size in MB of the cache for decoded audio that is shared across filters and sub-flows, 0 disables it.", default=None),
+        CommandlineParameter(long_opt="--dtype", choices=DTYPES, help="The data type to use for the audio samples in memory (default: float64).", default=None),
+    ]
+
+
+def _pre_initialize(session):
+    """
+    Applies the audio-specific global options before the plugins get initialized.
+
+    :param session: the session object
+    """
+    if session.options.memmap_wav:
+        set_memmap_wav(True)
+    if session.options.dtype is not None:
+        set_dtype(session.options.dtype)
+    if session.options.audio_cache_mb is not None:
+        set_audio_cache_size(session.options.audio_cache_mb)
+    session.logger.debug("decode backends: %s" % ", ".join(decode_backends()))
+
+
+def _post_finalize(session):
+    """
+    Outputs statistics about the audio decoding after the plugins have been finalized.
+
+    :param session: the session object
+    """
+    stats = decode_stats()
+    for fmt, backend in sorted(stats.keys()):
+        session.logger.info("decoded %s: %s=%d" % (fmt, backend, stats[(fmt, backend)]))
+    if get_audio_cache().enabled:
+        session.logger.info("audio cache: %s" % str(get_audio_cache()))
+
+
 def main(args=None):
     """
     The main method for parsing command-line arguments.
@@ -19,7 +62,8 @@ def main(args=None):
     perform_conversion(
         ENV_ADC_LOGLEVEL, args, CONVERT, DESCRIPTION,
         available_readers(), available_filters(), available_writers(), aliases=REGISTRY.all_aliases,
-        require_reader=True, require_writer=False, generate_plugin_usage=generate_plugin_usage)
+        require_reader=True, require_writer=False, generate_plugin_usage=generate_plugin_usage,
+        additional_params=_additional_params(), pre_initialize=_pre_initialize, post_finalize=_post_finalize)
 
 
 def sys_main() -> int:
@@ -4,5 +4,7 @@ from ._data import DataWriter
 from ._metadata import MetaDataWriter
 from ._multi import MultiWriter
 from ._pyfunc import PythonFunctionWriter
+from ._records import RecordsWriter
 from ._send_email import SendEmail
 from ._text_file import TextFileWriter
+from ._webdataset import WebDatasetWriter, SHARD_INDEX
@@ -11,7 +11,7 @@ from adc.api import AudioData
 
 class DataWriter(SplittableStreamWriter, InputBasedVariableSupporter):
 
-    def __init__(self, output_dir: str = None,
+    def __init__(self, output_dir: str = None, hardlink: bool = False,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -19,6 +19,8 @@ class DataWriter(SplittableStreamWriter, InputBasedVariableSupporter):
 
         :param output_dir: the output directory to save the audio/report in
         :type output_dir: str
+        :param hardlink: whether to hard-link unmodified audio files rather than copying them
+        :type hardlink: bool
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -32,6 +34,7 @@ class DataWriter(SplittableStreamWriter, InputBasedVariableSupporter):
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
         self.output_dir = output_dir
+        self.hardlink = hardlink
 
     def name(self) -> str:
         """
@@ -60,6 +63,7 @@ class DataWriter(SplittableStreamWriter, InputBasedVariableSupporter):
         """
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The directory to store the audio files in. Any defined splits get added beneath there. " + variable_list(obj=self), required=True)
+        parser.add_argument("--hardlink", action="store_true", help="Whether to hard-link unmodified audio files rather than copying them (falls back to copying, e.g., across file systems).")
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -71,6 +75,7 @@ class DataWriter(SplittableStreamWriter, InputBasedVariableSupporter):
         """
         super()._apply_args(ns)
         self.output_dir = ns.output
+        self.hardlink = ns.hardlink
 
     def accepts(self) -> List:
         """
@@ -98,4 +103,4 @@ class DataWriter(SplittableStreamWriter, InputBasedVariableSupporter):
 
             path = os.path.join(sub_dir, item.audio_name)
             self.logger().info("Writing audio to: %s" % path)
-            item.save_audio(path)
+            item.save_audio(path, hardlink=self.hardlink)
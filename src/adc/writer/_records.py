@@ -0,0 +1,116 @@
+import argparse
+import os
+import sys
+from typing import List
+
+from wai.logging import LOGGING_WARNING
+
+from seppl.variables import VariableSupporter, variable_list, expand_variables
+from kasperl.api import StreamWriter, make_list
+from adc.api import AudioData, write_record
+
+
+class RecordsWriter(StreamWriter, VariableSupporter):
+
+    def __init__(self, output_file: str = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the writer.
+
+        :param output_file: the file to write the records to, - for stdout
+        :type output_file: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.output_file = output_file
+        self._fp = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "to-records"
+
+    def description(self) -> str:
+        """
+        Returns a description of the writer.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Writes the audio data as binary records (meta-data as JSON, audio bytes as is), e.g., for spooling or for piping them into another adc-convert process (see from-records)."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-o", "--output_file", type=str, help="The file to write the records to; use - for stdout. " + variable_list(obj=self), required=True)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.output_file = ns.output_file
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioData]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.output_file is None:
+            raise Exception("No output file provided!")
+        self._fp = None
+
+    def write_stream(self, data):
+        """
+        Saves the data one by one.
+
+        :param data: the data to write (single record or iterable of records)
+        """
+        if self._fp is None:
+            if self.output_file == "-":
+                self._fp = sys.stdout.buffer
+            else:
+                path = expand_variables(self.output_file)
+                parent_dir = os.path.dirname(path)
+                if (len(parent_dir) > 0) and not os.path.exists(parent_dir):
+                    self.logger().info("Creating dir: %s" % parent_dir)
+                    os.makedirs(parent_dir)
+                self.logger().info("Writing records to: %s" % path)
+                self._fp = open(path, "wb")
+        for item in make_list(data):
+            write_record(self._fp, item)
+        self._fp.flush()
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if (self._fp is not None) and (self.output_file != "-"):
+            self._fp.close()
+        self._fp = None
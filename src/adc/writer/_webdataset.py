@@ -0,0 +1,305 @@
+import argparse
+import io
+import json
+import os
+import tarfile
+import time
+from typing import List, Dict
+
+from wai.logging import LOGGING_WARNING
+
+from seppl.variables import InputBasedVariableSupporter, variable_list
+from kasperl.api import SplittableStreamWriter, make_list
+from adc.api import AudioData, webdataset_key, webdataset_annotation_ext, WEBDATASET_EXT_METADATA, WEBDATASET_KEY_AUDIO_NAME
+
+DEFAULT_SHARD_PATTERN = "shard-%06d.tar"
+""" the default pattern for the shard names. """
+
+SHARD_INDEX = "index.json"
+""" the name of the index file listing the shards. """
+
+_BLOCK_SIZE = tarfile.BLOCKSIZE
+""" the block size that tar members get padded to. """
+
+
+class _ShardState(object):
+    """
+    The state of the shards of a single output directory (ie split).
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        Initializes the state.
+
+        :param output_dir: the directory the shards get written to
+        :type output_dir: str
+        """
+        self.output_dir = output_dir
+        self.index = []
+        self.tar = None
+        self.name = None
+        self.num_records = 0
+        self.size = 0
+        self.keys = set()
+
+
+class WebDatasetWriter(SplittableStreamWriter, InputBasedVariableSupporter):
+
+    def __init__(self, output_dir: str = None, pattern: str = None, max_size: float = None, max_records: int = None,
+                 split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the writer.
+
+        :param output_dir: the output directory to save the shards in
+        :type output_dir: str
+        :param pattern: the pattern for the shard names (with a single %d for the shard number)
+        :type pattern: str
+        :param max_size: the maximum size of a shard in MB (<=0 for unlimited)
+        :type max_size: float
+        :param max_records: the maximum number of records per shard (<1 for unlimited)
+        :type max_records: int
+        :param split_names: the names of the splits, no splitting if None
+        :type split_names: list
+        :param split_ratios: the integer ratios of the splits (must sum up to 100)
+        :type split_ratios: list
+        :param split_group: the regular expression with a single group used for keeping items in the same split, e.g., for identifying the base name of a file or the ID
+        :type split_group: str
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.output_dir = output_dir
+        self.pattern = pattern
+        self.max_size = max_size
+        self.max_records = max_records
+        self._states = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "to-webdataset"
+
+    def description(self) -> str:
+        """
+        Returns a description of the writer.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Writes the audio data as tar shards in WebDataset layout: audio, transcript (.txt) or label (.cls) " \
+               "and meta-data (.json, incl the original audio name) as members sharing the same key (the name without " \
+               "extension, dots replaced with underscores; made unique within the shard). Starts a new shard once the maximum size or " \
+               "number of records is reached and writes an index of the shards (" + SHARD_INDEX + ")."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-o", "--output", type=str, help="The directory to store the shards in. Any defined splits get added beneath there. " + variable_list(obj=self), required=True)
+        parser.add_argument("-p", "--pattern", type=str, help="The pattern for the shard names, with a single %%d for the shard number.", required=False, default=DEFAULT_SHARD_PATTERN)
+        parser.add_argument("-s", "--max_size", type=float, help="The maximum size of a shard in MB; <=0 for unlimited.", required=False, default=1000.0)
+        parser.add_argument("-n", "--max_records", type=int, help="The maximum number of records per shard; <1 for unlimited.", required=False, default=-1)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.output_dir = ns.output
+        self.pattern = ns.pattern
+        self.max_size = ns.max_size
+        self.max_records = ns.max_records
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [AudioData]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.pattern is None:
+            self.pattern = DEFAULT_SHARD_PATTERN
+        if self.max_size is None:
+            self.max_size = 1000.0
+        if self.max_records is None:
+            self.max_records = -1
+        self._states = dict()
+
+    def _members(self, item: AudioData, key: str) -> Dict[str, bytes]:
+        """
+        Generates the tar members for the container. The original audio name gets stored
+        in the meta-data, as the key cannot contain dots.
+
+        :param item: the container to turn into members
+        :type item: AudioData
+        :param key: the sample key to use
+        :type key: str
+        :return: the member name -> content mapping
+        :rtype: dict
+        """
+        result = dict()
+        data = item.audio_bytes
+        if data is None:
+            raise Exception("No audio data available: %s" % item.audio_name)
+        result[key + os.path.splitext(item.audio_name)[1]] = data
+        ann_ext = webdataset_annotation_ext(item)
+        if (ann_ext is not None) and item.has_annotation():
+            result[key + ann_ext] = str(item.annotation).encode("utf-8")
+        metadata = dict()
+        if item.has_metadata():
+            metadata.update(item.get_metadata())
+        metadata[WEBDATASET_KEY_AUDIO_NAME] = item.audio_name
+        result[key + WEBDATASET_EXT_METADATA] = json.dumps(metadata).encode("utf-8")
+        return result
+
+    def _unique_key(self, state: _ShardState, item: AudioData) -> str:
+        """
+        Returns a key for the container that is unique within the current shard,
+        appending a counter if the key was already used.
+
+        :param state: the state with the keys of the current shard
+        :type state: _ShardState
+        :param item: the container to get the key for
+        :type item: AudioData
+        :return: the key
+        :rtype: str
+        """
+        key = webdataset_key(item.audio_name)
+        if key in state.keys:
+            count = 2
+            while (key + "_" + str(count)) in state.keys:
+                count += 1
+            self.logger().warning("Key '%s' already used in shard %s, using '%s' for: %s" % (key, state.name, key + "_" + str(count), item.audio_name))
+            key = key + "_" + str(count)
+        return key
+
+    def _close_shard(self, state: _ShardState):
+        """
+        Closes the current shard of the state, records it in the index and updates the index file.
+
+        :param state: the state to update
+        :type state: _ShardState
+        """
+        if state.tar is None:
+            return
+        state.tar.close()
+        state.tar = None
+        state.index.append({
+            "shard": state.name,
+            "num_records": state.num_records,
+            "size": os.path.getsize(os.path.join(state.output_dir, state.name)),
+        })
+        path = os.path.join(state.output_dir, SHARD_INDEX)
+        with open(path, "w") as fp:
+            json.dump({"shards": state.index}, fp, indent=2)
+        self.logger().info("Shard %s complete: %d record(s)" % (state.name, state.num_records))
+
+    def _get_state(self, output_dir: str) -> _ShardState:
+        """
+        Returns the state for the output directory, creating the directory if necessary.
+
+        :param output_dir: the directory to get the state for
+        :type output_dir: str
+        :return: the state
+        :rtype: _ShardState
+        """
+        if output_dir not in self._states:
+            if not os.path.exists(output_dir):
+                self.logger().info("Creating dir: %s" % output_dir)
+                os.makedirs(output_dir)
+            self._states[output_dir] = _ShardState(output_dir)
+        return self._states[output_dir]
+
+    def _needs_rollover(self, state: _ShardState, size: int) -> bool:
+        """
+        Checks whether a new shard needs to be started before adding a record of the specified size.
+
+        :param state: the current state
+        :type state: _ShardState
+        :param size: the size of the record in the tar file
+        :type size: int
+        :return: True if a new shard is required
+        :rtype: bool
+        """
+        if state.tar is None:
+            return True
+        if state.num_records == 0:
+            return False
+        if (self.max_records > 0) and (state.num_records >= self.max_records):
+            return True
+        # reserve space for the end-of-archive marker and the padding to a full tar record
+        if (self.max_size > 0) and (state.size + size + tarfile.RECORDSIZE > self.max_size * 1024 * 1024):
+            return True
+        return False
+
+    def write_stream(self, data):
+        """
+        Saves the data one by one.
+
+        :param data: the data to write (single record or iterable of records)
+        """
+        for item in make_list(data):
+            output_dir = self.session.expand_variables(self.output_dir)
+            if self.splitter is not None:
+                split = self.splitter.next(item=item.audio_name)
+                output_dir = os.path.join(output_dir, split)
+            state = self._get_state(output_dir)
+
+            members = self._members(item, webdataset_key(item.audio_name))
+            # each member: header block + content padded to full blocks (approximate, ignores extended headers)
+            size = sum([_BLOCK_SIZE + (len(x) + _BLOCK_SIZE - 1) // _BLOCK_SIZE * _BLOCK_SIZE for x in members.values()])
+            if self._needs_rollover(state, size):
+                self._close_shard(state)
+                state.name = self.pattern % len(state.index)
+                state.num_records = 0
+                state.size = 0
+                state.keys = set()
+                path = os.path.join(output_dir, state.name)
+                self.logger().info("Writing shard: %s" % path)
+                state.tar = tarfile.open(path, mode="w")
+
+            key = self._unique_key(state, item)
+            if key != webdataset_key(item.audio_name):
+                members = self._members(item, key)
+            state.keys.add(key)
+
+            mtime = int(time.time())
+            for name, content in members.items():
+                info = tarfile.TarInfo(name=name)
+                info.size = len(content)
+                info.mtime = mtime
+                state.tar.addfile(info, io.BytesIO(content))
+            state.num_records += 1
+            state.size += size
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._states is not None:
+            for state in self._states.values():
+                self._close_shard(state)
+            self._states = None
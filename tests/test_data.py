@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+import soundfile as sf
+
+from adc.api import AudioData, set_memmap_wav, is_memmap_wav
+
+
+def test_save_modified_over_memmap_source(tmp_path):
+    path = os.path.join(str(tmp_path), "clip.wav")
+    audio = (np.sin(np.arange(16000) / 10.0) * 0.5).astype(np.float32)
+    sf.write(path, audio, 16000, subtype="PCM_16")
+    expected, _ = sf.read(path, dtype="float32")
+
+    enabled = is_memmap_wav()
+    set_memmap_wav(True)
+    try:
+        item = AudioData(source=path)
+        mapped = item.audio
+        # shorter output, overwriting the source in-place would truncate the memory-mapped file
+        item_new = item.duplicate(audio=np.asarray(mapped)[:4000] * 0.5, modified=True)
+        assert item_new.save_audio(path)
+        assert not os.path.exists(path + ".part")
+        assert len(sf.read(path)[0]) == 4000
+        assert np.array_equal(np.asarray(mapped), expected)
+    finally:
+        set_memmap_wav(enabled)
@@ -0,0 +1,76 @@
+import os
+
+from seppl import Session
+
+from adc.reader.speech import HuggingFaceAudioFolderSpeechReader
+
+CSV = 'file_name,transcription\n' \
+      'a.wav,first\n' \
+      'b.wav,"second\nspans, two lines"\n' \
+      'c.wav,"third ""quoted"""\n' \
+      'd.wav,"fourth\r\nspans\nthree lines"\n' \
+      'e.wav,fifth\n'
+
+
+def _read(path: str, checkpoint: str = None, limit: int = None, num_shards: int = None, shard_index: int = None) -> list:
+    """
+    Reads the records from the manifest.
+
+    :param path: the manifest to read
+    :type path: str
+    :param checkpoint: the checkpoint file to use, can be None
+    :type checkpoint: str
+    :param limit: the maximum number of records to read, reads all if None
+    :type limit: int
+    :param num_shards: the number of shards (round-robin), no sharding if None
+    :type num_shards: int
+    :param shard_index: the shard to read
+    :type shard_index: int
+    :return: the list of tuples of file name and transcription
+    :rtype: list
+    """
+    reader = HuggingFaceAudioFolderSpeechReader(source=path, no_check=True)
+    reader.checkpoint = checkpoint
+    reader.checkpoint_interval = 1
+    reader.num_shards = num_shards
+    reader.shard_index = shard_index
+    reader.shard_mode = "roundrobin"
+    reader.session = Session()
+    reader.initialize()
+    result = []
+    for item in reader.read():
+        result.append((os.path.basename(item.source), item.annotation))
+        if (limit is not None) and (len(result) >= limit):
+            break
+    reader.finalize()
+    return result
+
+
+def test_resume_multiline(tmp_path):
+    path = os.path.join(str(tmp_path), "metadata.csv")
+    with open(path, "wb") as fp:
+        fp.write(CSV.encode("utf-8"))
+    checkpoint = os.path.join(str(tmp_path), "checkpoint.json")
+
+    full = _read(path)
+    assert [x[0] for x in full] == ["a.wav", "b.wav", "c.wav", "d.wav", "e.wav"]
+    assert full[1][1] == "second\nspans, two lines"
+    assert full[3][1] == "fourth\r\nspans\nthree lines"
+
+    # stops after the multi-line record, which only counts as processed once the next one is requested
+    for limit in range(1, len(full) + 1):
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        partial = _read(path, checkpoint=checkpoint, limit=limit)
+        resumed = _read(path, checkpoint=checkpoint)
+        assert partial == full[:limit]
+        assert resumed == full[limit - 1:]
+
+
+def test_round_robin_multiline(tmp_path):
+    path = os.path.join(str(tmp_path), "metadata.csv")
+    with open(path, "wb") as fp:
+        fp.write(CSV.encode("utf-8"))
+
+    assert [x[0] for x in _read(path, num_shards=2, shard_index=0)] == ["a.wav", "c.wav", "e.wav"]
+    assert [x[0] for x in _read(path, num_shards=2, shard_index=1)] == ["b.wav", "d.wav"]
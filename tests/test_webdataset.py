@@ -0,0 +1,81 @@
+import io
+import os
+import tarfile
+
+import numpy as np
+import soundfile as sf
+from seppl import Session
+
+from adc.api import SpeechData
+from adc.reader import WebDatasetReader
+from adc.writer import WebDatasetWriter
+
+
+def _wav_bytes(value: float) -> bytes:
+    """
+    Generates a short WAV file.
+
+    :param value: the constant sample value
+    :type value: float
+    :return: the encoded audio
+    :rtype: bytes
+    """
+    buf = io.BytesIO()
+    sf.write(buf, np.full(160, value, dtype=np.float32), 16000, format="WAV")
+    return buf.getvalue()
+
+
+def _write(output_dir: str, items: list):
+    """
+    Writes the records as shards to the directory.
+
+    :param output_dir: the directory to write to
+    :type output_dir: str
+    :param items: the records to write
+    :type items: list
+    """
+    writer = WebDatasetWriter(output_dir=output_dir)
+    writer.session = Session()
+    writer.initialize()
+    writer.write_stream(items)
+    writer.finalize()
+
+
+def _read(output_dir: str) -> list:
+    """
+    Reads all the records from the shards in the directory.
+
+    :param output_dir: the directory to read from
+    :type output_dir: str
+    :return: the records
+    :rtype: list
+    """
+    reader = WebDatasetReader(source=os.path.join(output_dir, "*.tar"), data_type="sp")
+    reader.session = Session()
+    reader.initialize()
+    result = []
+    while not reader.has_finished():
+        result.extend(reader.read())
+    reader.finalize()
+    return result
+
+
+def test_round_trip_dotted_names(tmp_path):
+    items = [
+        SpeechData(audio_name="rec.01.wav", data=_wav_bytes(0.1), annotation="first", metadata={"i": 0}),
+        SpeechData(audio_name="rec.02.wav", data=_wav_bytes(0.2), metadata={"i": 1}),
+        SpeechData(audio_name="rec.03.wav", data=_wav_bytes(0.3), annotation="third"),
+        SpeechData(audio_name="rec_01.wav", data=_wav_bytes(0.4), annotation="clash"),
+    ]
+    _write(str(tmp_path), items)
+
+    with tarfile.open(os.path.join(str(tmp_path), "shard-000000.tar")) as tar:
+        names = tar.getnames()
+    assert len(names) == len(set(names))
+
+    output = _read(str(tmp_path))
+    assert [x.audio_name for x in output] == [x.audio_name for x in items]
+    assert [x.annotation for x in output] == ["first", None, "third", "clash"]
+    assert [x.get_metadata() for x in output] == [{"i": 0}, {"i": 1}, None, None]
+    for item, out in zip(items, output):
+        assert out.audio_bytes == item.audio_bytes